@@ -0,0 +1,172 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CBulkObservation.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Observe many values at once in summaries and histograms (e.g. a measurement series out of a log file).
+#
+# - The values are loaded from a list, a NumPy array or a file (NumPy '.npy', raw little endian float64 '.bin',
+#   or a text file with separated values like '.csv').
+#
+# - Bucket counts, sum and count are computed in one vectorized pass (NumPy 'searchsorted'/'bincount')
+#   and applied to the series with one increment per bucket.
+#
+# NumPy is optional: without NumPy the values are processed in pure Python (bisect), with the same results.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, bisect, math
+
+# --------------------------------------------------------------------------------------------------------------
+
+def import_numpy():
+   """Returns the optional NumPy package (imported when used for the first time), or None if not available
+   """
+   try:
+      import numpy
+   except ImportError:
+      return None
+   return numpy
+
+# --------------------------------------------------------------------------------------------------------------
+
+def sniff_delimiter(sFile):
+   """Returns the delimiter of a text file with separated values (';', ',', tab or None for whitespace)
+   """
+   with open(sFile, encoding='utf-8') as hFile:
+      sLine = hFile.readline()
+   for sDelimiter in (';', ',', '\t'):
+      if sDelimiter in sLine:
+         return sDelimiter
+   return None
+
+def has_header(sFile, delimiter, column):
+   """Returns True in case of the value column of the first line of a text file is not a number
+   """
+   with open(sFile, encoding='utf-8') as hFile:
+      sLine = hFile.readline()
+   try:
+      float(sLine.split(delimiter)[int(column)])
+   except (ValueError, IndexError):
+      return True
+   return False
+
+def load_values(values=None, column=0, delimiter=None, skip_rows=None):
+   """Returns the values to be observed as NumPy array (or as list of floats, in case of NumPy is not available).
+
+``values`` is either a list or array of values, or the path to a file:
+
+* ``*.npy``: NumPy array (memory-mapped)
+* ``*.bin``: raw little endian float64 values (memory-mapped)
+* any other file: text file with separated values; the values are taken from column ``column``.
+  If ``skip_rows`` is not defined, a header line is detected automatically.
+   """
+   numpy = import_numpy()
+   if values is None:
+      raise ValueError("No values defined")
+   if isinstance(values, (str, os.PathLike)):
+      sFile = os.fspath(values)
+      if not os.path.isfile(sFile):
+         raise ValueError(f"File '{sFile}' not found")
+      sExtension = os.path.splitext(sFile)[1].lower()
+      if numpy is not None:
+         if sExtension == ".npy":
+            return numpy.asarray(numpy.load(sFile, mmap_mode='r'), dtype=numpy.float64).ravel()
+         if sExtension == ".bin":
+            return numpy.memmap(sFile, dtype='<f8', mode='r')
+         if delimiter is None:
+            delimiter = sniff_delimiter(sFile)
+         if skip_rows is None:
+            skip_rows = 1 if has_header(sFile, delimiter, column) else 0
+         return numpy.loadtxt(sFile, delimiter=delimiter, usecols=int(column), skiprows=int(skip_rows), ndmin=1, dtype=numpy.float64)
+      if sExtension in (".npy", ".bin"):
+         raise ImportError(f"The package 'numpy' is required to read '{sExtension}' files")
+      if delimiter is None:
+         delimiter = sniff_delimiter(sFile)
+      if skip_rows is None:
+         skip_rows = 1 if has_header(sFile, delimiter, column) else 0
+      listValues = []
+      with open(sFile, encoding='utf-8') as hFile:
+         for nLine, sLine in enumerate(hFile):
+            if ( (nLine < int(skip_rows)) or (sLine.strip() == "") ):
+               continue
+            listValues.append(float(sLine.split(delimiter)[int(column)]))
+      return listValues
+   if numpy is not None:
+      return numpy.asarray(values, dtype=numpy.float64).ravel()
+   return [float(value) for value in values]
+
+def count_buckets(aValues, listUpperBounds):
+   """Returns the number of values per bucket (not cumulated), the sum and the number of all values.
+NaN values are ignored.
+   """
+   numpy = import_numpy()
+   if numpy is not None:
+      aValues = numpy.asarray(aValues, dtype=numpy.float64)
+      aValues = aValues[~numpy.isnan(aValues)]
+      aIndices = numpy.searchsorted(numpy.asarray(listUpperBounds, dtype=numpy.float64), aValues, side='left')
+      aCounts  = numpy.bincount(aIndices, minlength=len(listUpperBounds))
+      return aCounts.tolist(), float(aValues.sum()), int(aValues.size)
+   listCounts = [0] * len(listUpperBounds)
+   fSum   = 0.0
+   nCount = 0
+   for fValue in aValues:
+      if math.isnan(fValue):
+         continue
+      listCounts[bisect.bisect_left(listUpperBounds, fValue)] += 1
+      fSum   = fSum + fValue
+      nCount = nCount + 1
+   return listCounts, fSum, nCount
+
+def sum_values(aValues):
+   """Returns the sum and the number of all values. NaN values are ignored.
+   """
+   numpy = import_numpy()
+   if numpy is not None:
+      aValues = numpy.asarray(aValues, dtype=numpy.float64)
+      aValues = aValues[~numpy.isnan(aValues)]
+      return float(aValues.sum()), int(aValues.size)
+   listValues = [fValue for fValue in aValues if not math.isnan(fValue)]
+   return math.fsum(listValues), len(listValues)
+
+# --------------------------------------------------------------------------------------------------------------
+
+def observe_histogram_many(oSeries, aValues):
+   """Observes all values in a histogram series; returns the number of values observed
+   """
+   listCounts, fSum, nCount = count_buckets(aValues, oSeries._upper_bounds)
+   for oBucket, nBucketCount in zip(oSeries._buckets, listCounts):
+      if nBucketCount > 0:
+         oBucket.inc(nBucketCount)
+   oSeries._sum.inc(fSum)
+   return nCount
+
+def observe_summary_many(oSeries, aValues):
+   """Observes all values in a summary series; returns the number of values observed
+   """
+   fSum, nCount = sum_values(aValues)
+   oSeries._count.inc(nCount)
+   oSeries._sum.inc(fSum)
+   return nCount
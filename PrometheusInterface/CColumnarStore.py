@@ -0,0 +1,312 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CColumnarStore.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Compact storage of counters and gauges with many series (storage 'columnar' of prometheus_interface).
+#
+# - Every label child of the Prometheus Python client library is a complete metric object (attribute dictionary,
+#   value object with own lock, label dictionary). With hundreds of thousands of series this dominates the memory.
+#   Here a metric keeps the values of all series in columns (one 'array('d')' per value field), addressed by
+#   a series id. The series are thin handles with fixed attributes (metric, series id), providing the same
+#   interface like the label children (inc, dec, set, _value.get(), _samples(), ...).
+#
+# - Label values are interned (CLabelInterner), therefore label values like 'Room_1' or test names are stored
+#   only once, independent of the number of series and metrics using them. A value is released as soon as
+#   the last series using it is removed.
+#
+# - Removed series leave dead slots within the columns. As soon as the dead slots exceed a quarter of the slots
+#   (and at least COMPACT_MIN_DEAD slots), the columns are compacted: the live series get new ids and their handles
+#   are moved to the new columns. Handles of removed series keep the old columns and do not update other series.
+#
+# - The metric is a collector and provides the same metric families like 'Counter' and 'Gauge'.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import time, threading
+from array import array
+
+COLUMNAR_TYPES = ("counter", "gauge")
+
+COMPACT_MIN_DEAD = 1024 # minimum number of dead slots (removed series) compacted at once
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CLabelInterner():
+   """Stores every label value only once (as long as it is used by any series)
+   """
+
+   def __init__(self):
+      self.__dictValues = {} # label value -> [stored instance, number of series using it]
+      self.__oLock      = threading.Lock()
+
+   def __del__(self):
+      pass
+
+   def intern(self, tupleLabelValues):
+      """Returns the label values of a new series with the stored instances of the values
+      """
+      dictValues = self.__dictValues
+      listLabelValues = []
+      with self.__oLock:
+         for sLabelValue in tupleLabelValues:
+            listEntry = dictValues.get(sLabelValue)
+            if listEntry is None:
+               listEntry = dictValues[sLabelValue] = [sLabelValue, 0]
+            listEntry[1] += 1
+            listLabelValues.append(listEntry[0])
+      return tuple(listLabelValues)
+
+   def release(self, tupleLabelValues):
+      """Releases the label values of a removed series
+      """
+      dictValues = self.__dictValues
+      with self.__oLock:
+         for sLabelValue in tupleLabelValues:
+            listEntry = dictValues.get(sLabelValue)
+            if listEntry is None:
+               continue
+            listEntry[1] -= 1
+            if listEntry[1] == 0:
+               del dictValues[sLabelValue]
+
+   def get_count(self):
+      return len(self.__dictValues)
+
+# eof class CLabelInterner():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CColumnarSeries():
+   """Handle of a single series of a columnar metric; provides the interface of the label children of the Prometheus Python client library
+   """
+
+   __slots__ = ('_metric', '_column', '_id')
+
+   def __init__(self, oMetric, arColumn, nId):
+      self._metric = oMetric
+      self._column = arColumn # the column is replaced by 'clear' and 'remove' (compaction), therefore handles of removed series do not update other series
+      self._id     = nId
+
+   def __sizeof__(self):
+      # the handle and the values of the series within the columns
+      return object.__sizeof__(self) + self._metric._nColumnBytes
+
+   @property
+   def _value(self):
+      return self # 'oSeries._value.get()' like with the value objects of the client library
+
+   @property
+   def _type(self):
+      return self._metric._type
+
+   @property
+   def _name(self):
+      return self._metric._name
+
+   @property
+   def _documentation(self):
+      return self._metric._documentation
+
+   @property
+   def _labelnames(self):
+      return self._metric._labelnames
+
+   def get(self):
+      with self._metric._lock: # column and id are changed together by the compaction
+         return self._column[self._id]
+
+   def inc(self, amount=1):
+      if ( (self._metric._type == "counter") and (amount < 0) ):
+         raise ValueError('Counters can only be incremented by non-negative amounts.')
+      with self._metric._lock:
+         self._column[self._id] += amount
+
+   def dec(self, amount=1):
+      if self._metric._type == "counter":
+         raise AttributeError("'Counter' has no method 'dec'")
+      with self._metric._lock:
+         self._column[self._id] -= amount
+
+   def set(self, value):
+      if self._metric._type == "counter":
+         raise AttributeError("'Counter' has no method 'set'")
+      with self._metric._lock:
+         self._column[self._id] = float(value)
+
+   def _samples(self):
+      with self._metric._lock:
+         return self._metric._get_samples(self._column, self._id)
+
+# eof class CColumnarSeries():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CColumnarMetric():
+   """Counter or gauge with labels, keeping the values of all series in columns
+   """
+
+   def __init__(self, sName=None, sDocumentation=None, listLabelNames=(), sType="counter"):
+      if sName is None:
+         raise Exception("sName is None")
+      if sType not in COLUMNAR_TYPES:
+         raise ValueError(f"Invalid type '{sType}' of columnar metric '{sName}'; expected one of: {', '.join(COLUMNAR_TYPES)}")
+      if len(listLabelNames) == 0:
+         raise ValueError(f"Columnar metric '{sName}' without labels")
+      from prometheus_client import Counter, Gauge
+      from prometheus_client.metrics import _use_created, _validate_labelnames, _validate_metric_name
+      if ( (sType == "counter") and sName.endswith("_total") ):
+         sName = sName[:-6] # like 'Counter'
+      _validate_metric_name(sName)
+      _validate_labelnames(Counter if sType == "counter" else Gauge, listLabelNames)
+      self._name          = sName
+      self._documentation = sDocumentation
+      self._labelnames    = tuple(listLabelNames)
+      self._type          = sType
+      self._lock          = threading.Lock() # protects the columns, the series ids and the handles
+      self._arValues      = array('d')
+      self._arCreated     = array('d') if ( (sType == "counter") and _use_created ) else None
+      self._nColumnBytes  = self._arValues.itemsize * (1 if self._arCreated is None else 2)
+      self.__dictHandles     = {}  # label values -> handle of the series (series id and column of the series)
+      self.__listLabelValues = []  # series id -> label values (None: removed series)
+      self.__nDead           = 0   # number of slots of removed series
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def labels(self, *labelvalues):
+      """Returns the handle of the series with the given label values and creates the series, if not yet existing
+      """
+      if len(labelvalues) != len(self._labelnames):
+         raise ValueError('Incorrect label count')
+      return self.series(tuple(str(sLabelValue) for sLabelValue in labelvalues))
+
+   def series(self, tupleLabelValues):
+      """Like 'labels', but the label values are given as tuple of strings; the tuple is kept (shared with the caller)
+      """
+      with self._lock:
+         oHandle = self.__dictHandles.get(tupleLabelValues)
+         if oHandle is None:
+            oHandle = CColumnarSeries(self, self._arValues, len(self._arValues))
+            self._arValues.append(0.0)
+            self.__listLabelValues.append(tupleLabelValues)
+            if self._arCreated is not None:
+               self._arCreated.append(time.time())
+            self.__dictHandles[tupleLabelValues] = oHandle
+      return oHandle
+
+   def remove(self, *labelvalues):
+      """Removes the series with the given label values. The slot of the series is dead until the next compaction of the
+columns (when the dead slots exceed a quarter of the slots); handles of removed series, e.g. within a metric transaction,
+do not update other series.
+      """
+      if len(labelvalues) != len(self._labelnames):
+         raise ValueError(f'Incorrect label count (expected {len(self._labelnames)}, got {labelvalues})')
+      tupleLabelValues = tuple(str(sLabelValue) for sLabelValue in labelvalues)
+      with self._lock:
+         oHandle = self.__dictHandles.pop(tupleLabelValues, None)
+         if oHandle is None:
+            return
+         self.__listLabelValues[oHandle._id] = None
+         self.__nDead += 1
+         if ( (self.__nDead >= COMPACT_MIN_DEAD) and (4 * self.__nDead > len(self.__listLabelValues)) ):
+            self.__compact()
+
+   def __compact(self):
+      """Copies the live series to new columns and moves their handles; the old columns stay with the handles of the removed series.
+To be called with the lock held.
+      """
+      arValues  = array('d')
+      arCreated = array('d') if self._arCreated is not None else None
+      listLabelValues = []
+      for nId, tupleLabelValues in enumerate(self.__listLabelValues):
+         if tupleLabelValues is None:
+            continue
+         oHandle = self.__dictHandles[tupleLabelValues]
+         oHandle._column = arValues
+         oHandle._id     = len(arValues)
+         arValues.append(self._arValues[nId])
+         if arCreated is not None:
+            arCreated.append(self._arCreated[nId])
+         listLabelValues.append(tupleLabelValues)
+      self._arValues         = arValues
+      self._arCreated        = arCreated
+      self.__listLabelValues = listLabelValues
+      self.__nDead           = 0
+
+   def clear(self):
+      """Removes all series
+      """
+      with self._lock:
+         self.__dictHandles     = {}
+         self.__listLabelValues = []
+         self.__nDead           = 0
+         self._arValues         = array('d')
+         if self._arCreated is not None:
+            self._arCreated = array('d')
+
+   def _get_samples(self, arColumn, nId):
+      """Returns the samples of a single series (like '_samples()' of a label child)
+      """
+      from prometheus_client.samples import Sample
+      if self._type == "gauge":
+         return (Sample('', {}, arColumn[nId], None, None),)
+      oTotal = Sample('_total', {}, arColumn[nId], None, None)
+      if ( (self._arCreated is None) or (arColumn is not self._arValues) ):
+         return (oTotal,)
+      return (oTotal, Sample('_created', {}, self._arCreated[nId], None, None))
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def describe(self):
+      from prometheus_client.metrics_core import Metric
+      return [Metric(self._name, self._documentation, self._type)]
+
+   def collect(self):
+      from prometheus_client.metrics_core import Metric
+      oFamily = Metric(self._name, self._documentation, self._type)
+      listLabelNames = self._labelnames
+      with self._lock:
+         listSeries = list(zip(self.__listLabelValues, self._arValues))
+         listCreated = list(self._arCreated) if self._arCreated is not None else None
+      if self._type == "gauge":
+         for tupleLabelValues, fValue in listSeries:
+            if tupleLabelValues is not None:
+               oFamily.add_sample(self._name, dict(zip(listLabelNames, tupleLabelValues)), fValue)
+      else:
+         sTotal   = self._name + "_total"
+         sCreated = self._name + "_created"
+         for nId, (tupleLabelValues, fValue) in enumerate(listSeries):
+            if tupleLabelValues is None:
+               continue
+            dictLabels = dict(zip(listLabelNames, tupleLabelValues))
+            oFamily.add_sample(sTotal, dictLabels, fValue)
+            if listCreated is not None:
+               oFamily.add_sample(sCreated, dictLabels, listCreated[nId])
+      yield oFamily
+
+# eof class CColumnarMetric():
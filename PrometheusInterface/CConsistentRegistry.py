@@ -0,0 +1,214 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CConsistentRegistry.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Provide consistent scrapes in case of several related metrics are updated together
+#   (metric transactions, see keywords 'begin_metric_transaction' and 'commit_metric_transaction').
+#
+# - CSeqLock is a sequence lock: the generation is odd while a transaction is published and even otherwise.
+#   Writers publishing a transaction only increment the generation before and after; they are never blocked by readers.
+#   At the end of a publication the writer appends a snapshot of the samples of all changed series (taken while
+#   publishing) to a bounded log.
+#
+# - CConsistentRegistry wraps a registry of the Prometheus Python client library. A scrape collects all metrics once
+#   (without any lock). Series changed by publications overlapping the collection may have been collected partially
+#   updated; their samples are replaced by the snapshots of these publications (after waiting for the end of a
+#   publication still in progress). Therefore every transaction is provided completely or not at all, the collection
+#   is never repeated for a single publication, and writers are never blocked by a scrape.
+#   Only in case of the log does not contain all overlapping publications any more, the collection is repeated.
+#
+# - Optionally the duration of every collection is passed to a callback (self-instrumentation of prometheus_interface).
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import threading, time, collections
+
+MAX_READ_ATTEMPTS = 10
+READ_RETRY_DELAY  = 0.0005 # seconds
+MAX_PUBLICATIONS  = 4096   # snapshots of publications kept for the scrapes
+
+# --------------------------------------------------------------------------------------------------------------
+
+def take_snapshot(listSeries):
+   """Returns the samples of the given series (series, label values, add) as list of (family name, sample, add);
+with add the samples are added to a scrape missing the series (e.g. created by the publication)
+   """
+   from prometheus_client.samples import Sample
+   listSnapshot = []
+   for oSeries, tupleLabelValues, bAdd in listSeries:
+      dictSeriesLabels = dict(zip(oSeries._labelnames, tupleLabelValues))
+      for oSample in oSeries._samples():
+         dictLabels = dict(dictSeriesLabels)
+         dictLabels.update(oSample.labels)
+         listSnapshot.append((oSeries._name, Sample(oSeries._name + oSample.name, dictLabels, oSample.value, oSample.timestamp, oSample.exemplar), bAdd))
+   return listSnapshot
+
+def get_sample_key(oSample):
+   return (oSample.name, tuple(sorted(oSample.labels.items())))
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CSeqLock():
+   """Sequence lock with a single writer at a time and optimistic readers
+   """
+
+   def __init__(self):
+      self.__nGeneration    = 0
+      self.__oWriteLock     = threading.Lock() # serializes the writers only
+      self.__dequePublished = collections.deque(maxlen=MAX_PUBLICATIONS) # (generation at the end of the publication, snapshot)
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def begin_write(self):
+      self.__oWriteLock.acquire()
+      self.__nGeneration += 1 # odd: publication in progress
+
+   def end_write(self, listSeries=()):
+      """Ends a publication; listSeries are the changed series as (series, label values, add), see 'take_snapshot'
+      """
+      listSnapshot = []
+      try:
+         listSnapshot = take_snapshot(listSeries)
+      finally:
+         self.__dequePublished.append((self.__nGeneration + 1, listSnapshot))
+         self.__nGeneration += 1 # even: publication finished
+         self.__oWriteLock.release()
+
+   def get_generation(self):
+      return self.__nGeneration
+
+   def wait_read(self):
+      """Returns the current generation after waiting for the end of a publication in progress (the writer is not blocked)
+      """
+      nGeneration = self.__nGeneration
+      while nGeneration % 2 == 1:
+         time.sleep(READ_RETRY_DELAY)
+         nGeneration = self.__nGeneration
+      return nGeneration
+
+   def get_publications(self, nStart, nEnd):
+      """Returns the snapshots of the publications ended after generation nStart up to generation nEnd (in order) and
+False, in case of not all of them are kept any more
+      """
+      nFirst = nStart + 1 if nStart % 2 == 1 else nStart + 2 # end generation of the first publication after nStart
+      if nEnd < nFirst:
+         return [], True
+      listPublished = list(self.__dequePublished)
+      bComplete = ( (len(listPublished) > 0) and (listPublished[0][0] <= nFirst) )
+      return [listSnapshot for nGeneration, listSnapshot in listPublished if nStart < nGeneration <= nEnd], bComplete
+
+# eof class CSeqLock():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CConsistentRegistry():
+   """Registry wrapper collecting a consistent generation of all metrics
+   """
+
+   def __init__(self, oRegistry=None, oSeqLock=None, setNames=None, fnObserve=None):
+      if oRegistry is None:
+         raise Exception("oRegistry is None")
+      if oSeqLock is None:
+         raise Exception("oSeqLock is None")
+      self.__oRegistry = oRegistry
+      self.__oSeqLock  = oSeqLock
+      self.__setNames  = setNames
+      self.__fnObserve = fnObserve # called with the duration of every collection (ns)
+      self.__nRetries  = 0
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __collect_all(self):
+      listMetrics = list(self.__oRegistry.collect())
+      if self.__setNames is None:
+         return listMetrics
+      # like 'restricted_registry' of the Prometheus Python client library: only samples with the given names
+      from prometheus_client.metrics_core import Metric
+      listRestricted = []
+      for oMetric in listMetrics:
+         listSamples = [oSample for oSample in oMetric.samples if oSample.name in self.__setNames]
+         if len(listSamples) > 0:
+            oRestricted = Metric(oMetric.name, oMetric.documentation, oMetric.type, oMetric.unit)
+            oRestricted.samples = listSamples
+            listRestricted.append(oRestricted)
+      return listRestricted
+
+   def __apply_publications(self, listMetrics, listPublications):
+      """Replaces the collected samples of the series changed by the given publications by their snapshots
+      """
+      dictPatches = {} # family name -> sample key -> (sample, add)
+      for listSnapshot in listPublications:
+         for sFamily, oSample, bAdd in listSnapshot:
+            if ( (self.__setNames is None) or (oSample.name in self.__setNames) ):
+               dictPatches.setdefault(sFamily, {})[get_sample_key(oSample)] = (oSample, bAdd)
+      if len(dictPatches) == 0:
+         return listMetrics
+      for oMetric in listMetrics:
+         dictFamilyPatches = dictPatches.get(oMetric.name)
+         if dictFamilyPatches is None:
+            continue
+         listSamples = []
+         for oSample in oMetric.samples:
+            tuplePatch = dictFamilyPatches.pop(get_sample_key(oSample), None)
+            listSamples.append(oSample if tuplePatch is None else tuplePatch[0])
+         listSamples.extend(oSample for oSample, bAdd in dictFamilyPatches.values() if bAdd is True) # series created meanwhile
+         oMetric.samples = listSamples
+      return listMetrics
+
+   def collect(self):
+      if self.__fnObserve is None:
+         return self.__collect_consistent()
+      nStartTime = time.perf_counter_ns()
+      listMetrics = self.__collect_consistent()
+      self.__fnObserve(time.perf_counter_ns() - nStartTime)
+      return listMetrics
+
+   def __collect_consistent(self):
+      for nAttempt in range(MAX_READ_ATTEMPTS):
+         nStart = self.__oSeqLock.get_generation()
+         listMetrics = self.__collect_all()
+         nEnd = self.__oSeqLock.wait_read()
+         listPublications, bComplete = self.__oSeqLock.get_publications(nStart, nEnd)
+         if bComplete is True:
+            break
+         self.__nRetries += 1 # more publications during the collection than kept
+      return self.__apply_publications(listMetrics, listPublications)
+
+   def restricted_registry(self, names):
+      return CConsistentRegistry(self.__oRegistry, self.__oSeqLock, set(names), self.__fnObserve)
+
+   def get_retries(self):
+      """Returns the number of repeated collections (because of more publications during a collection than kept)
+      """
+      return self.__nRetries
+
+# eof class CConsistentRegistry():
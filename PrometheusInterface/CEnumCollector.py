@@ -0,0 +1,107 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CEnumCollector.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Provide an enum metric (a set of states, e.g. the test results 'PASSED', 'FAILED', 'UNKNOWN') to Prometheus,
+#   instead of one counter per state.
+#
+# - The states are stored by the enum metric of the Prometheus Python client library ('Enum'), as state index per series.
+#   The enum metric itself is not registered; this collector is registered instead and provides at scrape time:
+#
+#   * the enum: either all states of every series (like 'Enum', state set with values 0 and 1)
+#     or - in compact mode - only the current state of every series (value 1)
+#
+#   * the number of series per state ('<name>_state_count'), optionally per label (e.g. per testbench)
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+class CEnumCollector():
+   """Collector of a single enum metric and its counts by state
+   """
+
+   def __init__(self, oEnum=None, listLabelNames=(), listCountBy=(), bCompact=False):
+      if oEnum is None:
+         raise Exception("oEnum is None")
+      for sLabelName in listCountBy:
+         if sLabelName not in listLabelNames:
+            raise ValueError(f"Label '{sLabelName}' (count by) is not a label of enum '{oEnum._name}'")
+      self.__oEnum          = oEnum
+      self.__listLabelNames = list(listLabelNames)
+      self.__listCountBy    = list(listCountBy)
+      self.__listCountByIdx = [self.__listLabelNames.index(sLabelName) for sLabelName in self.__listCountBy]
+      self.__bCompact       = bCompact
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __get_state_indices(self):
+      """Returns a list of (label values, state index) of all series
+      """
+      oEnum = self.__oEnum
+      if len(self.__listLabelNames) == 0:
+         return [((), oEnum._value)]
+      with oEnum._lock:
+         listSeries = list(oEnum._metrics.items())
+      return [(tupleLabelValues, oSeries._value) for tupleLabelValues, oSeries in listSeries]
+
+   def describe(self):
+      return []
+
+   def collect(self):
+      from prometheus_client.core import GaugeMetricFamily, StateSetMetricFamily
+      oEnum = self.__oEnum
+      sName = oEnum._name
+      listStates = oEnum._states
+      listStateIndices = self.__get_state_indices()
+
+      # -- enum
+      if self.__bCompact is True:
+         oFamily = GaugeMetricFamily(sName, oEnum._documentation, labels=self.__listLabelNames + [sName])
+         for tupleLabelValues, nStateIndex in listStateIndices:
+            oFamily.add_metric(list(tupleLabelValues) + [listStates[nStateIndex]], 1)
+      else:
+         oFamily = StateSetMetricFamily(sName, oEnum._documentation, labels=self.__listLabelNames)
+         for tupleLabelValues, nStateIndex in listStateIndices:
+            oFamily.add_metric(list(tupleLabelValues), {sState: (nIndex == nStateIndex) for nIndex, sState in enumerate(listStates)})
+      yield oFamily
+
+      # -- counts by state
+      dictCounts = {}
+      for tupleLabelValues, nStateIndex in listStateIndices:
+         tupleKey = tuple(tupleLabelValues[nIndex] for nIndex in self.__listCountByIdx)
+         listCounts = dictCounts.get(tupleKey)
+         if listCounts is None:
+            listCounts = dictCounts[tupleKey] = [0] * len(listStates)
+         listCounts[nStateIndex] += 1
+      oCounts = GaugeMetricFamily(f"{sName}_state_count", f"number of series of '{sName}' per state", labels=self.__listCountBy + [sName])
+      for tupleKey, listCounts in dictCounts.items():
+         for sState, nCount in zip(listStates, listCounts):
+            oCounts.add_metric(list(tupleKey) + [sState], nCount)
+      yield oCounts
+
+# eof class CEnumCollector():
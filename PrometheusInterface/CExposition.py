@@ -0,0 +1,453 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CExposition.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Exposition endpoint of prometheus_interface (instead of 'start_http_server' of the Prometheus Python client library).
+#   The format is selected by the 'Accept' header of the scrape request:
+#
+#   * Prometheus text format 0.0.4 (default)
+#   * OpenMetrics text format 1.0.0                  ('application/openmetrics-text')
+#   * Prometheus protobuf format, length delimited   ('application/vnd.google.protobuf;proto=io.prometheus.client.MetricFamily;encoding=delimited')
+#
+# - The encoders write into a reusable byte buffer per thread, that keeps its size from scrape to scrape
+#   (no list of many small strings joined at the end). The encoded label sets of all series are cached,
+#   therefore a sample costs only the encoding of its value.
+#
+# - The protobuf messages are encoded by CProtobufWire.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import time, threading
+
+try:
+   from .CProtobufWire import CProtobufWriter, encode_varint
+except ImportError:
+   from CProtobufWire import CProtobufWriter, encode_varint
+
+FORMAT_TEXT        = "text"
+FORMAT_OPENMETRICS = "openmetrics"
+FORMAT_PROTOBUF    = "protobuf"
+
+CONTENT_TYPES = {FORMAT_TEXT        : "text/plain; version=0.0.4; charset=utf-8",
+                 FORMAT_OPENMETRICS : "application/openmetrics-text; version=1.0.0; charset=utf-8",
+                 FORMAT_PROTOBUF    : "application/vnd.google.protobuf; proto=io.prometheus.client.MetricFamily; encoding=delimited"}
+
+DEFAULT_BUFFER_SIZE = 262144  # bytes; initial size of the buffer of every thread
+MAX_CACHE_ENTRIES   = 1000000 # label sets cached; the cache is cleared when exceeded
+MAX_VALUE_ENTRIES   = 4096    # formatted values cached
+
+# MetricType of the protobuf format
+PROTOBUF_TYPES = {'counter': 0, 'gauge': 1, 'summary': 2, 'unknown': 3, 'histogram': 4, 'gaugehistogram': 5, 'info': 1, 'stateset': 1}
+
+# --------------------------------------------------------------------------------------------------------------
+
+def choose_format(sAccept):
+   """Returns the format requested by an 'Accept' header (the supported media type with the highest quality)
+   """
+   if not sAccept:
+      return FORMAT_TEXT
+   sFormat  = FORMAT_TEXT
+   fQuality = -1.0
+   for sMediaRange in sAccept.split(','):
+      listParts = [sPart.strip() for sPart in sMediaRange.split(';')]
+      dictParams = {}
+      for sParam in listParts[1:]:
+         sKey, _, sValue = sParam.partition('=')
+         dictParams[sKey.strip().lower()] = sValue.strip().strip('"')
+      sMediaType = listParts[0].lower()
+      if sMediaType == "application/vnd.google.protobuf":
+         if ( (dictParams.get('proto') != "io.prometheus.client.MetricFamily") or (dictParams.get('encoding') != "delimited") ):
+            continue
+         sCandidate = FORMAT_PROTOBUF
+      elif sMediaType == "application/openmetrics-text":
+         if dictParams.get('version', "1.0.0").split('.')[0] != "1":
+            continue
+         sCandidate = FORMAT_OPENMETRICS
+      elif sMediaType in ("text/plain", "*/*", "text/*"):
+         sCandidate = FORMAT_TEXT
+      else:
+         continue
+      try:
+         fCandidateQuality = float(dictParams.get('q', "1"))
+      except ValueError:
+         continue
+      if fCandidateQuality > fQuality:
+         sFormat  = sCandidate
+         fQuality = fCandidateQuality
+   return sFormat
+
+def escape_label_value(sValue):
+   return sValue.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+def escape_metric_name(sName):
+   """Returns the metric name with invalid characters replaced by underscores (like the Prometheus Python client library)
+   """
+   from prometheus_client.openmetrics.exposition import escape_metric_name as escape
+   return escape(sName)
+
+def escape_label_name(sLabelName):
+   """Returns the label name with invalid characters replaced by underscores (like the Prometheus Python client library),
+e.g. the label 'file name' of the info metric of this library is provided as 'file_name'
+   """
+   from prometheus_client.openmetrics.exposition import escape_label_name as escape
+   return escape(sLabelName)
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CByteBuffer():
+   """Byte buffer with a write position; the allocated memory is kept when the buffer is cleared
+   """
+
+   def __init__(self, nSize=DEFAULT_BUFFER_SIZE):
+      self.__arBuffer  = bytearray(nSize)
+      self.__nPosition = 0
+
+   def __del__(self):
+      pass
+
+   def write(self, bytesData):
+      nEnd = self.__nPosition + len(bytesData)
+      if nEnd > len(self.__arBuffer):
+         self.__arBuffer.extend(bytes(max(nEnd, 2 * len(self.__arBuffer)) - len(self.__arBuffer)))
+      self.__arBuffer[self.__nPosition:nEnd] = bytesData
+      self.__nPosition = nEnd
+
+   def get_bytes(self):
+      return bytes(memoryview(self.__arBuffer)[:self.__nPosition])
+
+   def get_size(self):
+      return self.__nPosition
+
+   def get_capacity(self):
+      return len(self.__arBuffer)
+
+   def clear(self):
+      self.__nPosition = 0
+
+# eof class CByteBuffer():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CExpositionEncoder():
+   """Encodes collected metric families in the text, OpenMetrics or protobuf format
+   """
+
+   def __init__(self, nBufferSize=DEFAULT_BUFFER_SIZE):
+      self.__nBufferSize  = int(nBufferSize)
+      self.__oLocal       = threading.local()
+      self.__dictPrefixes = {} # (format, sample name, label items) -> encoded sample name and labels
+      self.__dictLabels   = {} # label items -> encoded LabelPair fields (protobuf)
+      self.__dictValues   = {} # value -> encoded value (text formats)
+      self.__dictNames    = {} # (metric name or label name, True in case of label name) -> escaped name
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __get_buffer(self):
+      try:
+         oBuffer = self.__oLocal.buffer
+      except AttributeError:
+         oBuffer = self.__oLocal.buffer = CByteBuffer(self.__nBufferSize)
+      oBuffer.clear()
+      return oBuffer
+
+   def __get_name(self, sName, bLabelName=False):
+      """Returns the escaped metric name or label name
+      """
+      tupleKey = (sName, bLabelName)
+      sEscapedName = self.__dictNames.get(tupleKey)
+      if sEscapedName is None:
+         sEscapedName = escape_label_name(sName) if bLabelName is True else escape_metric_name(sName)
+         if len(self.__dictNames) >= MAX_CACHE_ENTRIES:
+            self.__dictNames.clear()
+         self.__dictNames[tupleKey] = sEscapedName
+      return sEscapedName
+
+   def __get_prefix(self, sFormat, sName, dictLabels):
+      """Returns the encoded sample name and labels (followed by a blank) of a text format
+      """
+      tupleKey = (sFormat, sName, tuple(dictLabels.items()))
+      bytesPrefix = self.__dictPrefixes.get(tupleKey)
+      if bytesPrefix is None:
+         if len(dictLabels) > 0:
+            sLabels = ",".join(f'{self.__get_name(sLabelName, True)}="{escape_label_value(sLabelValue)}"' for sLabelName, sLabelValue in sorted(dictLabels.items()))
+            bytesPrefix = f"{self.__get_name(sName)}{{{sLabels}}} ".encode("utf-8")
+         else:
+            bytesPrefix = f"{self.__get_name(sName)} ".encode("utf-8")
+         if len(self.__dictPrefixes) >= MAX_CACHE_ENTRIES:
+            self.__dictPrefixes.clear()
+         self.__dictPrefixes[tupleKey] = bytesPrefix
+      return bytesPrefix
+
+   def __get_value(self, fValue):
+      bytesValue = self.__dictValues.get(fValue)
+      if bytesValue is None:
+         from prometheus_client.utils import floatToGoString
+         bytesValue = floatToGoString(fValue).encode("ascii")
+         if len(self.__dictValues) >= MAX_VALUE_ENTRIES:
+            self.__dictValues.clear()
+         self.__dictValues[fValue] = bytesValue
+      return bytesValue
+
+   def __get_label_fields(self, tupleLabels):
+      """Returns the encoded LabelPair fields (field 1 of Metric) of a label set (protobuf)
+      """
+      bytesFields = self.__dictLabels.get(tupleLabels)
+      if bytesFields is None:
+         oWriter = CProtobufWriter()
+         for sLabelName, sLabelValue in sorted(tupleLabels):
+            oWriter.message(1, CProtobufWriter().string(1, self.__get_name(sLabelName, True)).string(2, sLabelValue))
+         bytesFields = oWriter.get_bytes()
+         if len(self.__dictLabels) >= MAX_CACHE_ENTRIES:
+            self.__dictLabels.clear()
+         self.__dictLabels[tupleLabels] = bytesFields
+      return bytesFields
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __encode_text(self, listMetrics, oBuffer):
+      """Prometheus text format 0.0.4 (like 'generate_latest' of the Prometheus Python client library)
+      """
+      for oMetric in listMetrics:
+         sName = oMetric.name
+         sType = oMetric.type
+         if sType == "counter":
+            sName = sName + "_total"
+         elif sType == "info":
+            sName = sName + "_info"
+            sType = "gauge"
+         elif sType == "stateset":
+            sType = "gauge"
+         elif sType == "gaugehistogram":
+            sType = "histogram"
+         elif sType == "unknown":
+            sType = "untyped"
+         sName = self.__get_name(sName)
+         sHelp = oMetric.documentation.replace('\\', r'\\').replace('\n', r'\n')
+         oBuffer.write(f"# HELP {sName} {sHelp}\n# TYPE {sName} {sType}\n".encode("utf-8"))
+         dictExtraSamples = {}
+         for oSample in oMetric.samples:
+            sSuffix = oSample.name[len(oMetric.name):] if oSample.name.startswith(oMetric.name) else None
+            if sSuffix in ("_created", "_gsum", "_gcount"):
+               dictExtraSamples.setdefault(sSuffix, []).append(oSample) # exposed as separate gauge
+               continue
+            self.__write_text_sample(oBuffer, oSample, FORMAT_TEXT)
+         for sSuffix, listSamples in sorted(dictExtraSamples.items()):
+            sExtraName = self.__get_name(oMetric.name + sSuffix)
+            oBuffer.write(f"# HELP {sExtraName} {sHelp}\n# TYPE {sExtraName} gauge\n".encode("utf-8"))
+            for oSample in listSamples:
+               self.__write_text_sample(oBuffer, oSample, FORMAT_TEXT)
+
+   def __write_text_sample(self, oBuffer, oSample, sFormat):
+      bytesLine = self.__get_prefix(sFormat, oSample.name, oSample.labels) + self.__get_value(oSample.value)
+      if oSample.timestamp is not None:
+         if sFormat == FORMAT_TEXT:
+            bytesLine += f" {int(float(oSample.timestamp) * 1000):d}".encode("ascii")
+         else:
+            bytesLine += f" {oSample.timestamp}".encode("ascii")
+      oBuffer.write(bytesLine + b"\n")
+
+   def __encode_openmetrics(self, listMetrics, oBuffer):
+      """OpenMetrics text format 1.0.0
+      """
+      from prometheus_client.openmetrics.exposition import _compose_exemplar_string
+      for oMetric in listMetrics:
+         sName = self.__get_name(oMetric.name)
+         sHelp = escape_label_value(oMetric.documentation)
+         oBuffer.write(f"# HELP {sName} {sHelp}\n# TYPE {sName} {oMetric.type}\n".encode("utf-8"))
+         if oMetric.unit:
+            oBuffer.write(f"# UNIT {sName} {oMetric.unit}\n".encode("utf-8"))
+         for oSample in oMetric.samples:
+            if oSample.native_histogram:
+               continue # native histograms require OpenMetrics 2.0.0
+            if oSample.exemplar:
+               bytesLine = self.__get_prefix(FORMAT_OPENMETRICS, oSample.name, oSample.labels) + self.__get_value(oSample.value)
+               if oSample.timestamp is not None:
+                  bytesLine += f" {oSample.timestamp}".encode("ascii")
+               oBuffer.write(bytesLine + _compose_exemplar_string(oMetric, oSample, oSample.exemplar).encode("utf-8") + b"\n")
+            else:
+               self.__write_text_sample(oBuffer, oSample, FORMAT_OPENMETRICS)
+      oBuffer.write(b"# EOF\n")
+
+   def __encode_protobuf(self, listMetrics, oBuffer):
+      """Prometheus protobuf format: MetricFamily messages (io.prometheus.client), every message preceded by its length (varint)
+      """
+      oFamily = CProtobufWriter()
+      for oMetric in listMetrics:
+         sType = oMetric.type
+         sName = oMetric.name
+         if sType == "counter":
+            sName = sName + "_total"
+         elif sType == "info":
+            sName = sName + "_info"
+         oFamily.clear()
+         oFamily.string(1, self.__get_name(sName)).string(2, oMetric.documentation).varint(3, PROTOBUF_TYPES.get(sType, 3))
+         for tupleLabels, dictSamples in self.__group_samples(oMetric).items():
+            oFamily.message(4, self.__create_protobuf_metric(sType, oMetric.name, tupleLabels, dictSamples))
+         bytesFamily = oFamily.get_bytes()
+         oBuffer.write(encode_varint(len(bytesFamily)) + bytesFamily)
+
+   def __group_samples(self, oMetric):
+      """Returns the samples of a metric family grouped by series: label items -> list of (suffix, sample)
+(gauges, infos, statesets and untyped metrics: one series per sample; 'le' and 'quantile' are not part of the series)
+      """
+      sType = oMetric.type
+      dictSeries = {}
+      for oSample in oMetric.samples:
+         if sType in ("histogram", "gaugehistogram", "summary"):
+            tupleLabels = tuple(sorted((sLabelName, sLabelValue) for sLabelName, sLabelValue in oSample.labels.items() if sLabelName not in ("le", "quantile")))
+         else:
+            tupleLabels = tuple(sorted(oSample.labels.items()))
+         dictSeries.setdefault(tupleLabels, []).append((oSample.name[len(oMetric.name):], oSample))
+      return dictSeries
+
+   def __create_protobuf_metric(self, sType, sName, tupleLabels, listSamples):
+      """Returns the Metric message of a single series
+      """
+      oMetric = CProtobufWriter().raw(self.__get_label_fields(tupleLabels))
+      if sType == "counter":
+         oCounter = CProtobufWriter()
+         for sSuffix, oSample in listSamples:
+            if sSuffix == "_total":
+               oCounter.double(1, oSample.value)
+            elif sSuffix == "_created":
+               oCounter.message(3, self.__create_timestamp(oSample.value))
+         oMetric.message(3, oCounter)
+      elif sType == "summary":
+         oSummary = CProtobufWriter()
+         for sSuffix, oSample in listSamples:
+            if sSuffix == "_count":
+               oSummary.varint(1, oSample.value)
+            elif sSuffix == "_sum":
+               oSummary.double(2, oSample.value)
+            elif sSuffix == "_created":
+               oSummary.message(4, self.__create_timestamp(oSample.value))
+            elif "quantile" in oSample.labels:
+               oSummary.message(3, CProtobufWriter().double(1, float(oSample.labels['quantile'])).double(2, oSample.value))
+         oMetric.message(4, oSummary)
+      elif sType in ("histogram", "gaugehistogram"):
+         oHistogram = CProtobufWriter()
+         for sSuffix, oSample in listSamples:
+            if sSuffix in ("_count", "_gcount"):
+               oHistogram.varint(1, oSample.value)
+            elif sSuffix in ("_sum", "_gsum"):
+               oHistogram.double(2, oSample.value)
+            elif sSuffix == "_created":
+               oHistogram.message(15, self.__create_timestamp(oSample.value))
+            elif sSuffix == "_bucket":
+               fUpperBound = float(oSample.labels['le'])
+               if fUpperBound != float("inf"): # the +Inf bucket is implicit (sample count)
+                  oHistogram.message(3, CProtobufWriter().varint(1, oSample.value).double(2, fUpperBound))
+         oMetric.message(7, oHistogram)
+      elif sType == "unknown":
+         oMetric.message(5, CProtobufWriter().double(1, listSamples[0][1].value))
+      else: # gauge, info, stateset
+         oMetric.message(2, CProtobufWriter().double(1, listSamples[0][1].value))
+      if listSamples[0][1].timestamp is not None:
+         oMetric.varint(6, int(float(listSamples[0][1].timestamp) * 1000))
+      return oMetric
+
+   def __create_timestamp(self, fTime):
+      nSeconds = int(fTime)
+      return CProtobufWriter().varint(1, nSeconds).varint(2, int(round((fTime - nSeconds) * 1e9)))
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def encode(self, listMetrics, sFormat=FORMAT_TEXT):
+      """Returns the encoded metric families (list of collected metrics) in the given format
+      """
+      oBuffer = self.__get_buffer()
+      if sFormat == FORMAT_OPENMETRICS:
+         self.__encode_openmetrics(listMetrics, oBuffer)
+      elif sFormat == FORMAT_PROTOBUF:
+         self.__encode_protobuf(listMetrics, oBuffer)
+      else:
+         self.__encode_text(listMetrics, oBuffer)
+      return oBuffer.get_bytes()
+
+# eof class CExpositionEncoder():
+
+# --------------------------------------------------------------------------------------------------------------
+
+def make_exposition_app(oRegistry, oEncoder=None, fnObserve=None, fnPublish=None):
+   """Returns a WSGI application providing the metrics of a registry, the format is selected by the 'Accept' header.
+The duration of every scrape (collection and encoding, ns) is passed to fnObserve, the metrics provided by every scrape
+are passed to fnPublish (called within the thread having collected the metrics).
+   """
+   if oEncoder is None:
+      oEncoder = CExpositionEncoder()
+
+   def exposition_app(environ, start_response):
+      sMethod = environ['REQUEST_METHOD']
+      if sMethod == "OPTIONS":
+         start_response("200 OK", [('Allow', "OPTIONS,GET")])
+         return [b""]
+      if sMethod != "GET":
+         start_response("405 Method Not Allowed", [('Allow', "OPTIONS,GET")])
+         return [f"# HTTP 405 Method Not Allowed: {sMethod}; use OPTIONS or GET\n".encode()]
+      if environ['PATH_INFO'] == "/favicon.ico":
+         start_response("200 OK", [])
+         return [b""]
+      nStartTime = time.perf_counter_ns()
+      sFormat = choose_format(environ.get('HTTP_ACCEPT'))
+      oCollector = oRegistry
+      from urllib.parse import parse_qs
+      dictParams = parse_qs(environ.get('QUERY_STRING', ""))
+      if 'name[]' in dictParams:
+         oCollector = oRegistry.restricted_registry(dictParams['name[]'])
+      listMetrics = list(oCollector.collect())
+      bytesOutput = oEncoder.encode(listMetrics, sFormat)
+      if fnPublish is not None:
+         fnPublish(listMetrics)
+      listHeaders = [('Content-Type', CONTENT_TYPES[sFormat])]
+      from prometheus_client.exposition import gzip_accepted
+      if gzip_accepted(environ.get('HTTP_ACCEPT_ENCODING')):
+         import gzip
+         bytesOutput = gzip.compress(bytesOutput)
+         listHeaders.append(('Content-Encoding', "gzip"))
+      if fnObserve is not None:
+         fnObserve(time.perf_counter_ns() - nStartTime)
+      start_response("200 OK", listHeaders)
+      return [bytesOutput]
+
+   return exposition_app
+
+def start_exposition_server(nPort, oRegistry, sAddress="0.0.0.0", fnObserve=None, fnPublish=None):
+   """Starts the http server providing the metrics of a registry in a daemon thread; returns the server and the thread
+   """
+   from wsgiref.simple_server import make_server
+   from prometheus_client.exposition import ThreadingWSGIServer, _SilentHandler, _get_best_family
+
+   class CExpositionServer(ThreadingWSGIServer):
+      """ThreadingWSGIServer with the address family of the given address"""
+
+   CExpositionServer.address_family, sAddress = _get_best_family(sAddress, nPort)
+   oServer = make_server(sAddress, nPort, make_exposition_app(oRegistry, fnObserve=fnObserve, fnPublish=fnPublish), CExpositionServer, handler_class=_SilentHandler)
+   oThread = threading.Thread(target=oServer.serve_forever, name="prometheus_interface_exposition", daemon=True)
+   oThread.start()
+   return oServer, oThread
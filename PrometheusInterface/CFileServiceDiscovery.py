@@ -0,0 +1,138 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CFileServiceDiscovery.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Announce the http server of a prometheus_interface instance as scrape target for Prometheus,
+#   by writing a target file for the Prometheus file based service discovery ('file_sd_configs').
+#
+# - Every instance writes its own target file into a common folder and removes it at the end of the execution.
+#   All changes within the folder are protected by a lock file, therefore many parallel processes can use
+#   the same folder.
+#
+# Corresponding Prometheus configuration:
+#
+#    scrape_configs:
+#      - job_name: "robotframework"
+#        file_sd_configs:
+#          - files: ["<folder>/*.json"]
+#            refresh_interval: 5s
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, json, time, socket
+
+LOCK_FILE_NAME       = ".file_sd.lock"
+LOCK_TIMEOUT         = 10.0 # seconds
+LOCK_STALE_AFTER     = 30.0 # seconds; lock files older than this are treated as left over by a crashed process
+LOCK_RETRY_INTERVAL  = 0.01 # seconds
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CFileServiceDiscovery():
+   """Writes and removes the target file of a single scrape target
+   """
+
+   def __init__(self, sDirectory=None):
+      if sDirectory is None:
+         raise Exception("sDirectory is None")
+      self.__sDirectory  = os.path.abspath(sDirectory)
+      self.__sTargetFile = None
+      os.makedirs(self.__sDirectory, exist_ok=True)
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __acquire_lock(self):
+      sLockFile = os.path.join(self.__sDirectory, LOCK_FILE_NAME)
+      fTimeout = time.monotonic() + LOCK_TIMEOUT
+      while True:
+         try:
+            hLock = os.open(sLockFile, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(hLock, str(os.getpid()).encode())
+            os.close(hLock)
+            return sLockFile
+         except FileExistsError:
+            try:
+               if time.time() - os.path.getmtime(sLockFile) > LOCK_STALE_AFTER:
+                  os.remove(sLockFile)
+                  continue
+            except OSError:
+               continue # lock file removed in the meantime
+            if time.monotonic() > fTimeout:
+               raise Exception(f"Timeout while waiting for lock file '{sLockFile}'")
+            time.sleep(LOCK_RETRY_INTERVAL)
+
+   def __release_lock(self, sLockFile):
+      try:
+         os.remove(sLockFile)
+      except OSError:
+         pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def get_target_file(self):
+      """Returns the path of the target file written by this instance (or None)
+      """
+      return self.__sTargetFile
+
+   def register(self, sHost=None, nPort=None, dictLabels=None):
+      """Writes the target file for the given host and port. Labels are added to all series scraped from this target.
+      """
+      if sHost is None:
+         sHost = socket.gethostname()
+      if nPort is None:
+         raise Exception("nPort is None")
+      if dictLabels is None:
+         dictLabels = {}
+      listTargets = [{'targets': [f"{sHost}:{nPort}"], 'labels': {str(k): str(v) for k, v in dictLabels.items()}}]
+      sTargetFile = os.path.join(self.__sDirectory, f"prometheus_interface_{sHost}_{os.getpid()}_{nPort}.json")
+      sTmpFile = sTargetFile + ".tmp" # not matching the pattern '*.json', therefore ignored by Prometheus
+      sLockFile = self.__acquire_lock()
+      try:
+         with open(sTmpFile, "w", encoding="utf-8") as hTmpFile:
+            json.dump(listTargets, hTmpFile, indent=2)
+         os.replace(sTmpFile, sTargetFile)
+      finally:
+         self.__release_lock(sLockFile)
+      self.__sTargetFile = sTargetFile
+      return sTargetFile
+
+   def unregister(self):
+      """Removes the target file written by this instance
+      """
+      if self.__sTargetFile is None:
+         return
+      sLockFile = self.__acquire_lock()
+      try:
+         if os.path.isfile(self.__sTargetFile):
+            os.remove(self.__sTargetFile)
+      finally:
+         self.__release_lock(sLockFile)
+      self.__sTargetFile = None
+
+# eof class CFileServiceDiscovery():
@@ -0,0 +1,275 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CGaugeWindowCollector.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Provide gauges updated with a high frequency (e.g. sensor values streamed by a test suite) without losing
+#   the peaks between two scrapes (gauge mode 'window' of 'add_gauge').
+#
+# - The values are stored by the gauge metric of the Prometheus Python client library ('Gauge', last value).
+#   Additionally every series keeps a window (count, sum, minimum, maximum) in a compact object with fixed
+#   attributes, updated in place (no allocation of containers per update). The gauge itself is not registered;
+#   this collector is registered instead and provides at scrape time:
+#
+#   * '<name>': the last value (like 'Gauge')
+#   * '<name>_min', '<name>_max', '<name>_sum', '<name>_count': minimum, maximum, sum and number of the values
+#     within the window (average: '<name>_sum / <name>_count')
+#
+# - The window is either
+#
+#   * reset by every scrape (default); please consider: every scraper resets the window, therefore use a fixed
+#     window in case of the exporter is scraped by several Prometheus servers. The window is only reset when the
+#     scrape is really published (see 'publish'): collections thrown away (e.g. retries of consistent scrapes) or
+#     not containing the gauge (e.g. scrapes restricted by 'name[]') keep the values for the next scrape.
+#   * or a fixed time window (seconds, aligned to the wall clock); the last completed window is provided,
+#     therefore all scrapers within a window get the same values
+#
+#   A window without any update provides the last value as minimum and maximum (the gauge kept this value).
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import time, threading
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CGaugeWindow():
+   """Running window of a single gauge series: the values of the running window and of the last completed window
+   """
+
+   __slots__ = ('nIndex', 'nCount', 'fSum', 'fMin', 'fMax', 'bDone', 'nDoneCount', 'fDoneSum', 'fDoneMin', 'fDoneMax')
+
+   # reset by every scrape: the 'Done' values are the values collected, but not yet published
+
+   def __init__(self, nIndex=0):
+      self.nIndex     = nIndex # index of the running window (fixed windows), otherwise 0
+      self.bDone      = False  # True, in case of a window is completed
+      self.nDoneCount = 0
+      self.fDoneSum   = 0.0
+      self.fDoneMin   = float("inf")
+      self.fDoneMax   = float("-inf")
+      self.reset()
+
+   def reset(self):
+      self.nCount = 0
+      self.fSum   = 0.0
+      self.fMin   = float("inf")
+      self.fMax   = float("-inf")
+
+   def observe(self, fValue):
+      self.nCount += 1
+      self.fSum   += fValue
+      if fValue < self.fMin:
+         self.fMin = fValue
+      if fValue > self.fMax:
+         self.fMax = fValue
+
+   def observe_many(self, nCount, fSum, fMin, fMax):
+      self.nCount += nCount
+      self.fSum   += fSum
+      if fMin < self.fMin:
+         self.fMin = fMin
+      if fMax > self.fMax:
+         self.fMax = fMax
+
+   def take(self):
+      """Reset by every scrape: adds the running window to the values collected but not yet published
+      """
+      self.nDoneCount += self.nCount
+      self.fDoneSum   += self.fSum
+      if self.fMin < self.fDoneMin:
+         self.fDoneMin = self.fMin
+      if self.fMax > self.fDoneMax:
+         self.fDoneMax = self.fMax
+      self.reset()
+
+   def release(self):
+      """Reset by every scrape: the values collected are published
+      """
+      self.nDoneCount, self.fDoneSum, self.fDoneMin, self.fDoneMax = 0, 0.0, float("inf"), float("-inf")
+
+   def roll(self, nIndex):
+      """Completes the running window and starts the window with the given index
+      """
+      if nIndex == self.nIndex + 1:
+         self.nDoneCount, self.fDoneSum, self.fDoneMin, self.fDoneMax = self.nCount, self.fSum, self.fMin, self.fMax
+      else:
+         # no update within the previous window
+         self.nDoneCount, self.fDoneSum, self.fDoneMin, self.fDoneMax = 0, 0.0, float("inf"), float("-inf")
+      self.bDone  = True
+      self.nIndex = nIndex
+      self.reset()
+
+# eof class CGaugeWindow():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CGaugeWindowCollector():
+   """Collector of a single gauge metric and the windows (minimum, maximum, sum, count) of its series
+   """
+
+   def __init__(self, oGauge=None, listLabelNames=(), fWindow=None):
+      if oGauge is None:
+         raise Exception("oGauge is None")
+      if ( (fWindow is not None) and (float(fWindow) <= 0) ):
+         raise ValueError(f"Invalid window '{fWindow}' of gauge '{oGauge._name}'; expected a value greater than 0 (seconds)")
+      self.__oGauge         = oGauge
+      self.__listLabelNames = list(listLabelNames)
+      self.__fWindow        = float(fWindow) if fWindow is not None else None
+      self.__oLock          = threading.Lock() # protects the windows of all series (value and window are updated together)
+      self.__nCollection    = 0                  # number of the last collection (reset by every scrape)
+      self.__oCollection    = threading.local()  # number of the last collection of the current thread
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __get_index(self):
+      if self.__fWindow is None:
+         return 0
+      return int(time.time() // self.__fWindow)
+
+   def __get_window(self, oSeries):
+      """Returns the window of the series, rolled to the current window (the lock is held by the caller)
+      """
+      nIndex = self.__get_index()
+      try:
+         oWindow = oSeries._window
+      except AttributeError:
+         oWindow = oSeries._window = CGaugeWindow(nIndex)
+      if oWindow.nIndex != nIndex:
+         oWindow.roll(nIndex)
+      return oWindow
+
+   def __observe(self, oSeries, fValue):
+      """Adds the value to the window of the series (the lock is held by the caller)
+      """
+      self.__get_window(oSeries).observe(fValue)
+
+   def set(self, oSeries, value):
+      with self.__oLock:
+         oSeries.set(value)
+         self.__observe(oSeries, float(value))
+
+   def inc(self, oSeries, value=1):
+      with self.__oLock:
+         oSeries.inc(value)
+         self.__observe(oSeries, oSeries._value.get())
+
+   def dec(self, oSeries, value=1):
+      with self.__oLock:
+         oSeries.dec(value)
+         self.__observe(oSeries, oSeries._value.get())
+
+   def set_many(self, oSeries, fLast, nCount, fSum, fMin, fMax):
+      """Sets the last value of many values and adds all of them to the window (e.g. aggregates of ingested measurements)
+      """
+      with self.__oLock:
+         oSeries.set(fLast)
+         if nCount > 0:
+            self.__get_window(oSeries).observe_many(nCount, fSum, fMin, fMax)
+
+   def __get_series(self):
+      oGauge = self.__oGauge
+      if len(self.__listLabelNames) == 0:
+         return [((), oGauge)]
+      with oGauge._lock:
+         return list(oGauge._metrics.items())
+
+   def __take_window(self, oSeries):
+      """Returns the window to be provided of a series as (count, sum, minimum, maximum), or None if the series has no window
+      """
+      with self.__oLock:
+         oWindow = getattr(oSeries, '_window', None)
+         if oWindow is None:
+            return None
+         if self.__fWindow is None:
+            # reset by every scrape: the window is reset when the scrape is published
+            oWindow.take()
+            return (oWindow.nDoneCount, oWindow.fDoneSum, oWindow.fDoneMin, oWindow.fDoneMax)
+         nIndex = self.__get_index()
+         if oWindow.nIndex != nIndex:
+            oWindow.roll(nIndex)
+         if oWindow.bDone is False:
+            return (oWindow.nCount, oWindow.fSum, oWindow.fMin, oWindow.fMax) # first window still running
+         return (oWindow.nDoneCount, oWindow.fDoneSum, oWindow.fDoneMin, oWindow.fDoneMax)
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def describe(self):
+      return []
+
+   def publish(self, listMetrics):
+      """Is called with the metrics really provided by a scrape. Reset by every scrape: the windows are reset, in case of the
+windows (minimum, maximum, sum, count) are provided and the metrics were collected by the current thread with the last collection
+(no other collection in between).
+      """
+      if self.__fWindow is not None:
+         return
+      sName = self.__oGauge._name
+      setNames = set(oMetric.name for oMetric in listMetrics)
+      if not all(f"{sName}{sSuffix}" in setNames for sSuffix in ("_min", "_max", "_sum", "_count")):
+         return
+      with self.__oLock:
+         if getattr(self.__oCollection, 'nCollection', None) != self.__nCollection:
+            return
+         for tupleLabelValues, oSeries in self.__get_series():
+            oWindow = getattr(oSeries, '_window', None)
+            if oWindow is not None:
+               oWindow.release()
+
+   def collect(self):
+      from prometheus_client.core import GaugeMetricFamily
+      oGauge = self.__oGauge
+      sName = oGauge._name
+      listSeries = self.__get_series()
+      with self.__oLock:
+         self.__nCollection += 1
+         self.__oCollection.nCollection = self.__nCollection
+      oLast  = GaugeMetricFamily(sName, oGauge._documentation, labels=self.__listLabelNames)
+      oMin   = GaugeMetricFamily(f"{sName}_min", f"minimum of '{sName}' within the window", labels=self.__listLabelNames)
+      oMax   = GaugeMetricFamily(f"{sName}_max", f"maximum of '{sName}' within the window", labels=self.__listLabelNames)
+      oSum   = GaugeMetricFamily(f"{sName}_sum", f"sum of the values of '{sName}' within the window", labels=self.__listLabelNames)
+      oCount = GaugeMetricFamily(f"{sName}_count", f"number of the values of '{sName}' within the window", labels=self.__listLabelNames)
+      for tupleLabelValues, oSeries in listSeries:
+         tupleWindow = self.__take_window(oSeries)
+         fLast = oSeries._value.get()
+         oLast.add_metric(tupleLabelValues, fLast)
+         if tupleWindow is None:
+            continue
+         nCount, fSum, fMin, fMax = tupleWindow
+         if nCount == 0:
+            fMin = fMax = fLast # no update within the window
+         oMin.add_metric(tupleLabelValues, fMin)
+         oMax.add_metric(tupleLabelValues, fMax)
+         oSum.add_metric(tupleLabelValues, fSum)
+         oCount.add_metric(tupleLabelValues, nCount)
+      yield oLast
+      yield oMin
+      yield oMax
+      yield oSum
+      yield oCount
+
+# eof class CGaugeWindowCollector():
@@ -0,0 +1,221 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CGcInstrumentation.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Make pauses of the garbage collector and the memory allocations of this process visible, e.g. to explain
+#   latency spikes of timing tests.
+#
+# - A callback of the garbage collector ('gc.callbacks') measures every collection. Per generation it counts:
+#
+#   * the pause time (histogram '<name>_pause_seconds')
+#   * the objects collected and the uncollectable objects found ('<name>_collected_objects_total', '<name>_uncollectable_objects_total')
+#
+#   The callback only updates preallocated lists (no lock, no allocation of metric objects), because it is executed
+#   within the thread triggering the collection.
+#
+# - Optionally a background thread takes snapshots of 'tracemalloc' with a fixed interval and compares every snapshot
+#   with the previous one. The top-N allocation sites (largest change of the allocated size) are provided as gauges:
+#
+#   * '<name>_allocation_bytes{site}', '<name>_allocation_blocks{site}': memory allocated by the site
+#   * '<name>_allocation_bytes_diff{site}': change since the previous snapshot
+#
+#   Please consider: tracing of allocations slows down the process noticeably; use it to find leaks, not always.
+#
+# - This class is a collector of the Prometheus Python client library.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, gc, time, bisect, threading
+
+# upper bounds of the pause histograms (seconds)
+PAUSE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float("inf"))
+
+DEFAULT_TOP_N = 10
+
+GENERATIONS = 3
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CGcInstrumentation():
+   """Measures the collections of the garbage collector and (optionally) the top-N allocation sites
+   """
+
+   def __init__(self, sName="prometheus_interface_gc", fTracemallocInterval=None, nTopN=DEFAULT_TOP_N):
+      if ( (fTracemallocInterval is not None) and (float(fTracemallocInterval) <= 0) ):
+         raise ValueError(f"Invalid tracemalloc interval '{fTracemallocInterval}'; expected a value greater than 0")
+      self.__sName             = sName
+      self.__fInterval         = float(fTracemallocInterval) if fTracemallocInterval is not None else None
+      self.__nTopN             = int(nTopN)
+      # per generation (preallocated; updated by the callback only)
+      self.__listBuckets       = [[0] * len(PAUSE_BUCKETS) for nGeneration in range(GENERATIONS)]
+      self.__listPauseSum      = [0.0] * GENERATIONS
+      self.__listCollected     = [0] * GENERATIONS
+      self.__listUncollectable = [0] * GENERATIONS
+      self.__nStart            = None # start time of the running collection (ns)
+      # allocation sites of the last comparison: list of (site, size, blocks, size diff)
+      self.__listAllocations   = []
+      self.__bTracemallocStarted = False
+      self.__oStop             = threading.Event()
+      self.__oThread           = None
+      self.__bStarted          = False
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __callback(self, sPhase, dictInfo):
+      if sPhase == "start":
+         self.__nStart = time.perf_counter_ns()
+         return
+      if self.__nStart is None:
+         return # callback registered during a collection
+      fPause = (time.perf_counter_ns() - self.__nStart) / 1e9
+      self.__nStart = None
+      nGeneration = dictInfo['generation']
+      if nGeneration >= GENERATIONS:
+         return
+      self.__listBuckets[nGeneration][bisect.bisect_left(PAUSE_BUCKETS, fPause)] += 1
+      self.__listPauseSum[nGeneration] += fPause
+      self.__listCollected[nGeneration] += dictInfo['collected']
+      self.__listUncollectable[nGeneration] += dictInfo['uncollectable']
+
+   def __get_site(self, oTraceback):
+      oFrame = oTraceback[0]
+      listParts = os.path.normpath(oFrame.filename).split(os.sep)
+      return f"{'/'.join(listParts[-2:])}:{oFrame.lineno}"
+
+   def __compare_snapshots(self, oPrevious, oSnapshot):
+      """Returns the top-N allocation sites (largest change of the allocated size) as list of (site, size, blocks, size diff)
+      """
+      import tracemalloc
+      listFilters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                     tracemalloc.Filter(False, "<frozen importlib._bootstrap>"), tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                     tracemalloc.Filter(False, "<unknown>")]
+      oSnapshot = oSnapshot.filter_traces(listFilters)
+      listStatistics = oSnapshot.compare_to(oPrevious.filter_traces(listFilters), "lineno")
+      listStatistics.sort(key=lambda oStatistic: abs(oStatistic.size_diff), reverse=True)
+      return [(self.__get_site(oStatistic.traceback), oStatistic.size, oStatistic.count, oStatistic.size_diff)
+              for oStatistic in listStatistics[:self.__nTopN]]
+
+   def __run(self):
+      import tracemalloc
+      oPrevious = tracemalloc.take_snapshot()
+      while not self.__oStop.wait(self.__fInterval):
+         oSnapshot = tracemalloc.take_snapshot()
+         self.__listAllocations = self.__compare_snapshots(oPrevious, oSnapshot)
+         oPrevious = oSnapshot
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def start(self):
+      if self.__bStarted is True:
+         raise Exception("The instrumentation is already started")
+      gc.callbacks.append(self.__callback)
+      if self.__fInterval is not None:
+         import tracemalloc
+         if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            self.__bTracemallocStarted = True
+         self.__oStop.clear()
+         self.__oThread = threading.Thread(target=self.__run, name="prometheus_interface_tracemalloc", daemon=True)
+         self.__oThread.start()
+      self.__bStarted = True
+
+   def stop(self):
+      if self.__bStarted is False:
+         return
+      if self.__callback in gc.callbacks:
+         gc.callbacks.remove(self.__callback)
+      if self.__oThread is not None:
+         self.__oStop.set()
+         self.__oThread.join()
+         self.__oThread = None
+      if self.__bTracemallocStarted is True:
+         import tracemalloc
+         tracemalloc.stop()
+         self.__bTracemallocStarted = False
+      self.__bStarted = False
+
+   def is_running(self):
+      return self.__bStarted
+
+   def get_statistics(self):
+      """Returns the number of collections, the total and the maximum pause time (upper bound of the bucket) per generation
+      """
+      listStatistics = []
+      for nGeneration in range(GENERATIONS):
+         listBuckets = list(self.__listBuckets[nGeneration])
+         nMax = max([nIndex for nIndex, nCount in enumerate(listBuckets) if nCount > 0], default=None)
+         listStatistics.append({'generation'    : nGeneration,
+                                'collections'   : sum(listBuckets),
+                                'pause_seconds' : self.__listPauseSum[nGeneration],
+                                'max_bucket'    : PAUSE_BUCKETS[nMax] if nMax is not None else None,
+                                'collected'     : self.__listCollected[nGeneration],
+                                'uncollectable' : self.__listUncollectable[nGeneration]})
+      return listStatistics
+
+   def get_allocations(self):
+      return list(self.__listAllocations)
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def describe(self):
+      return []
+
+   def collect(self):
+      from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+      sName = self.__sName
+      oPauses        = HistogramMetricFamily(f"{sName}_pause_seconds", "pause time of the garbage collector per generation", labels=["generation"])
+      oCollected     = CounterMetricFamily(f"{sName}_collected_objects", "objects collected by the garbage collector per generation", labels=["generation"])
+      oUncollectable = CounterMetricFamily(f"{sName}_uncollectable_objects", "uncollectable objects found by the garbage collector per generation", labels=["generation"])
+      for nGeneration in range(GENERATIONS):
+         sGeneration = str(nGeneration)
+         listBuckets = []
+         nCumulated = 0
+         for fUpperBound, nCount in zip(PAUSE_BUCKETS, list(self.__listBuckets[nGeneration])):
+            nCumulated += nCount
+            listBuckets.append(("+Inf" if fUpperBound == float("inf") else str(fUpperBound), nCumulated))
+         oPauses.add_metric([sGeneration], listBuckets, self.__listPauseSum[nGeneration])
+         oCollected.add_metric([sGeneration], self.__listCollected[nGeneration])
+         oUncollectable.add_metric([sGeneration], self.__listUncollectable[nGeneration])
+      yield oPauses
+      yield oCollected
+      yield oUncollectable
+      if self.__fInterval is not None:
+         listAllocations = self.__listAllocations
+         oBytes  = GaugeMetricFamily(f"{sName}_allocation_bytes", "memory allocated by the allocation site (tracemalloc)", labels=["site"])
+         oBlocks = GaugeMetricFamily(f"{sName}_allocation_blocks", "memory blocks allocated by the allocation site (tracemalloc)", labels=["site"])
+         oDiff   = GaugeMetricFamily(f"{sName}_allocation_bytes_diff", "change of the memory allocated by the allocation site since the previous snapshot", labels=["site"])
+         for sSite, nSize, nBlocks, nSizeDiff in listAllocations:
+            oBytes.add_metric([sSite], nSize)
+            oBlocks.add_metric([sSite], nBlocks)
+            oDiff.add_metric([sSite], nSizeDiff)
+         yield oBytes
+         yield oBlocks
+         yield oDiff
+
+# eof class CGcInstrumentation():
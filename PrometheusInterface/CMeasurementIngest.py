@@ -0,0 +1,334 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CMeasurementIngest.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Ingest large measurement files (like timing captures or sensor traces) into metrics, without parsing them
+#   row by row in Robot Framework or Python loops. Supported are text files with separated values (e.g. '.csv')
+#   and NumPy files ('.npy', structured or two-dimensional arrays).
+#
+# - The file is memory-mapped and processed in chunks (of complete lines). Every chunk is parsed vectorized (NumPy)
+#   and aggregated per metric and label set, according to a declared mapping between columns and metrics:
+#
+#     {"metric": "beats_per_minute", "type": "gauge", "value": "bpm", "labels": ["room", "testbench"]}
+#
+#   * 'metric' : name of the metric
+#   * 'type'   : 'gauge' (last value), 'counter' (sum of values), 'histogram' or 'summary' (all values observed)
+#   * 'value'  : column containing the values (column name or column index)
+#   * 'labels' : columns containing the label values (order like the label names of the metric)
+#
+# - The peak memory consumption depends on the chunk size and the number of label sets, not on the file size.
+#
+# - The aggregates of all chunks are merged per metric and label set ('merge_aggregate') and applied after the whole
+#   file is processed, therefore a file with an invalid row (or a counter with a negative sum) changes no metric.
+#
+# Python API:
+#
+#    oIngest = CMeasurementIngest(sFile, listMappings)
+#    dictStatistics = oIngest.run(fnApply)
+#
+# 'fnApply(dictMapping, tupleLabelValues, dictAggregate)' is called per chunk, metric and label set
+# (see 'apply_aggregate' for the content of 'dictAggregate').
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, mmap, time, json
+
+METRIC_TYPES        = ("gauge", "counter", "histogram", "summary")
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+LABEL_SEPARATOR     = "\x1f"
+
+# --------------------------------------------------------------------------------------------------------------
+
+def import_numpy():
+   """Imports the NumPy package (required for the measurement ingestion)
+   """
+   try:
+      import numpy
+   except ImportError:
+      raise ImportError("The package 'numpy' is required for the measurement ingestion; please install it with 'pip install numpy'")
+   return numpy
+
+def parse_mappings(mappings=None):
+   """Returns the mappings as list of dictionaries. Accepted are a dictionary, a list of dictionaries or a JSON string of both.
+   """
+   if mappings is None:
+      raise ValueError("No mapping defined")
+   if isinstance(mappings, str):
+      mappings = json.loads(mappings)
+   if isinstance(mappings, dict):
+      mappings = [mappings]
+   listMappings = []
+   for dictMapping in mappings:
+      dictMapping = dict(dictMapping)
+      for sKey in ("metric", "type", "value"):
+         if sKey not in dictMapping:
+            raise ValueError(f"Missing key '{sKey}' in mapping '{dictMapping}'")
+      if dictMapping['type'] not in METRIC_TYPES:
+         raise ValueError(f"Invalid type '{dictMapping['type']}' in mapping '{dictMapping}'; expected one of: {', '.join(METRIC_TYPES)}")
+      listLabels = dictMapping.get('labels', [])
+      if isinstance(listLabels, str):
+         listLabels = [sLabel.strip() for sLabel in listLabels.split(';') if sLabel.strip() != ""]
+      dictMapping['labels'] = list(listLabels)
+      listMappings.append(dictMapping)
+   return listMappings
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CMeasurementIngest():
+   """Streams a measurement file chunk by chunk through a mapping between columns and metrics
+   """
+
+   def __init__(self, sFile=None, mappings=None, sDelimiter=None, bHeader=True, nChunkBytes=DEFAULT_CHUNK_BYTES, dictUpperBounds=None):
+      if sFile is None:
+         raise Exception("sFile is None")
+      if not os.path.isfile(sFile):
+         raise Exception(f"File '{sFile}' not found")
+      self.__numpy        = import_numpy()
+      self.__sFile        = sFile
+      self.__listMappings = parse_mappings(mappings)
+      self.__sDelimiter   = sDelimiter
+      self.__bHeader      = bHeader
+      self.__nChunkBytes  = int(nChunkBytes)
+      self.__bNpy         = (os.path.splitext(sFile)[1].lower() == ".npy")
+      # upper bounds of histograms: metric name -> list of upper bounds
+      self.__dictUpperBounds = dictUpperBounds if dictUpperBounds is not None else {}
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __resolve_column(self, column, listHeader):
+      if isinstance(column, int):
+         return column
+      sColumn = str(column).strip()
+      if sColumn.isdigit():
+         return int(sColumn)
+      if listHeader is None:
+         raise ValueError(f"Column '{sColumn}' referenced by name, but the file has no header")
+      if sColumn not in listHeader:
+         raise ValueError(f"Column '{sColumn}' not found in header of file '{self.__sFile}'")
+      return listHeader.index(sColumn)
+
+   def __iter_text_chunks(self, oMap, nStart):
+      """Yields chunks of complete lines of a memory-mapped text file
+      """
+      nSize = len(oMap)
+      nPosition = nStart
+      while nPosition < nSize:
+         nEnd = min(nPosition + self.__nChunkBytes, nSize)
+         if nEnd < nSize:
+            nLineEnd = oMap.rfind(b"\n", nPosition, nEnd)
+            if nLineEnd == -1:
+               nLineEnd = oMap.find(b"\n", nEnd) # line longer than the chunk size
+               if nLineEnd == -1:
+                  nLineEnd = nSize - 1
+            nEnd = nLineEnd + 1
+         yield oMap[nPosition:nEnd]
+         nPosition = nEnd
+
+   def __iter_text_tables(self, listColumns):
+      """Yields the used columns of a text file with separated values, chunk by chunk (column index -> array of strings)
+      """
+      numpy = self.__numpy
+      with open(self.__sFile, "rb") as hFile:
+         if os.fstat(hFile.fileno()).st_size == 0:
+            return
+         with mmap.mmap(hFile.fileno(), 0, access=mmap.ACCESS_READ) as oMap:
+            nStart = 0
+            if self.__bHeader is True:
+               nFirstLineEnd = oMap.find(b"\n")
+               nStart = nFirstLineEnd + 1 if nFirstLineEnd != -1 else len(oMap)
+            for bytesChunk in self.__iter_text_chunks(oMap, nStart):
+               listLines = bytesChunk.decode("utf-8").splitlines()
+               aTable = numpy.loadtxt(listLines, delimiter=self.__sDelimiter, dtype=str, usecols=listColumns, ndmin=2)
+               if aTable.shape[0] == 0:
+                  continue
+               aTable = numpy.char.strip(aTable)
+               yield {nColumn: aTable[:, nIndex] for nIndex, nColumn in enumerate(listColumns)}
+
+   def __iter_npy_tables(self, listColumns):
+      """Yields the used columns of a NumPy file, chunk by chunk (column index -> array).
+Structured arrays provide the columns by field, two-dimensional arrays by their second axis.
+      """
+      numpy = self.__numpy
+      aData = numpy.load(self.__sFile, mmap_mode='r')
+      if aData.ndim == 1 and aData.dtype.names is None:
+         aData = aData.reshape(-1, 1)
+      nRowBytes = max(1, aData.dtype.itemsize * (1 if aData.dtype.names is not None else aData.shape[1]))
+      nChunkRows = max(1, self.__nChunkBytes // nRowBytes)
+      for nStart in range(0, aData.shape[0], nChunkRows):
+         aChunk = aData[nStart:nStart + nChunkRows]
+         if aData.dtype.names is not None:
+            yield {nColumn: numpy.asarray(aChunk[aData.dtype.names[nColumn]]) for nColumn in listColumns}
+         else:
+            yield {nColumn: numpy.asarray(aChunk[:, nColumn]) for nColumn in listColumns}
+
+   def __get_header(self):
+      """Returns the column names (or None) and detects the delimiter of text files
+      """
+      if self.__bNpy is True:
+         return self.__numpy.load(self.__sFile, mmap_mode='r').dtype.names
+      with open(self.__sFile, encoding="utf-8") as hFile:
+         sFirstLine = hFile.readline().strip()
+      if self.__sDelimiter is None:
+         self.__sDelimiter = next((sCandidate for sCandidate in (';', ',', '\t') if sCandidate in sFirstLine), None)
+      if self.__bHeader is True:
+         return [sName.strip() for sName in sFirstLine.split(self.__sDelimiter)]
+      return None
+
+   def __aggregate(self, dictMapping, aValues, aKeys):
+      """Aggregates the values of a chunk per label set; returns list of (label values, aggregate)
+      """
+      numpy = self.__numpy
+      if aKeys is None:
+         aUniqueKeys = numpy.asarray([""])
+         aInverse    = numpy.zeros(len(aValues), dtype=numpy.intp)
+      else:
+         aUniqueKeys, aInverse = numpy.unique(aKeys, return_inverse=True)
+      nGroups = len(aUniqueKeys)
+      listAggregates = [{} for nGroup in range(nGroups)]
+      sType = dictMapping['type']
+      aSums   = numpy.bincount(aInverse, weights=aValues, minlength=nGroups)
+      aCounts = numpy.bincount(aInverse, minlength=nGroups)
+      for nGroup in range(nGroups):
+         listAggregates[nGroup]['sum']   = float(aSums[nGroup])
+         listAggregates[nGroup]['count'] = int(aCounts[nGroup])
+      if sType == "gauge":
+         aLast = numpy.full(nGroups, -1, dtype=numpy.intp)
+         numpy.maximum.at(aLast, aInverse, numpy.arange(len(aValues)))
+         aMin = numpy.full(nGroups, numpy.inf)
+         numpy.minimum.at(aMin, aInverse, aValues)
+         aMax = numpy.full(nGroups, -numpy.inf)
+         numpy.maximum.at(aMax, aInverse, aValues)
+         for nGroup in range(nGroups):
+            listAggregates[nGroup]['last'] = float(aValues[aLast[nGroup]])
+            listAggregates[nGroup]['min']  = float(aMin[nGroup])
+            listAggregates[nGroup]['max']  = float(aMax[nGroup])
+      elif sType == "histogram":
+         listUpperBounds = self.__dictUpperBounds.get(dictMapping['metric'])
+         if listUpperBounds is None:
+            raise ValueError(f"Upper bounds of histogram '{dictMapping['metric']}' not defined")
+         nBuckets = len(listUpperBounds)
+         aBuckets = numpy.searchsorted(numpy.asarray(listUpperBounds, dtype=numpy.float64), aValues, side='left')
+         aBucketCounts = numpy.bincount(aInverse * nBuckets + aBuckets, minlength=nGroups * nBuckets).reshape(nGroups, nBuckets)
+         for nGroup in range(nGroups):
+            listAggregates[nGroup]['buckets'] = aBucketCounts[nGroup].tolist()
+      listResults = []
+      for sKey, dictAggregate in zip(aUniqueKeys.tolist(), listAggregates):
+         tupleLabelValues = tuple(sKey.split(LABEL_SEPARATOR)) if aKeys is not None else ()
+         listResults.append((tupleLabelValues, dictAggregate))
+      return listResults
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def run(self, fnApply=None):
+      """Processes the whole file; returns statistics (rows, seconds, rows per second, chunks)
+      """
+      numpy = self.__numpy
+      fStart  = time.perf_counter()
+      nRows   = 0
+      nChunks = 0
+      listHeader = self.__get_header()
+      # -- columns used by the mappings
+      listColumns  = []
+      listResolved = []
+      for dictMapping in self.__listMappings:
+         nValueColumn = self.__resolve_column(dictMapping['value'], listHeader)
+         listLabelColumns = [self.__resolve_column(label, listHeader) for label in dictMapping['labels']]
+         for nColumn in [nValueColumn] + listLabelColumns:
+            if nColumn not in listColumns:
+               listColumns.append(nColumn)
+         listResolved.append((dictMapping, nValueColumn, listLabelColumns))
+      # -- chunks
+      itTables = self.__iter_npy_tables(listColumns) if self.__bNpy is True else self.__iter_text_tables(listColumns)
+      for dictColumns in itTables:
+         nChunkRows = len(dictColumns[listColumns[0]])
+         if nChunkRows == 0:
+            continue
+         nRows   = nRows + nChunkRows
+         nChunks = nChunks + 1
+         for dictMapping, nValueColumn, listLabelColumns in listResolved:
+            aValues = dictColumns[nValueColumn].astype(numpy.float64)
+            aKeys = None
+            for nLabelColumn in listLabelColumns:
+               aLabels = dictColumns[nLabelColumn].astype(str)
+               aKeys = aLabels if aKeys is None else numpy.char.add(numpy.char.add(aKeys, LABEL_SEPARATOR), aLabels)
+            aValid = ~numpy.isnan(aValues)
+            if not aValid.all():
+               aValues = aValues[aValid]
+               aKeys = aKeys[aValid] if aKeys is not None else None
+            if len(aValues) == 0:
+               continue
+            for tupleLabelValues, dictAggregate in self.__aggregate(dictMapping, aValues, aKeys):
+               if fnApply is not None:
+                  fnApply(dictMapping, tupleLabelValues, dictAggregate)
+      fSeconds = time.perf_counter() - fStart
+      fRowsPerSecond = nRows / fSeconds if fSeconds > 0 else 0.0
+      return {'rows': nRows, 'seconds': fSeconds, 'rows_per_second': fRowsPerSecond, 'chunks': nChunks}
+
+# eof class CMeasurementIngest():
+
+# --------------------------------------------------------------------------------------------------------------
+
+def merge_aggregate(dictAggregate, dictNextAggregate):
+   """Merges the aggregate of a following chunk into the aggregate of the same metric and label set
+   """
+   dictAggregate['sum']   = dictAggregate['sum'] + dictNextAggregate['sum']
+   dictAggregate['count'] = dictAggregate['count'] + dictNextAggregate['count']
+   if 'last' in dictNextAggregate:
+      dictAggregate['last'] = dictNextAggregate['last']
+      dictAggregate['min']  = min(dictAggregate['min'], dictNextAggregate['min'])
+      dictAggregate['max']  = max(dictAggregate['max'], dictNextAggregate['max'])
+   if 'buckets' in dictNextAggregate:
+      dictAggregate['buckets'] = [nCount + nNextCount for nCount, nNextCount in zip(dictAggregate['buckets'], dictNextAggregate['buckets'])]
+   return dictAggregate
+
+def apply_aggregate(oSeries, sType, dictAggregate, oWindows=None):
+   """Applies the aggregate of a chunk to a series of the Prometheus Python client library:
+
+* gauge     : {'last': ..., 'min': ..., 'max': ..., 'sum': ..., 'count': ...}
+                                                                 -> set (last value); in case of the gauge has windows
+                                                                    (oWindows, gauge mode 'window') all values are added to the window
+* counter   : {'sum': ..., 'count': ...}                         -> inc(sum)
+* summary   : {'sum': ..., 'count': ...}                         -> count and sum increased
+* histogram : {'sum': ..., 'count': ..., 'buckets': [counts]}    -> buckets and sum increased
+   """
+   if sType == "gauge":
+      if oWindows is not None:
+         oWindows.set_many(oSeries, dictAggregate['last'], dictAggregate['count'], dictAggregate['sum'], dictAggregate['min'], dictAggregate['max'])
+      else:
+         oSeries.set(dictAggregate['last'])
+   elif sType == "counter":
+      oSeries.inc(dictAggregate['sum'])
+   elif sType == "summary":
+      oSeries._count.inc(dictAggregate['count'])
+      oSeries._sum.inc(dictAggregate['sum'])
+   elif sType == "histogram":
+      for oBucket, nBucketCount in zip(oSeries._buckets, dictAggregate['buckets']):
+         if nBucketCount > 0:
+            oBucket.inc(nBucketCount)
+      oSeries._sum.inc(dictAggregate['sum'])
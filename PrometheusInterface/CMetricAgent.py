@@ -0,0 +1,257 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CMetricAgent.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Forward all updated series of a prometheus_interface instance to a central aggregator ('metric_aggregator.py'),
+#   instead of being scraped by Prometheus (e.g. bench PCs behind a lab firewall).
+#
+# - Updated series are only marked; every interval the agent computes a batch of deltas of all marked series:
+#
+#   * counters, summaries and histograms: increments since the last batch (per sample, histograms per bucket)
+#   * gauges, infos and enums: the last value
+#
+# - The batch is sent over one persistent TCP connection, one JSON object per line:
+#
+#    {"agent": "<agent id>", "session": "<session id>"}                         (once per connection)
+#    {"m": <name>, "t": <type>, "h": <help>, "l": [<label names>], "v": [<label values>],
+#     "s": [[<sample suffix>, {<sample labels>}, <value>], ...]}                (one line per series)
+#    {"r": <name>, "l": [<label names>], "v": [<label values>]}                 (removed series; without "v": all series of the metric)
+#    {"b": <batch number>}                                                      (end of the batch)
+#
+#   The aggregator applies a batch only when its end is received and acknowledges it with {"a": <batch number>}.
+#
+# - The values already transferred (base of the deltas) are advanced only with the acknowledgement. In case of the
+#   connection is lost, the unacknowledged batch is sent again unchanged (same batch number; the aggregator ignores
+#   batches already applied), therefore no increment is counted twice. All updates until the acknowledgement are
+#   kept as marked series and merged into the next batch, therefore no increment is lost (the pending updates are
+#   bounded by the number of series).
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, json, socket, threading
+
+DEFAULT_INTERVAL    = 1.0    # seconds
+CONNECT_TIMEOUT     = 5.0    # seconds
+ACKNOWLEDGE_TIMEOUT = 10.0   # seconds
+
+# sample suffixes transferred as deltas (all other samples are transferred as last value)
+DELTA_SAMPLES = {'counter'   : ("_total",),
+                 'summary'   : ("_count", "_sum"),
+                 'histogram' : ("_bucket", "_count", "_sum")}
+
+# --------------------------------------------------------------------------------------------------------------
+
+def parse_address(sAddress):
+   """Splits an address '<host>:<port>' into host and port
+   """
+   sHost, _, sPort = str(sAddress).rpartition(':')
+   if ( (sHost == "") or (not sPort.isdigit()) ):
+      raise ValueError(f"Invalid address '{sAddress}'; expected '<host>:<port>'")
+   return sHost, int(sPort)
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CMetricAgent():
+   """Sends batched deltas of all updated series to a central aggregator
+   """
+
+   def __init__(self, sAddress=None, fInterval=DEFAULT_INTERVAL, sAgentId=None):
+      if sAddress is None:
+         raise Exception("sAddress is None")
+      self.__tupleAddress = parse_address(sAddress)
+      self.__fInterval    = float(fInterval)
+      self.__sAgentId     = sAgentId if sAgentId is not None else f"{socket.gethostname()}:{os.getpid()}"
+      self.__sSession     = os.urandom(8).hex() # batch numbers are unique within the session
+      self.__oLock        = threading.Lock() # protects the marked series, the removals and the transferred values
+      self.__oSendLock    = threading.Lock() # protects the pending batch and the connection (the update keywords are not blocked while sending)
+      self.__dictDirty    = {} # (name, label values) -> series, updated since the last acknowledged batch
+      self.__dictSent     = {} # (name, label values) -> sample key -> value acknowledged by the aggregator
+      self.__listRemoved  = [] # removal lines not yet part of a batch
+      self.__oBatch       = None # pending batch: (batch number, lines, values transferred with the batch)
+      self.__nBatch       = 0
+      self.__oSocket      = None
+      self.__oReader      = None
+      self.__oStop        = threading.Event()
+      self.__oThread      = threading.Thread(target=self.__run, name="prometheus_interface_agent", daemon=True)
+      self.__oThread.start()
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __run(self):
+      while not self.__oStop.wait(self.__fInterval):
+         self.flush()
+
+   def __create_batch(self):
+      """Returns the next batch (deltas of all series updated since the last acknowledged batch and the removals), or None if empty
+      """
+      with self.__oLock:
+         dictDirty = self.__dictDirty
+         self.__dictDirty = {}
+         listLines = self.__listRemoved
+         self.__listRemoved = []
+         dictSentValues = {tupleSeries: self.__dictSent.get(tupleSeries, {}) for tupleSeries in dictDirty}
+      dictTransferred = {}
+      for (sName, tupleLabelValues), oSeries in dictDirty.items():
+         sType = oSeries._type
+         tupleDeltaSamples = DELTA_SAMPLES.get(sType, ())
+         dictSent = dictSentValues[(sName, tupleLabelValues)]
+         dictValues = dictTransferred[(sName, tupleLabelValues)] = {}
+         listSamples = []
+         for oSample in oSeries._samples():
+            if oSample.name == "_created":
+               continue
+            tupleKey = (oSample.name, tuple(sorted(oSample.labels.items())))
+            if oSample.name in tupleDeltaSamples:
+               fDelta = oSample.value - dictSent.get(tupleKey, 0.0)
+               if fDelta < 0:
+                  fDelta = oSample.value # series has been removed and created again
+               dictValues[tupleKey] = oSample.value
+               if ( (fDelta == 0) and (tupleKey in dictSent) ):
+                  continue # unchanged (the first value is always sent, to create all samples of the series)
+               listSamples.append([oSample.name, oSample.labels, fDelta])
+            else:
+               listSamples.append([oSample.name, oSample.labels, oSample.value])
+         if len(listSamples) == 0:
+            continue
+         listLines.append(json.dumps({'m': sName, 't': sType, 'h': oSeries._documentation, 'l': list(oSeries._labelnames),
+                                      'v': list(tupleLabelValues), 's': listSamples}, separators=(',', ':')))
+      if len(listLines) == 0:
+         return None
+      self.__nBatch += 1
+      listLines.append(json.dumps({'b': self.__nBatch}))
+      return self.__nBatch, listLines, dictTransferred, dictDirty
+
+   def __acknowledge(self, oBatch):
+      """Advances the transferred values with the values of an acknowledged batch (except of series removed meanwhile)
+      """
+      nBatch, listLines, dictTransferred, dictDirty = oBatch
+      with self.__oLock:
+         for tupleSeries, dictValues in dictTransferred.items():
+            if tupleSeries in dictDirty:
+               self.__dictSent.setdefault(tupleSeries, {}).update(dictValues)
+
+   def __connect(self):
+      oSocket = socket.create_connection(self.__tupleAddress, timeout=CONNECT_TIMEOUT)
+      oSocket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      oSocket.settimeout(ACKNOWLEDGE_TIMEOUT)
+      oSocket.sendall((json.dumps({'agent': self.__sAgentId, 'session': self.__sSession}) + "\n").encode("utf-8"))
+      self.__oSocket = oSocket
+      self.__oReader = oSocket.makefile("rb")
+
+   def __disconnect(self):
+      if self.__oSocket is not None:
+         try:
+            self.__oReader.close()
+            self.__oSocket.close()
+         except OSError:
+            pass
+         self.__oSocket = None
+         self.__oReader = None
+
+   def __send(self, nBatch, listLines):
+      """Sends a batch and waits for the acknowledgement of the aggregator
+      """
+      if self.__oSocket is None:
+         self.__connect()
+      self.__oSocket.sendall(("\n".join(listLines) + "\n").encode("utf-8"))
+      while True:
+         bytesLine = self.__oReader.readline()
+         if bytesLine == b"":
+            raise ConnectionError("Connection closed by the aggregator")
+         try:
+            nAcknowledged = json.loads(bytesLine).get('a')
+         except (ValueError, AttributeError):
+            continue
+         if nAcknowledged == nBatch:
+            return
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def notify(self, sName, tupleLabelValues, oSeries):
+      """Marks a series as updated
+      """
+      with self.__oLock:
+         self.__dictDirty[(sName, tupleLabelValues)] = oSeries
+
+   def forget(self, sName, listLabelNames, tupleLabelValues=None):
+      """Removes a series (or all series of a metric, in case of tupleLabelValues is None) and forwards the removal to the aggregator
+      """
+      dictRemoval = {'r': sName, 'l': list(listLabelNames)}
+      if tupleLabelValues is not None:
+         dictRemoval['v'] = list(tupleLabelValues)
+      with self.__oLock:
+         for dictSeries in (self.__dictDirty, self.__dictSent):
+            for tupleKey in [tupleKey for tupleKey in list(dictSeries) if ( (tupleKey[0] == sName) and (tupleLabelValues in (None, tupleKey[1])) )]:
+               dictSeries.pop(tupleKey, None)
+         if self.__oBatch is not None:
+            dictBatchDirty = self.__oBatch[3]
+            for tupleKey in [tupleKey for tupleKey in list(dictBatchDirty) if ( (tupleKey[0] == sName) and (tupleLabelValues in (None, tupleKey[1])) )]:
+               dictBatchDirty.pop(tupleKey, None) # the values of the pending batch do not advance the removed series
+         self.__listRemoved.append(json.dumps(dictRemoval, separators=(',', ':')))
+
+   def flush(self):
+      """Sends the pending batch (in case of not yet acknowledged) or the next batch; returns True in case of the batch is acknowledged
+(or there is nothing to send)
+      """
+      with self.__oSendLock:
+         if self.__oBatch is None:
+            oBatch = self.__create_batch()
+            with self.__oLock:
+               self.__oBatch = oBatch
+         if self.__oBatch is None:
+            return True
+         try:
+            self.__send(self.__oBatch[0], self.__oBatch[1])
+         except OSError:
+            # aggregator not reachable or batch not acknowledged; the batch is sent again after reconnecting
+            self.__disconnect()
+            return False
+         self.__acknowledge(self.__oBatch)
+         with self.__oLock:
+            self.__oBatch = None
+      return True
+
+   def get_statistics(self):
+      """Returns the number of lines of the pending batch, the number of marked series and the connection state
+      """
+      with self.__oSendLock:
+         nPending = len(self.__oBatch[1]) if self.__oBatch is not None else 0
+         return {'pending': nPending, 'marked': len(self.__dictDirty), 'connected': self.__oSocket is not None}
+
+   def close(self):
+      """Sends the last batch and closes the connection
+      """
+      self.__oStop.set()
+      self.__oThread.join()
+      if self.flush() is True:
+         self.flush() # updates marked while the pending batch was acknowledged
+      with self.__oSendLock:
+         self.__disconnect()
+
+# eof class CMetricAgent():
@@ -0,0 +1,244 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CMetricFileSink.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Store timestamped samples of all updated series in chunked columnar files (NumPy '.npy' format),
+#   to keep the exported metrics also in case of no Prometheus server is available.
+#
+# - Every chunk file contains the columns 'timestamp', 'series' (series id) and 'value'.
+#   The mapping between series id and metric name and labels is stored in a separate
+#   label dictionary file ('series.jsonl').
+#
+# - CMetricFileReader memory-maps the chunks for a fast offline analysis.
+#
+# The NumPy package is an optional dependency of this interface library and only required when
+# the file sink is used.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, json, time, threading, glob
+from array import array
+
+SERIES_FILE_NAME   = "series.jsonl"
+CHUNK_FILE_PATTERN = "chunk_{:06d}.npy"
+CHUNK_DTYPE        = [('timestamp', '<f8'), ('series', '<u4'), ('value', '<f8')]
+
+DEFAULT_CHUNK_ROWS     = 65536
+DEFAULT_ROTATE_SECONDS = 60.0
+
+# --------------------------------------------------------------------------------------------------------------
+
+def import_numpy():
+   """Imports the optional NumPy package
+   """
+   try:
+      import numpy
+   except ImportError:
+      raise ImportError("The package 'numpy' is required for the metric file sink; please install it with 'pip install numpy'")
+   return numpy
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CMetricFileSink():
+   """Buffers timestamped samples in memory and writes them chunk by chunk into a folder.
+
+A new chunk file is written when either the buffer contains ``nChunkRows`` rows or the oldest buffered row
+is older than ``fRotateSeconds``. Therefore the memory used by the sink is bounded by the chunk size.
+   """
+
+   def __init__(self, sDirectory=None, nChunkRows=DEFAULT_CHUNK_ROWS, fRotateSeconds=DEFAULT_ROTATE_SECONDS):
+      if sDirectory is None:
+         raise Exception("sDirectory is None")
+      self.__numpy          = import_numpy()
+      self.__sDirectory     = os.path.abspath(sDirectory)
+      self.__nChunkRows     = int(nChunkRows)
+      self.__fRotateSeconds = float(fRotateSeconds)
+      self.__oLock          = threading.Lock()
+
+      os.makedirs(self.__sDirectory, exist_ok=True)
+
+      # continue numbering of chunks and series in case of the folder already contains data of a previous run
+      self.__dictSeriesIds = {}
+      self.__listNewSeries = []
+      sSeriesFile = os.path.join(self.__sDirectory, SERIES_FILE_NAME)
+      if os.path.isfile(sSeriesFile):
+         with open(sSeriesFile, encoding='utf-8') as hSeriesFile:
+            for sLine in hSeriesFile:
+               dictSeries = json.loads(sLine)
+               tupleKey = (dictSeries['name'], tuple(sorted(dictSeries['labels'].items())))
+               self.__dictSeriesIds[tupleKey] = dictSeries['id']
+      self.__nChunkIndex = len(glob.glob(os.path.join(self.__sDirectory, "chunk_*.npy")))
+
+      # column buffers
+      self.__arTimestamps = array('d')
+      self.__arSeries     = array('I')
+      self.__arValues     = array('d')
+      self.__fChunkStart  = None
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def get_directory(self):
+      """Returns the folder the chunks are written to
+      """
+      return self.__sDirectory
+
+   def append(self, sName=None, listLabelNames=(), tupleLabelValues=(), listSamples=()):
+      """Appends all samples of a single series (like returned by prometheus_client) to the buffer
+      """
+      fTimestamp = time.time()
+      with self.__oLock:
+         for oSample in listSamples:
+            if oSample.name == "_created":
+               continue
+            dictLabels = dict(zip(listLabelNames, tupleLabelValues))
+            dictLabels.update(oSample.labels)
+            sSampleName = sName + oSample.name
+            tupleKey = (sSampleName, tuple(sorted(dictLabels.items())))
+            nSeriesId = self.__dictSeriesIds.get(tupleKey)
+            if nSeriesId is None:
+               nSeriesId = len(self.__dictSeriesIds)
+               self.__dictSeriesIds[tupleKey] = nSeriesId
+               self.__listNewSeries.append({'id': nSeriesId, 'name': sSampleName, 'labels': dictLabels})
+            self.__arTimestamps.append(fTimestamp)
+            self.__arSeries.append(nSeriesId)
+            self.__arValues.append(oSample.value)
+         if self.__fChunkStart is None:
+            self.__fChunkStart = fTimestamp
+         if ( (len(self.__arValues) >= self.__nChunkRows) or (fTimestamp - self.__fChunkStart >= self.__fRotateSeconds) ):
+            self.__write_chunk()
+
+   def flush(self):
+      """Writes all buffered rows to a new chunk file
+      """
+      with self.__oLock:
+         self.__write_chunk()
+
+   def close(self):
+      """Flushes the sink; to be called at the end of the execution
+      """
+      self.flush()
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __write_chunk(self):
+      numpy = self.__numpy
+      # the label dictionary is written first, to ensure that every series id within a chunk is resolvable
+      if len(self.__listNewSeries) > 0:
+         with open(os.path.join(self.__sDirectory, SERIES_FILE_NAME), 'a', encoding='utf-8') as hSeriesFile:
+            for dictSeries in self.__listNewSeries:
+               hSeriesFile.write(json.dumps(dictSeries) + "\n")
+         self.__listNewSeries = []
+      nRows = len(self.__arValues)
+      if nRows == 0:
+         return
+      aChunk = numpy.empty(nRows, dtype=CHUNK_DTYPE)
+      aChunk['timestamp'] = numpy.frombuffer(self.__arTimestamps, dtype='<f8')
+      aChunk['series']    = numpy.frombuffer(self.__arSeries, dtype=numpy.uint32)
+      aChunk['value']     = numpy.frombuffer(self.__arValues, dtype='<f8')
+      sChunkFile = os.path.join(self.__sDirectory, CHUNK_FILE_PATTERN.format(self.__nChunkIndex))
+      # write to a temporary file first, to avoid that readers see incomplete chunks
+      sTmpFile = sChunkFile + ".tmp"
+      with open(sTmpFile, 'wb') as hChunkFile:
+         numpy.save(hChunkFile, aChunk)
+      os.replace(sTmpFile, sChunkFile)
+      self.__nChunkIndex  = self.__nChunkIndex + 1
+      self.__arTimestamps = array('d')
+      self.__arSeries     = array('I')
+      self.__arValues     = array('d')
+      self.__fChunkStart  = None
+
+# eof class CMetricFileSink():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CMetricFileReader():
+   """Reads the chunks written by CMetricFileSink. All chunks are memory-mapped, therefore only the rows
+that are really accessed are loaded.
+   """
+
+   def __init__(self, sDirectory=None):
+      if sDirectory is None:
+         raise Exception("sDirectory is None")
+      self.__numpy      = import_numpy()
+      self.__sDirectory = os.path.abspath(sDirectory)
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def get_series(self):
+      """Returns the label dictionary: series id -> {'name': ..., 'labels': ...}
+      """
+      dictSeries = {}
+      sSeriesFile = os.path.join(self.__sDirectory, SERIES_FILE_NAME)
+      if os.path.isfile(sSeriesFile):
+         with open(sSeriesFile, encoding='utf-8') as hSeriesFile:
+            for sLine in hSeriesFile:
+               dictEntry = json.loads(sLine)
+               dictSeries[dictEntry['id']] = {'name': dictEntry['name'], 'labels': dictEntry['labels']}
+      return dictSeries
+
+   def get_chunks(self):
+      """Returns all chunks (in order of writing) as memory-mapped structured arrays
+      """
+      listChunkFiles = sorted(glob.glob(os.path.join(self.__sDirectory, "chunk_*.npy")))
+      return [self.__numpy.load(sChunkFile, mmap_mode='r') for sChunkFile in listChunkFiles]
+
+   def find_series(self, sName=None, dictLabels=None):
+      """Returns the ids of all series with the given name and (optionally) a subset of labels
+      """
+      listSeriesIds = []
+      for nSeriesId, dictSeries in self.get_series().items():
+         if ( (sName is not None) and (dictSeries['name'] != sName) ):
+            continue
+         if dictLabels is not None:
+            if any(dictSeries['labels'].get(sLabelName) != str(sLabelValue) for sLabelName, sLabelValue in dictLabels.items()):
+               continue
+         listSeriesIds.append(nSeriesId)
+      return listSeriesIds
+
+   def read(self, sName=None, dictLabels=None):
+      """Returns timestamps, series ids and values of all rows of the matching series as NumPy arrays
+      """
+      numpy = self.__numpy
+      aSeriesIds = numpy.asarray(self.find_series(sName, dictLabels), dtype=numpy.uint32)
+      listTimestamps = []
+      listSeries     = []
+      listValues     = []
+      for aChunk in self.get_chunks():
+         aMask = numpy.isin(aChunk['series'], aSeriesIds)
+         listTimestamps.append(aChunk['timestamp'][aMask])
+         listSeries.append(aChunk['series'][aMask])
+         listValues.append(aChunk['value'][aMask])
+      if len(listValues) == 0:
+         return numpy.empty(0), numpy.empty(0, dtype=numpy.uint32), numpy.empty(0)
+      return numpy.concatenate(listTimestamps), numpy.concatenate(listSeries), numpy.concatenate(listValues)
+
+# eof class CMetricFileReader():
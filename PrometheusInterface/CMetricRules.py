@@ -0,0 +1,332 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CMetricRules.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Rules over the metrics of prometheus_interface, evaluated within the library (without Prometheus server),
+#   to fail a test as soon as a metric violates a limit (see keyword 'add_metric_rule'):
+#
+#   * threshold: the value of a series fulfills a condition (e.g. '> 200')
+#   * rate:      the change per second of the value of a series fulfills a condition (optionally over a window of seconds)
+#   * absence:   a series is not updated for a window of seconds
+#
+# - Threshold and rate rules are evaluated with every update of a series. The rules are indexed per metric, and the rules
+#   matching the labels of a series are cached per series; therefore an update only touches the rules of its own series.
+#   Absence rules are evaluated by a background thread.
+#
+# - A violation of a rule with action 'fail' is reported once, when the series enters the violated state (again only after
+#   the series fulfilled the rule in the meantime): violations of threshold and rate rules are returned to the update keyword
+#   causing them (the keyword is not successful, therefore the current test fails), violations of absence rules are queued
+#   and reported by the keyword 'check_metric_rules'. The violations of all rules are provided as metrics:
+#
+#   * 'prometheus_interface_rule_violation{rule, metric, series}': 1 while the series violates the rule, otherwise 0
+#   * 'prometheus_interface_rule_violations_total{rule}': number of violations (transitions into the violated state)
+#
+# - This class is a collector of the Prometheus Python client library.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import re, time, fnmatch, operator, threading
+
+RULE_TYPES   = ("threshold", "rate", "absence")
+RULE_ACTIONS = ("fail", "flag")
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq, '!=': operator.ne}
+
+PREFIX = "prometheus_interface"
+
+DEFAULT_EVALUATION_INTERVAL = 1.0 # seconds; maximum interval of the evaluation of absence rules
+
+# --------------------------------------------------------------------------------------------------------------
+
+def parse_condition(sCondition):
+   """Parses a condition like '> 200' and returns the operator and the limit
+   """
+   oMatch = re.match(r"^\s*(>=|<=|==|!=|>|<)\s*([-+0-9.eE]+|[-+]?inf)\s*$", str(sCondition))
+   if oMatch is None:
+      raise ValueError(f"Invalid condition '{sCondition}'; expected '<operator> <value>' with operator one of: {', '.join(OPERATORS)}")
+   return oMatch.group(1), float(oMatch.group(2))
+
+def get_value(oSeries, sSample):
+   """Returns the current value of a sample of a series ('' or '_total': value of gauges and counters, otherwise e.g. '_count', '_sum')
+   """
+   if sSample in ("", "_total"):
+      return oSeries._value.get()
+   for oSample in oSeries._samples():
+      if oSample.name == sSample:
+         return oSample.value
+   raise ValueError(f"Sample '{sSample}' not provided by the series")
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CMetricRule():
+   """A single rule over the series of a metric
+   """
+
+   def __init__(self, sName=None, sMetric=None, sType="threshold", sCondition=None, tupleLabelPatterns=None, fWindow=None, sSample="", sAction="fail"):
+      if sType not in RULE_TYPES:
+         raise ValueError(f"Invalid rule type '{sType}'; expected one of: {', '.join(RULE_TYPES)}")
+      if sAction not in RULE_ACTIONS:
+         raise ValueError(f"Invalid rule action '{sAction}'; expected one of: {', '.join(RULE_ACTIONS)}")
+      if sType == "absence":
+         if ( (fWindow is None) or (float(fWindow) <= 0) ):
+            raise ValueError("Rule type 'absence' requires a window greater than 0 (seconds)")
+         self.sOperator, self.fLimit = None, None
+      else:
+         if sCondition is None:
+            raise ValueError(f"Rule type '{sType}' requires a condition")
+         self.sOperator, self.fLimit = parse_condition(sCondition)
+      self.sName              = sName
+      self.sMetric            = sMetric
+      self.sType              = sType
+      self.fnOperator         = OPERATORS.get(self.sOperator)
+      self.tupleLabelPatterns = tupleLabelPatterns # None: all series
+      self.fWindow            = float(fWindow) if fWindow is not None else 0.0
+      self.sSample            = sSample
+      self.sAction            = sAction
+      self.nViolations        = 0
+      # state per series: label values -> [violated, reference value, reference time, time of the last update]
+      self.dictStates         = {}
+
+   def __del__(self):
+      pass
+
+   def matches(self, tupleLabelValues):
+      if self.tupleLabelPatterns is None:
+         return True
+      if len(tupleLabelValues) != len(self.tupleLabelPatterns):
+         return False
+      return all(fnmatch.fnmatchcase(sValue, sPattern) for sValue, sPattern in zip(tupleLabelValues, self.tupleLabelPatterns))
+
+   def get_expected_series(self):
+      """Returns the label values of the series expected by the labels of the rule (no wildcards), otherwise None
+      """
+      if self.tupleLabelPatterns is None:
+         return None
+      if any(sChar in sPattern for sPattern in self.tupleLabelPatterns for sChar in "*?["):
+         return None
+      return self.tupleLabelPatterns
+
+# eof class CMetricRule():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CMetricRules():
+   """Index and evaluation of all rules; collector of the violations
+   """
+
+   def __init__(self, fInterval=DEFAULT_EVALUATION_INTERVAL):
+      self.__fInterval    = float(fInterval)
+      self.__dictRules    = {} # rule name -> rule
+      self.__dictIndex    = {} # metric name -> list of rules
+      self.__dictMatches  = {} # (metric name, label values) -> tuple of rules matching the series
+      self.__listFailures = [] # messages of violations of absence rules with action 'fail', not yet reported
+      self.__oLock        = threading.Lock()
+      self.__oStop        = threading.Event()
+      self.__oThread      = None
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __get_rules(self, sMetric, tupleLabelValues):
+      tupleKey = (sMetric, tupleLabelValues)
+      tupleRules = self.__dictMatches.get(tupleKey)
+      if tupleRules is None:
+         tupleRules = tuple(oRule for oRule in self.__dictIndex.get(sMetric, ()) if oRule.matches(tupleLabelValues))
+         self.__dictMatches[tupleKey] = tupleRules
+      return tupleRules
+
+   def __set_violated(self, oRule, listState):
+      """Sets a series into the violated state (the lock is held by the caller); returns True in case of a new violation
+(the series did not violate the rule before), which is counted
+      """
+      if listState[0] is True:
+         return False
+      oRule.nViolations += 1
+      listState[0] = True
+      return True
+
+   def __get_series_name(self, oRule, tupleLabelValues):
+      return f"{oRule.sMetric}{{{';'.join(tupleLabelValues)}}}" if len(tupleLabelValues) > 0 else oRule.sMetric
+
+   def __run(self):
+      while not self.__oStop.wait(self.__fInterval):
+         self.evaluate_absence()
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def add(self, oRule, dictSeries=None):
+      """Adds a rule; dictSeries (label values -> series) are the existing series of the metric
+      """
+      with self.__oLock:
+         if oRule.sName in self.__dictRules:
+            raise ValueError(f"A rule with name '{oRule.sName}' is already defined")
+         fNow = time.monotonic()
+         for tupleLabelValues in (dictSeries or {}):
+            if oRule.matches(tupleLabelValues):
+               oRule.dictStates[tupleLabelValues] = [False, None, None, fNow]
+         tupleExpected = oRule.get_expected_series()
+         if tupleExpected is not None:
+            oRule.dictStates.setdefault(tupleExpected, [False, None, None, fNow]) # expected even if not yet updated (absence)
+         self.__dictRules[oRule.sName] = oRule
+         self.__dictIndex.setdefault(oRule.sMetric, []).append(oRule)
+         self.__dictMatches = {tupleKey: tupleRules for tupleKey, tupleRules in self.__dictMatches.items() if tupleKey[0] != oRule.sMetric}
+         if ( (oRule.sType == "absence") and (self.__oThread is None) ):
+            self.__fInterval = min(self.__fInterval, oRule.fWindow / 2)
+            self.__oStop.clear()
+            self.__oThread = threading.Thread(target=self.__run, name="prometheus_interface_rules", daemon=True)
+            self.__oThread.start()
+         elif oRule.sType == "absence":
+            self.__fInterval = min(self.__fInterval, oRule.fWindow / 2)
+
+   def remove(self, sName):
+      with self.__oLock:
+         oRule = self.__dictRules.pop(sName, None)
+         if oRule is None:
+            return False
+         self.__dictIndex[oRule.sMetric].remove(oRule)
+         if len(self.__dictIndex[oRule.sMetric]) == 0:
+            del self.__dictIndex[oRule.sMetric]
+         self.__dictMatches = {tupleKey: tupleRules for tupleKey, tupleRules in self.__dictMatches.items() if tupleKey[0] != oRule.sMetric}
+         return True
+
+   def get_rule_names(self):
+      return list(self.__dictRules)
+
+   def forget(self, sMetric, tupleLabelValues=None):
+      """Forgets the states of the series of a metric (all series or the series with the given label values), e.g. after removing them
+      """
+      if sMetric not in self.__dictIndex:
+         return
+      with self.__oLock:
+         for oRule in self.__dictIndex.get(sMetric, ()):
+            if tupleLabelValues is None:
+               oRule.dictStates.clear()
+            else:
+               oRule.dictStates.pop(tupleLabelValues, None)
+         self.__dictMatches = {tupleKey: tupleRules for tupleKey, tupleRules in self.__dictMatches.items() if tupleKey[0] != sMetric}
+
+   def evaluate(self, sMetric, tupleLabelValues, oSeries):
+      """Evaluates the rules of a series after an update; returns the messages of the new violations of rules with action 'fail'
+      """
+      if sMetric not in self.__dictIndex:
+         return ()
+      tupleRules = self.__get_rules(sMetric, tupleLabelValues)
+      if len(tupleRules) == 0:
+         return ()
+      listViolations = []
+      fNow = time.monotonic()
+      with self.__oLock:
+         for oRule in tupleRules:
+            listState = oRule.dictStates.get(tupleLabelValues)
+            if listState is None:
+               listState = oRule.dictStates[tupleLabelValues] = [False, None, None, fNow]
+            listState[3] = fNow
+            if oRule.sType == "absence":
+               listState[0] = False
+               continue
+            fValue = get_value(oSeries, oRule.sSample)
+            if oRule.sType == "threshold":
+               if oRule.fnOperator(fValue, oRule.fLimit):
+                  if ( self.__set_violated(oRule, listState) and (oRule.sAction == "fail") ):
+                     listViolations.append(f"Rule '{oRule.sName}' violated: {self.__get_series_name(oRule, tupleLabelValues)} = {fValue:g} "
+                                           f"(condition: {oRule.sOperator} {oRule.fLimit:g})")
+               else:
+                  listState[0] = False
+               continue
+            # rate
+            if listState[2] is None:
+               listState[1], listState[2] = fValue, fNow # first update: reference only
+               continue
+            fElapsed = fNow - listState[2]
+            if ( (fElapsed <= 0) or (fElapsed < oRule.fWindow) ):
+               continue
+            fRate = (fValue - listState[1]) / fElapsed
+            listState[1], listState[2] = fValue, fNow
+            if oRule.fnOperator(fRate, oRule.fLimit):
+               if ( self.__set_violated(oRule, listState) and (oRule.sAction == "fail") ):
+                  listViolations.append(f"Rule '{oRule.sName}' violated: {self.__get_series_name(oRule, tupleLabelValues)} changes by {fRate:g}/s "
+                                        f"(condition: {oRule.sOperator} {oRule.fLimit:g})")
+            else:
+               listState[0] = False
+      return listViolations
+
+   def evaluate_absence(self):
+      """Evaluates all absence rules (called periodically by the background thread)
+      """
+      fNow = time.monotonic()
+      with self.__oLock:
+         for oRule in self.__dictRules.values():
+            if oRule.sType != "absence":
+               continue
+            for tupleLabelValues, listState in oRule.dictStates.items():
+               fAbsent = fNow - listState[3]
+               if ( (fAbsent >= oRule.fWindow) and self.__set_violated(oRule, listState) and (oRule.sAction == "fail") ):
+                  self.__listFailures.append(f"Rule '{oRule.sName}' violated: {self.__get_series_name(oRule, tupleLabelValues)} not updated for {fAbsent:.1f} s "
+                                             f"(window: {oRule.fWindow:g} s)")
+
+   def take_failures(self):
+      """Returns and removes the queued violations of absence rules with action 'fail'
+      """
+      if len(self.__listFailures) == 0:
+         return []
+      with self.__oLock:
+         listFailures = self.__listFailures
+         self.__listFailures = []
+      return listFailures
+
+   def get_violations(self):
+      """Returns the series violating a rule at the moment as list of (rule name, series name)
+      """
+      with self.__oLock:
+         return [(oRule.sName, self.__get_series_name(oRule, tupleLabelValues))
+                 for oRule in self.__dictRules.values() for tupleLabelValues, listState in oRule.dictStates.items() if listState[0] is True]
+
+   def close(self):
+      if self.__oThread is not None:
+         self.__oStop.set()
+         self.__oThread.join()
+         self.__oThread = None
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def describe(self):
+      return []
+
+   def collect(self):
+      from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+      oViolation  = GaugeMetricFamily(f"{PREFIX}_rule_violation", "1 while the series violates the metric rule, otherwise 0", labels=["rule", "metric", "series"])
+      oViolations = CounterMetricFamily(f"{PREFIX}_rule_violations", "number of violations of the metric rule", labels=["rule"])
+      with self.__oLock:
+         for oRule in self.__dictRules.values():
+            for tupleLabelValues, listState in oRule.dictStates.items():
+               oViolation.add_metric([oRule.sName, oRule.sMetric, ";".join(tupleLabelValues)], 1 if listState[0] is True else 0)
+            oViolations.add_metric([oRule.sName], oRule.nViolations)
+      yield oViolation
+      yield oViolations
+
+# eof class CMetricRules():
@@ -0,0 +1,285 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# COtlpExporter.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Export the metrics of prometheus_interface to an OpenTelemetry collector (OTLP/HTTP, protobuf encoding),
+#   instead of being scraped by Prometheus (library parameter 'backend=otlp').
+#
+# - Every interval all series (cumulative temporality) or all series updated since the last export
+#   (delta temporality) are converted into one 'ExportMetricsServiceRequest' and sent to '<endpoint>/v1/metrics':
+#
+#   * counter    -> Sum (monotonic)
+#   * gauge      -> Gauge
+#   * summary    -> Summary (count and sum)
+#   * histogram  -> Histogram (explicit bounds)
+#   * info, enum -> Gauge (one data point per sample, like the Prometheus exposition)
+#
+#   With delta temporality the time window of a data point starts with the last export of its series (or with the
+#   first update of the series), therefore the windows of a series neither overlap nor leave gaps.
+#   Summaries are always exported with cumulative values: the OTLP Summary has no temporality, its count and sum
+#   are cumulative by definition.
+#
+# - Payloads that cannot be sent (collector not reachable, HTTP 429 or 5xx) are kept in a bounded retry queue
+#   and sent again with the next interval (the oldest payloads are dropped first).
+#
+# The protobuf messages are encoded by CProtobufWire (no dependency to the packages 'protobuf' or 'opentelemetry').
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, time, socket, threading, collections
+
+try:
+   from .CProtobufWire import CProtobufWriter
+except ImportError:
+   from CProtobufWire import CProtobufWriter
+
+DEFAULT_ENDPOINT    = "http://localhost:4318"
+DEFAULT_INTERVAL    = 10.0 # seconds
+DEFAULT_MAX_QUEUE   = 100  # payloads
+REQUEST_TIMEOUT     = 10.0 # seconds
+TEMPORALITIES       = {'delta': 1, 'cumulative': 2} # AggregationTemporality of OTLP
+
+SCOPE_NAME = "prometheus_interface"
+
+# --------------------------------------------------------------------------------------------------------------
+
+def key_value(sKey, sValue):
+   """Returns a KeyValue message with a string value
+   """
+   return CProtobufWriter().string(1, sKey).message(2, CProtobufWriter().string(1, sValue))
+
+# --------------------------------------------------------------------------------------------------------------
+
+class COtlpExporter():
+   """Sends the series of prometheus_interface periodically to an OpenTelemetry collector
+   """
+
+   def __init__(self, sEndpoint=DEFAULT_ENDPOINT, fInterval=DEFAULT_INTERVAL, sTemporality="cumulative", nMaxQueue=DEFAULT_MAX_QUEUE,
+                dictResource=None, sScopeVersion=""):
+      if sTemporality not in TEMPORALITIES:
+         raise ValueError(f"Invalid temporality '{sTemporality}'; expected one of: {', '.join(TEMPORALITIES)}")
+      self.__sUrl          = sEndpoint.rstrip('/') + "/v1/metrics"
+      self.__fInterval     = float(fInterval)
+      self.__bDelta        = (sTemporality == "delta")
+      self.__nTemporality  = TEMPORALITIES[sTemporality]
+      self.__sScopeVersion = sScopeVersion
+      if dictResource is None:
+         dictResource = {'service.name': "prometheus_interface", 'host.name': socket.gethostname(), 'process.pid': str(os.getpid())}
+      self.__dictResource  = dictResource
+      self.__oLock         = threading.Lock() # protects the series
+      self.__oSendLock     = threading.Lock() # protects the retry queue
+      self.__dictSeries    = {} # (name, label values) -> series (all series known)
+      self.__dictDirty     = {} # (name, label values) -> series (updated since the last export)
+      self.__dictLast      = {} # (name, label values) -> (time, values) of the last export (delta temporality; values None: not yet exported)
+      self.__dequeQueue    = collections.deque(maxlen=int(nMaxQueue))
+      self.__nDropped      = 0
+      self.__nSent         = 0
+      self.__nStartTime    = time.time_ns()
+      self.__oStop         = threading.Event()
+      self.__oThread       = threading.Thread(target=self.__run, name="prometheus_interface_otlp", daemon=True)
+      self.__oThread.start()
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __run(self):
+      while not self.__oStop.wait(self.__fInterval):
+         self.export()
+
+   def __get_attributes(self, oSeries, tupleLabelValues):
+      return [key_value(sLabelName, sLabelValue) for sLabelName, sLabelValue in zip(oSeries._labelnames, tupleLabelValues)]
+
+   def __get_values(self, oSeries):
+      """Returns the current values of a counter, summary or histogram series as tuple (histograms: count per bucket and sum)
+      """
+      sType = oSeries._type
+      if sType == "counter":
+         return (oSeries._value.get(),)
+      if sType == "summary":
+         return (oSeries._count.get(), oSeries._sum.get())
+      if sType == "histogram":
+         return tuple(oBucket.get() for oBucket in oSeries._buckets) + (oSeries._sum.get(),)
+      return None
+
+   def __create_data_point(self, sType, oSeries, tupleLabelValues, tupleValues, nStartTime, nTime):
+      """Returns the data point message(s) of a single series
+      """
+      listAttributes = self.__get_attributes(oSeries, tupleLabelValues)
+      if sType == "counter":
+         oPoint = CProtobufWriter().fixed64(2, nStartTime).fixed64(3, nTime).double(4, tupleValues[0])
+         for oAttribute in listAttributes:
+            oPoint.message(7, oAttribute)
+         return [oPoint]
+      if sType == "summary":
+         oPoint = CProtobufWriter().fixed64(2, nStartTime).fixed64(3, nTime).fixed64(4, tupleValues[0]).double(5, tupleValues[1])
+         for oAttribute in listAttributes:
+            oPoint.message(7, oAttribute)
+         return [oPoint]
+      if sType == "histogram":
+         listBucketCounts = tupleValues[:-1]
+         oPoint = CProtobufWriter().fixed64(2, nStartTime).fixed64(3, nTime).fixed64(4, sum(listBucketCounts)).double(5, tupleValues[-1])
+         oPoint.packed_fixed64(6, listBucketCounts).packed_double(7, oSeries._upper_bounds[:-1]) # without +Inf
+         for oAttribute in listAttributes:
+            oPoint.message(9, oAttribute)
+         return [oPoint]
+      # gauge, info, enum: one gauge data point per sample
+      listPoints = []
+      for oSample in oSeries._samples():
+         if oSample.name == "_created":
+            continue
+         oPoint = CProtobufWriter().fixed64(3, nTime).double(4, oSample.value)
+         for oAttribute in listAttributes:
+            oPoint.message(7, oAttribute)
+         for sLabelName, sLabelValue in oSample.labels.items():
+            oPoint.message(7, key_value(sLabelName, sLabelValue))
+         listPoints.append(oPoint)
+      return listPoints
+
+   def __create_request(self):
+      """Returns the ExportMetricsServiceRequest with all series to be exported (or None, in case of nothing to export)
+      """
+      nTime = time.time_ns()
+      with self.__oLock:
+         if self.__bDelta is True:
+            dictSeries = self.__dictDirty
+         else:
+            dictSeries = dict(self.__dictSeries)
+         self.__dictDirty = {}
+      if len(dictSeries) == 0:
+         return None
+
+      # -- data points per metric
+      dictMetrics = {} # name -> (type, description, list of data points)
+      for (sName, tupleLabelValues), oSeries in dictSeries.items():
+         sType = oSeries._type
+         tupleValues = self.__get_values(oSeries)
+         nStartTime = self.__nStartTime
+         if ( (self.__bDelta is True) and (tupleValues is not None) and (sType != "summary") ):
+            # the delta covers the time since the last export of this series (or since its first update)
+            nStartTime, tupleLast = self.__dictLast.get((sName, tupleLabelValues), (self.__nStartTime, None))
+            self.__dictLast[(sName, tupleLabelValues)] = (nTime, tupleValues)
+            if tupleLast is not None:
+               tupleDelta = tuple(fValue - fLast for fValue, fLast in zip(tupleValues, tupleLast))
+               if min(tupleDelta) < 0:
+                  tupleDelta = tupleValues # series has been removed and created again
+               tupleValues = tupleDelta
+         if sName not in dictMetrics:
+            dictMetrics[sName] = (sType, oSeries._documentation, [])
+         dictMetrics[sName][2].extend(self.__create_data_point(sType, oSeries, tupleLabelValues, tupleValues, nStartTime, nTime))
+
+      # -- metrics
+      oScopeMetrics = CProtobufWriter().message(1, CProtobufWriter().string(1, SCOPE_NAME).string(2, self.__sScopeVersion))
+      for sName, (sType, sDescription, listPoints) in dictMetrics.items():
+         oData = CProtobufWriter()
+         for oPoint in listPoints:
+            oData.message(1, oPoint)
+         oMetric = CProtobufWriter().string(1, sName).string(2, sDescription)
+         if sType == "counter":
+            oData.varint(2, self.__nTemporality).boolean(3, True)
+            oMetric.message(7, oData)
+         elif sType == "histogram":
+            oData.varint(2, self.__nTemporality)
+            oMetric.message(9, oData)
+         elif sType == "summary":
+            oMetric.message(11, oData)
+         else:
+            oMetric.message(5, oData)
+         oScopeMetrics.message(2, oMetric)
+      oResource = CProtobufWriter()
+      for sKey, sValue in self.__dictResource.items():
+         oResource.message(1, key_value(sKey, sValue))
+      oResourceMetrics = CProtobufWriter().message(1, oResource).message(2, oScopeMetrics)
+      return CProtobufWriter().message(1, oResourceMetrics).get_bytes()
+
+   def __send(self, bytesPayload):
+      """Sends a single payload; returns True in case of success or a non retryable error
+      """
+      from urllib.request import Request, urlopen
+      from urllib.error import HTTPError, URLError
+      oRequest = Request(self.__sUrl, data=bytesPayload, method="POST", headers={'Content-Type': "application/x-protobuf"})
+      try:
+         with urlopen(oRequest, timeout=REQUEST_TIMEOUT) as oResponse:
+            oResponse.read()
+      except HTTPError as ex:
+         if ( (ex.code == 429) or (ex.code >= 500) ):
+            return False
+         self.__nDropped += 1 # not retryable (e.g. invalid payload)
+         return True
+      except (URLError, OSError):
+         return False
+      self.__nSent += 1
+      return True
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def notify(self, sName, tupleLabelValues, oSeries):
+      """Marks a series as updated
+      """
+      with self.__oLock:
+         self.__dictSeries[(sName, tupleLabelValues)] = oSeries
+         self.__dictDirty[(sName, tupleLabelValues)] = oSeries
+         if ( (self.__bDelta is True) and ((sName, tupleLabelValues) not in self.__dictLast) ):
+            self.__dictLast[(sName, tupleLabelValues)] = (time.time_ns(), None) # start of the first delta
+
+   def forget(self, sName, tupleLabelValues=None):
+      """Removes a series (or all series of a metric, in case of tupleLabelValues is None) from the export
+      """
+      with self.__oLock:
+         for dictSeries in (self.__dictSeries, self.__dictDirty, self.__dictLast):
+            for tupleKey in [tupleKey for tupleKey in list(dictSeries) if ( (tupleKey[0] == sName) and (tupleLabelValues in (None, tupleKey[1])) )]:
+               dictSeries.pop(tupleKey, None)
+
+   def export(self):
+      """Creates the next payload and sends all queued payloads; returns True in case of all payloads are sent
+      """
+      with self.__oSendLock:
+         bytesPayload = self.__create_request()
+         if bytesPayload is not None:
+            if len(self.__dequeQueue) == self.__dequeQueue.maxlen:
+               self.__nDropped += 1
+            self.__dequeQueue.append(bytesPayload)
+         while len(self.__dequeQueue) > 0:
+            if not self.__send(self.__dequeQueue[0]):
+               return False # collector not reachable; retried with the next interval
+            self.__dequeQueue.popleft()
+      return True
+
+   def get_statistics(self):
+      """Returns the number of sent, queued and dropped payloads
+      """
+      with self.__oSendLock:
+         return {'sent': self.__nSent, 'queued': len(self.__dequeQueue), 'dropped': self.__nDropped}
+
+   def close(self):
+      """Sends the last payload
+      """
+      self.__oStop.set()
+      self.__oThread.join()
+      self.export()
+
+# eof class COtlpExporter():
@@ -0,0 +1,551 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CPromQL.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Instant queries (subset of PromQL) over the live series of prometheus_interface, without Prometheus server
+#   (see keyword 'query_metrics'). Supported:
+#
+#   * selectors with label matchers:            num_passed_total{testbench="Testbench 1", testname=~"Test_.*"}
+#                                               {__name__=~"num_.*"}
+#   * aggregations (optionally by / without):   sum, avg, min, max, count, topk, bottomk
+#                                               sum by (testbench) (num_passed)
+#   * quantiles of histograms:                  histogram_quantile(0.9, sum by (le) (latency_bucket))
+#   * number literals
+#
+#   The sample names are the names provided to Prometheus ('<counter>_total', '<histogram>_bucket', ...);
+#   the name of a counter without suffix is accepted as well.
+#
+# - The series are selected by an inverted label index (per metric, label and label value: the set of series),
+#   maintained with the creation and removal of series. Equality matchers are a single lookup; regular expressions
+#   (compiled once) are applied to the distinct label values only, not to every series. The values are read from
+#   the series at query time. Parsed queries are cached.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import re, math, heapq, operator, threading
+
+AGGREGATIONS = ("sum", "avg", "min", "max", "count", "topk", "bottomk")
+
+MAX_CACHED_QUERIES = 1024
+
+# sample name suffixes per metric type (counter: the name without suffix is accepted too)
+SUFFIXES = {'counter': ("_total", ""), 'gauge': ("",), 'summary': ("_count", "_sum"), 'histogram': ("_bucket", "_count", "_sum"),
+            'stateset': ("",), 'info': ("_info",)}
+
+TOKENS = re.compile(r"""\s*(?:(?P<number>[-+]?(?:\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?|(?:[iI]nf|NaN)(?![a-zA-Z0-9_:])))
+                          |(?P<identifier>[a-zA-Z_:][a-zA-Z0-9_:]*)
+                          |(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+                          |(?P<operator>=~|!~|!=|=)
+                          |(?P<punctuation>[(){},]))""", re.VERBOSE)
+
+# --------------------------------------------------------------------------------------------------------------
+
+def tokenize(sQuery):
+   """Splits a query into a list of (kind, text)
+   """
+   listTokens = []
+   nPosition = 0
+   sQuery = sQuery.rstrip()
+   while nPosition < len(sQuery):
+      oMatch = TOKENS.match(sQuery, nPosition)
+      if ( (oMatch is None) or (oMatch.end() == nPosition) ):
+         raise ValueError(f"Syntax error in query at position {nPosition}: '{sQuery[nPosition:nPosition + 20]}'")
+      sKind = oMatch.lastgroup
+      listTokens.append((sKind, oMatch.group(sKind)))
+      nPosition = oMatch.end()
+   return listTokens
+
+def unquote(sString):
+   return re.sub(r"\\(.)", lambda oMatch: {'n': "\n", 't': "\t"}.get(oMatch.group(1), oMatch.group(1)), sString[1:-1])
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CQueryParser():
+   """Recursive descent parser of the supported PromQL subset; returns the syntax tree as nested tuples:
+
+   * ('number', value)
+   * ('selector', name or None, tuple of (label name, operator, value, compiled regular expression or None))
+   * ('aggregate', operation, parameter or None, without (bool), tuple of label names or None, expression)
+   * ('histogram_quantile', quantile, expression)
+   """
+
+   def __init__(self, sQuery=None):
+      if sQuery is None:
+         raise Exception("sQuery is None")
+      self.__sQuery     = sQuery
+      self.__listTokens = tokenize(sQuery)
+      self.__nPosition  = 0
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __peek(self, nOffset=0):
+      nIndex = self.__nPosition + nOffset
+      return self.__listTokens[nIndex] if nIndex < len(self.__listTokens) else (None, None)
+
+   def __next(self):
+      tupleToken = self.__peek()
+      if tupleToken[0] is None:
+         raise ValueError(f"Unexpected end of query '{self.__sQuery}'")
+      self.__nPosition += 1
+      return tupleToken
+
+   def __expect(self, sText):
+      sKind, sTokenText = self.__next()
+      if sTokenText != sText:
+         raise ValueError(f"Syntax error in query '{self.__sQuery}': expected '{sText}', got '{sTokenText}'")
+
+   def __parse_label_list(self):
+      self.__expect("(")
+      listLabels = []
+      while self.__peek()[1] != ")":
+         sKind, sText = self.__next()
+         if sKind != "identifier":
+            raise ValueError(f"Syntax error in query '{self.__sQuery}': label name expected, got '{sText}'")
+         listLabels.append(sText)
+         if self.__peek()[1] == ",":
+            self.__next()
+      self.__expect(")")
+      return tuple(listLabels)
+
+   def __parse_matchers(self):
+      self.__expect("{")
+      listMatchers = []
+      while self.__peek()[1] != "}":
+         sKind, sLabelName = self.__next()
+         if sKind != "identifier":
+            raise ValueError(f"Syntax error in query '{self.__sQuery}': label name expected, got '{sLabelName}'")
+         sKind, sOperator = self.__next()
+         if sKind != "operator":
+            raise ValueError(f"Syntax error in query '{self.__sQuery}': label matcher operator expected, got '{sOperator}'")
+         sKind, sValue = self.__next()
+         if sKind != "string":
+            raise ValueError(f"Syntax error in query '{self.__sQuery}': quoted label value expected, got '{sValue}'")
+         sValue = unquote(sValue)
+         oRegex = re.compile(sValue) if sOperator in ("=~", "!~") else None
+         listMatchers.append((sLabelName, sOperator, sValue, oRegex))
+         if self.__peek()[1] == ",":
+            self.__next()
+      self.__expect("}")
+      return tuple(listMatchers)
+
+   def __parse_expression(self):
+      sKind, sText = self.__peek()
+      if sKind == "number":
+         self.__next()
+         return ('number', float(sText))
+      if sText == "{":
+         return ('selector', None, self.__parse_matchers())
+      if sKind != "identifier":
+         raise ValueError(f"Syntax error in query '{self.__sQuery}': unexpected '{sText}'")
+      if ( (sText in AGGREGATIONS) and (self.__peek(1)[1] in ("(", "by", "without")) ):
+         return self.__parse_aggregation()
+      if ( (sText == "histogram_quantile") and (self.__peek(1)[1] == "(") ):
+         self.__next()
+         self.__expect("(")
+         oQuantile = self.__parse_expression()
+         if oQuantile[0] != 'number':
+            raise ValueError(f"Syntax error in query '{self.__sQuery}': histogram_quantile requires a number as first parameter")
+         self.__expect(",")
+         oExpression = self.__parse_expression()
+         self.__expect(")")
+         return ('histogram_quantile', oQuantile[1], oExpression)
+      self.__next()
+      tupleMatchers = self.__parse_matchers() if self.__peek()[1] == "{" else ()
+      return ('selector', sText, tupleMatchers)
+
+   def __parse_aggregation(self):
+      sKind, sOperation = self.__next()
+      bWithout, tupleLabels = False, None
+      if self.__peek()[1] in ("by", "without"):
+         bWithout = (self.__next()[1] == "without")
+         tupleLabels = self.__parse_label_list()
+      self.__expect("(")
+      fParameter = None
+      if sOperation in ("topk", "bottomk"):
+         oParameter = self.__parse_expression()
+         if oParameter[0] != 'number':
+            raise ValueError(f"Syntax error in query '{self.__sQuery}': {sOperation} requires a number as first parameter")
+         fParameter = oParameter[1]
+         self.__expect(",")
+      oExpression = self.__parse_expression()
+      self.__expect(")")
+      if ( (tupleLabels is None) and (self.__peek()[1] in ("by", "without")) ):
+         bWithout = (self.__next()[1] == "without")
+         tupleLabels = self.__parse_label_list()
+      return ('aggregate', sOperation, fParameter, bWithout, tupleLabels, oExpression)
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def parse(self):
+      oExpression = self.__parse_expression()
+      if self.__peek()[0] is not None:
+         raise ValueError(f"Syntax error in query '{self.__sQuery}': unexpected '{self.__peek()[1]}'")
+      return oExpression
+
+# eof class CQueryParser():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CLabelIndex():
+   """Inverted label index of all series: metric name -> label position -> label value -> set of label values tuples (series keys)
+   """
+
+   def __init__(self):
+      self.__dictPostings = {}
+      self.__oLock        = threading.Lock()
+
+   def __del__(self):
+      pass
+
+   def add(self, sName, tupleLabelValues):
+      with self.__oLock:
+         listPostings = self.__dictPostings.get(sName)
+         if listPostings is None:
+            listPostings = self.__dictPostings[sName] = [{} for sLabelValue in tupleLabelValues]
+         for dictPostings, sLabelValue in zip(listPostings, tupleLabelValues):
+            setSeries = dictPostings.get(sLabelValue)
+            if setSeries is None:
+               setSeries = dictPostings[sLabelValue] = set()
+            setSeries.add(tupleLabelValues)
+
+   def remove(self, sName, tupleLabelValues):
+      with self.__oLock:
+         listPostings = self.__dictPostings.get(sName)
+         if listPostings is None:
+            return
+         for dictPostings, sLabelValue in zip(listPostings, tupleLabelValues):
+            setSeries = dictPostings.get(sLabelValue)
+            if setSeries is not None:
+               setSeries.discard(tupleLabelValues)
+               if len(setSeries) == 0:
+                  del dictPostings[sLabelValue]
+
+   def clear(self, sName):
+      with self.__oLock:
+         self.__dictPostings.pop(sName, None)
+
+   def select(self, sName, listConditions):
+      """Returns the keys of the series of a metric fulfilling all conditions (label position, function label value -> bool, equal value or None),
+or None in case of no condition (all series)
+      """
+      if len(listConditions) == 0:
+         return None
+      with self.__oLock:
+         listPostings = self.__dictPostings.get(sName)
+         if listPostings is None:
+            return set()
+         listSets = []
+         for nLabelIndex, fnMatches, sEqual in listConditions:
+            dictPostings = listPostings[nLabelIndex]
+            if sEqual is not None:
+               setSeries = dictPostings.get(sEqual)
+               listSets.append(set(setSeries) if setSeries is not None else set())
+            else:
+               setSeries = set()
+               for sLabelValue, setValueSeries in dictPostings.items():
+                  if fnMatches(sLabelValue):
+                     setSeries.update(setValueSeries)
+               listSets.append(setSeries)
+      listSets.sort(key=len)
+      setResult = listSets[0]
+      for setSeries in listSets[1:]:
+         if len(setResult) == 0:
+            break
+         setResult = setResult & setSeries
+      return setResult
+
+# eof class CLabelIndex():
+
+# --------------------------------------------------------------------------------------------------------------
+
+def get_matcher(sOperator, sValue, oRegex):
+   """Returns a function label value -> bool of a label matcher
+   """
+   if sOperator == "=":
+      return lambda sLabelValue: sLabelValue == sValue
+   if sOperator == "!=":
+      return lambda sLabelValue: sLabelValue != sValue
+   if sOperator == "=~":
+      return lambda sLabelValue: oRegex.fullmatch(sLabelValue) is not None
+   return lambda sLabelValue: oRegex.fullmatch(sLabelValue) is None
+
+def bucket_quantile(fQuantile, listBuckets):
+   """Returns the quantile of cumulative buckets (list of (upper bound, count)), like 'histogram_quantile' of Prometheus
+   """
+   if math.isnan(fQuantile):
+      return math.nan
+   if fQuantile < 0:
+      return -math.inf
+   if fQuantile > 1:
+      return math.inf
+   listBuckets = sorted(listBuckets)
+   if ( (len(listBuckets) < 2) or (listBuckets[-1][0] != math.inf) ):
+      return math.nan
+   # counts must be monotonic (may be violated by concurrent updates)
+   listCounts = []
+   fMax = 0.0
+   for fUpperBound, fCount in listBuckets:
+      fMax = max(fMax, fCount)
+      listCounts.append(fMax)
+   fObservations = listCounts[-1]
+   if fObservations == 0:
+      return math.nan
+   fRank = fQuantile * fObservations
+   nBucket = next(nIndex for nIndex, fCount in enumerate(listCounts) if fCount >= fRank)
+   if nBucket == len(listBuckets) - 1:
+      return listBuckets[-2][0]
+   if ( (nBucket == 0) and (listBuckets[0][0] <= 0) ):
+      return listBuckets[0][0]
+   fStart, fEnd, fCount = 0.0, listBuckets[nBucket][0], listCounts[nBucket]
+   if nBucket > 0:
+      fStart = listBuckets[nBucket - 1][0]
+      fCount -= listCounts[nBucket - 1]
+      fRank  -= listCounts[nBucket - 1]
+   return fStart + (fEnd - fStart) * (fRank / fCount)
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CQueryEngine():
+   """Evaluates queries over the series of prometheus_interface. A vector is a list of (sample name or None, label names, label values, value).
+   """
+
+   def __init__(self, oIndex=None):
+      if oIndex is None:
+         raise Exception("oIndex is None")
+      self.__oIndex       = oIndex
+      self.__dictQueries  = {} # query -> syntax tree
+      self.__oLock        = threading.Lock()
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __parse(self, sQuery):
+      oTree = self.__dictQueries.get(sQuery)
+      if oTree is None:
+         oTree = CQueryParser(sQuery).parse()
+         with self.__oLock:
+            if len(self.__dictQueries) >= MAX_CACHED_QUERIES:
+               self.__dictQueries.clear()
+            self.__dictQueries[sQuery] = oTree
+      return oTree
+
+   def __resolve_names(self, sName, tupleMatchers, dictMetrics):
+      """Returns the metrics and suffixes selected by a sample name (or by the matchers of '__name__') as list of (metric name, suffix)
+      """
+      listNameMatchers = [get_matcher(sOperator, sValue, oRegex) for sLabelName, sOperator, sValue, oRegex in tupleMatchers if sLabelName == "__name__"]
+      listSelected = []
+      if ( (sName is not None) and (len(listNameMatchers) == 0) ):
+         for sSuffix in ("", "_total", "_count", "_sum", "_bucket", "_info"):
+            if ( (sSuffix == "") or sName.endswith(sSuffix) ):
+               sMetric = sName[:len(sName) - len(sSuffix)]
+               if ( (sMetric in dictMetrics) and (sSuffix in SUFFIXES.get(dictMetrics[sMetric][0], ())) ):
+                  listSelected.append((sMetric, "_total" if sSuffix == "" and dictMetrics[sMetric][0] == "counter" else sSuffix))
+         return listSelected
+      for sMetric, (sType, tupleLabelNames, dictSeries, listStates) in dictMetrics.items():
+         for sSuffix in SUFFIXES.get(sType, ()):
+            if ( (sType == "counter") and (sSuffix == "") ):
+               continue
+            sSampleName = sMetric + sSuffix
+            if ( (sName is not None) and (sSampleName != sName) ):
+               continue
+            if all(fnMatches(sSampleName) for fnMatches in listNameMatchers):
+               listSelected.append((sMetric, sSuffix))
+      return listSelected
+
+   def __get_samples(self, sType, sSuffix, sMetric, oSeries, listStates):
+      """Returns the samples of a series as list of (additional label names, additional label values, value)
+      """
+      if sType in ("counter", "gauge"):
+         return [((), (), oSeries._value.get())]
+      if sType == "summary":
+         return [((), (), (oSeries._count if sSuffix == "_count" else oSeries._sum).get())]
+      if sType == "histogram":
+         listCounts = [oBucket.get() for oBucket in oSeries._buckets]
+         if sSuffix == "_sum":
+            return [((), (), oSeries._sum.get())]
+         if sSuffix == "_count":
+            return [((), (), float(sum(listCounts)))]
+         from prometheus_client.utils import floatToGoString
+         listSamples = []
+         fCumulated = 0.0
+         for fUpperBound, fCount in zip(oSeries._upper_bounds, listCounts):
+            fCumulated += fCount
+            listSamples.append((("le",), (floatToGoString(fUpperBound),), fCumulated))
+         return listSamples
+      if sType == "stateset":
+         nStateIndex = oSeries._value
+         return [((sMetric,), (sState,), 1.0 if nIndex == nStateIndex else 0.0) for nIndex, sState in enumerate(listStates)]
+      if sType == "info":
+         dictInfo = oSeries._value
+         return [(tuple(dictInfo), tuple(dictInfo.values()), 1.0)]
+      return []
+
+   def __select(self, sName, tupleMatchers, dictMetrics):
+      listVector = []
+      for sMetric, sSuffix in self.__resolve_names(sName, tupleMatchers, dictMetrics):
+         sType, tupleLabelNames, dictSeries, listStates = dictMetrics[sMetric]
+         listConditions = []   # matchers of the labels of the metric (inverted index)
+         listPostFilters = []  # matchers of other labels (e.g. 'le'), applied to the samples
+         bEmpty = False
+         for sLabelName, sOperator, sValue, oRegex in tupleMatchers:
+            if sLabelName == "__name__":
+               continue
+            fnMatches = get_matcher(sOperator, sValue, oRegex)
+            if sLabelName in tupleLabelNames:
+               listConditions.append((tupleLabelNames.index(sLabelName), fnMatches, sValue if sOperator == "=" else None))
+            else:
+               listPostFilters.append((sLabelName, fnMatches))
+         setKeys = self.__oIndex.select(sMetric, listConditions)
+         if setKeys is None:
+            listSeries = list(dictSeries.items())
+         else:
+            listSeries = [(tupleKey, dictSeries[tupleKey]) for tupleKey in setKeys if tupleKey in dictSeries]
+         sSampleName = sMetric + sSuffix
+         if ( (sType in ("counter", "gauge")) and (len(listPostFilters) == 0) ):
+            # one sample per series without additional labels (fast path for large vectors)
+            listVector.extend([(sSampleName, tupleLabelNames, tupleLabelValues, oSeries._value.get()) for tupleLabelValues, oSeries in listSeries])
+            continue
+         for tupleLabelValues, oSeries in listSeries:
+            for tupleExtraNames, tupleExtraValues, fValue in self.__get_samples(sType, sSuffix, sMetric, oSeries, listStates):
+               tupleNames  = tupleLabelNames + tupleExtraNames
+               tupleValues = tupleLabelValues + tupleExtraValues
+               if len(listPostFilters) > 0:
+                  dictLabels = dict(zip(tupleNames, tupleValues))
+                  if not all(fnMatches(dictLabels.get(sLabelName, "")) for sLabelName, fnMatches in listPostFilters):
+                     continue
+               listVector.append((sSampleName, tupleNames, tupleValues, fValue))
+      return listVector
+
+   def __get_group(self, tupleNames, tupleValues, bWithout, tupleLabels):
+      """Returns the grouping labels (names, values) of an element of a vector
+      """
+      if tupleLabels is None:
+         return (), ()
+      if bWithout is False:
+         dictLabels = dict(zip(tupleNames, tupleValues))
+         return tupleLabels, tuple(dictLabels.get(sLabelName, "") for sLabelName in tupleLabels)
+      listNames, listValues = [], []
+      for sLabelName, sLabelValue in zip(tupleNames, tupleValues):
+         if sLabelName not in tupleLabels:
+            listNames.append(sLabelName)
+            listValues.append(sLabelValue)
+      return tuple(listNames), tuple(listValues)
+
+   def __get_group_function(self, tupleNames, tupleLabels):
+      """Returns a function returning the values of the grouping labels (by) from the label values of an element
+      """
+      if all(sLabelName in tupleNames for sLabelName in tupleLabels):
+         listPositions = [tupleNames.index(sLabelName) for sLabelName in tupleLabels]
+         if len(listPositions) == 1:
+            nPosition = listPositions[0]
+            return lambda tupleValues: (tupleValues[nPosition],)
+         return operator.itemgetter(*listPositions)
+      listPositions = [tupleNames.index(sLabelName) if sLabelName in tupleNames else None for sLabelName in tupleLabels]
+      return lambda tupleValues: tuple(tupleValues[nPosition] if nPosition is not None else "" for nPosition in listPositions)
+
+   def __aggregate(self, sOperation, fParameter, bWithout, tupleLabels, listVector):
+      dictGroups = {}
+      dictGroupKeys = {} # label names of the elements -> function returning the values of the grouping labels (by)
+      for oElement in listVector:
+         sSampleName, tupleNames, tupleValues, fValue = oElement
+         if ( (bWithout is False) and (tupleLabels is not None) ):
+            fnGroup = dictGroupKeys.get(tupleNames)
+            if fnGroup is None:
+               fnGroup = dictGroupKeys[tupleNames] = self.__get_group_function(tupleNames, tupleLabels)
+            tupleGroup = (tupleLabels, fnGroup(tupleValues))
+         else:
+            tupleGroup = self.__get_group(tupleNames, tupleValues, bWithout, tupleLabels)
+         listGroup = dictGroups.get(tupleGroup)
+         if listGroup is None:
+            listGroup = dictGroups[tupleGroup] = []
+         listGroup.append(oElement)
+      listResult = []
+      for (tupleGroupNames, tupleGroupValues), listGroup in dictGroups.items():
+         if sOperation in ("topk", "bottomk"):
+            fnSelect = heapq.nlargest if sOperation == "topk" else heapq.nsmallest
+            listResult.extend(fnSelect(int(fParameter), listGroup, key=lambda oElement: oElement[3]))
+            continue
+         listValues = [oElement[3] for oElement in listGroup]
+         if sOperation == "sum":
+            fValue = math.fsum(listValues)
+         elif sOperation == "avg":
+            fValue = math.fsum(listValues) / len(listValues)
+         elif sOperation == "min":
+            fValue = min(listValues)
+         elif sOperation == "max":
+            fValue = max(listValues)
+         else:
+            fValue = float(len(listValues))
+         listResult.append((None, tupleGroupNames, tupleGroupValues, fValue))
+      return listResult
+
+   def __histogram_quantile(self, fQuantile, listVector):
+      dictHistograms = {}
+      for sSampleName, tupleNames, tupleValues, fValue in listVector:
+         if "le" not in tupleNames:
+            continue
+         tupleGroup = self.__get_group(tupleNames, tupleValues, True, ("le",))
+         fUpperBound = float(tupleValues[tupleNames.index("le")])
+         dictHistograms.setdefault(tupleGroup, []).append((fUpperBound, fValue))
+      return [(None, tupleGroupNames, tupleGroupValues, bucket_quantile(fQuantile, listBuckets))
+              for (tupleGroupNames, tupleGroupValues), listBuckets in dictHistograms.items()]
+
+   def __evaluate(self, oTree, dictMetrics):
+      sNode = oTree[0]
+      if sNode == 'number':
+         return [(None, (), (), oTree[1])]
+      if sNode == 'selector':
+         return self.__select(oTree[1], oTree[2], dictMetrics)
+      if sNode == 'aggregate':
+         sNode, sOperation, fParameter, bWithout, tupleLabels, oExpression = oTree
+         return self.__aggregate(sOperation, fParameter, bWithout, tupleLabels, self.__evaluate(oExpression, dictMetrics))
+      return self.__histogram_quantile(oTree[1], self.__evaluate(oTree[2], dictMetrics))
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def query(self, sQuery, dictMetrics):
+      """Evaluates a query; dictMetrics: metric name -> (type, label names, dictionary of series: label values -> series, states (enums) or None).
+Returns a list of dictionaries (keys 'metric': labels including '__name__' (selectors only), 'value'), sorted by labels (topk, bottomk: by value).
+      """
+      oTree = self.__parse(sQuery)
+      listVector = self.__evaluate(oTree, dictMetrics)
+      listResult = []
+      for sSampleName, tupleNames, tupleValues, fValue in listVector:
+         dictLabels = {}
+         if sSampleName is not None:
+            dictLabels['__name__'] = sSampleName
+         dictLabels.update(zip(tupleNames, tupleValues))
+         listResult.append({'metric': dictLabels, 'value': fValue})
+      if ( (oTree[0] != 'aggregate') or (oTree[1] not in ("topk", "bottomk")) ):
+         listResult.sort(key=lambda dictElement: sorted(dictElement['metric'].items()))
+      return listResult
+
+# eof class CQueryEngine():
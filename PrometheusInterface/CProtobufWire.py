@@ -0,0 +1,168 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CProtobufWire.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Encode (and decode) messages in the Protocol Buffers wire format, without dependency to the 'protobuf' package
+#   and without generated code. Only the few field types required for metric payloads are supported.
+#
+# - CProtobufWriter appends fields to a byte buffer; embedded messages are written by separate writers.
+#   Fields with default values (0, empty string) are written anyway; receivers handle them like missing fields.
+#
+# - 'decode_fields' returns the fields of a message as list of (field number, wire type, value), e.g. for tests.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import struct
+
+WIRETYPE_VARINT  = 0
+WIRETYPE_FIXED64 = 1
+WIRETYPE_LENGTH  = 2
+WIRETYPE_FIXED32 = 5
+
+# --------------------------------------------------------------------------------------------------------------
+
+def encode_varint(nValue):
+   """Returns the varint encoding of a non negative integer (negative integers are encoded with 10 bytes, like int64)
+   """
+   if nValue < 0:
+      nValue = nValue + (1 << 64)
+   listBytes = []
+   while True:
+      nByte = nValue & 0x7F
+      nValue = nValue >> 7
+      if nValue == 0:
+         listBytes.append(nByte)
+         return bytes(listBytes)
+      listBytes.append(nByte | 0x80)
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CProtobufWriter():
+   """Writes the fields of a single message
+   """
+
+   def __init__(self):
+      self.__arBuffer = bytearray()
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __tag(self, nField, nWireType):
+      self.__arBuffer += encode_varint((nField << 3) | nWireType)
+
+   def varint(self, nField, nValue):
+      self.__tag(nField, WIRETYPE_VARINT)
+      self.__arBuffer += encode_varint(int(nValue))
+      return self
+
+   def boolean(self, nField, bValue):
+      return self.varint(nField, 1 if bValue else 0)
+
+   def fixed64(self, nField, nValue):
+      self.__tag(nField, WIRETYPE_FIXED64)
+      self.__arBuffer += struct.pack('<Q', int(nValue))
+      return self
+
+   def double(self, nField, fValue):
+      self.__tag(nField, WIRETYPE_FIXED64)
+      self.__arBuffer += struct.pack('<d', float(fValue))
+      return self
+
+   def bytes(self, nField, bytesValue):
+      self.__tag(nField, WIRETYPE_LENGTH)
+      self.__arBuffer += encode_varint(len(bytesValue))
+      self.__arBuffer += bytesValue
+      return self
+
+   def string(self, nField, sValue):
+      return self.bytes(nField, str(sValue).encode("utf-8"))
+
+   def message(self, nField, oWriter):
+      """Writes an embedded message
+      """
+      return self.bytes(nField, oWriter.get_bytes())
+
+   def packed_fixed64(self, nField, listValues):
+      return self.bytes(nField, struct.pack(f'<{len(listValues)}Q', *[int(nValue) for nValue in listValues]))
+
+   def packed_double(self, nField, listValues):
+      return self.bytes(nField, struct.pack(f'<{len(listValues)}d', *[float(fValue) for fValue in listValues]))
+
+   def raw(self, bytesFields):
+      """Appends fields encoded before (e.g. cached by the caller)
+      """
+      self.__arBuffer += bytesFields
+      return self
+
+   def get_bytes(self):
+      return bytes(self.__arBuffer)
+
+   def clear(self):
+      """Empties the buffer, the allocated memory is kept (reuse of the writer)
+      """
+      del self.__arBuffer[:]
+
+# eof class CProtobufWriter():
+
+# --------------------------------------------------------------------------------------------------------------
+
+def decode_varint(bytesData, nPosition):
+   """Returns the decoded varint and the position behind it
+   """
+   nValue = 0
+   nShift = 0
+   while True:
+      nByte = bytesData[nPosition]
+      nPosition = nPosition + 1
+      nValue = nValue | ((nByte & 0x7F) << nShift)
+      if nByte < 0x80:
+         return nValue, nPosition
+      nShift = nShift + 7
+
+def decode_fields(bytesData):
+   """Returns all fields of a message as list of (field number, wire type, value).
+Values of length delimited fields are returned as bytes (embedded messages can be decoded again), fixed64 values as 8 bytes.
+   """
+   listFields = []
+   nPosition = 0
+   while nPosition < len(bytesData):
+      nTag, nPosition = decode_varint(bytesData, nPosition)
+      nField, nWireType = nTag >> 3, nTag & 0x07
+      if nWireType == WIRETYPE_VARINT:
+         value, nPosition = decode_varint(bytesData, nPosition)
+      elif nWireType == WIRETYPE_FIXED64:
+         value, nPosition = bytes(bytesData[nPosition:nPosition + 8]), nPosition + 8
+      elif nWireType == WIRETYPE_LENGTH:
+         nLength, nPosition = decode_varint(bytesData, nPosition)
+         value, nPosition = bytes(bytesData[nPosition:nPosition + nLength]), nPosition + nLength
+      elif nWireType == WIRETYPE_FIXED32:
+         value, nPosition = bytes(bytesData[nPosition:nPosition + 4]), nPosition + 4
+      else:
+         raise ValueError(f"Unsupported wire type {nWireType} of field {nField}")
+      listFields.append((nField, nWireType, value))
+   return listFields
@@ -0,0 +1,205 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CSelfInstrumentation.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Metrics about prometheus_interface itself, to plan the capacity of exporters on loaded benches:
+#
+#   * prometheus_interface_keyword_duration_seconds{keyword}: duration of the update keywords (histogram)
+#   * prometheus_interface_scrape_duration_seconds: duration of the collection and encoding of all metrics per scrape (histogram)
+#   * prometheus_interface_series{metric, type}: number of series per metric
+#   * prometheus_interface_series_bytes{metric}: approximate memory held by the series of a metric
+#
+# - The keyword histograms are preallocated lists of bucket counts, fed with durations in ns (time.perf_counter_ns).
+#   Every thread updates its own lists without any lock (like CShardedValue); the lists of all threads are merged
+#   at scrape time. The lists of a finished thread are merged into the base lists, therefore the number of shards
+#   does not grow with the number of threads started over time.
+#
+# - The number of series and the memory are computed at scrape time; the memory is estimated from the size of
+#   the first series of a metric, multiplied by the number of series.
+#
+# - This class is a collector of the Prometheus Python client library.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import sys, time, bisect, weakref, threading
+
+try:
+   from .CShardedValue import CShardOwner
+except ImportError:
+   from CShardedValue import CShardOwner
+
+PREFIX = "prometheus_interface"
+
+# upper bounds of the duration histograms (ns)
+KEYWORD_BUCKETS_NS = (1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000, 10000000, float("inf"))
+SCRAPE_BUCKETS_NS  = (100000, 500000, 1000000, 5000000, 10000000, 50000000, 100000000, 500000000, 1000000000, float("inf"))
+
+# update keywords measured
+KEYWORDS = ("set_info", "inc_counter", "set_gauge", "inc_gauge", "dec_gauge", "observe_summary", "observe_summary_many",
+            "observe_histogram", "observe_histogram_many", "set_enum")
+
+# --------------------------------------------------------------------------------------------------------------
+
+def get_series_size(oSeries, tupleLabelValues):
+   """Returns the approximate memory (bytes) held by a single series: the series object, its attributes
+(values, locks, buckets; one level deep) and its label values
+   """
+   nSize = sys.getsizeof(oSeries) + sys.getsizeof(tupleLabelValues) + sum(sys.getsizeof(sLabelValue) for sLabelValue in tupleLabelValues)
+   dictAttributes = getattr(oSeries, '__dict__', {})
+   nSize += sys.getsizeof(dictAttributes)
+   for sAttribute, oValue in dictAttributes.items():
+      if sAttribute in ("_metrics", "_labelnames", "_name", "_documentation", "_kwargs"):
+         continue # shared with the parent metric (or the children, counted separately)
+      nSize += sys.getsizeof(oValue)
+      if isinstance(oValue, list):
+         nSize += sum(sys.getsizeof(oItem) for oItem in oValue)
+   return nSize
+
+def get_buckets(tupleUpperBounds, listCounts):
+   """Returns the cumulative buckets (upper bound in seconds as string, count) and the sum in seconds
+of a histogram given as list of counts per bucket (in ns) and the sum (last element)
+   """
+   listBuckets = []
+   nCumulated = 0
+   for fUpperBound, nCount in zip(tupleUpperBounds, listCounts):
+      nCumulated += nCount
+      listBuckets.append(("+Inf" if fUpperBound == float("inf") else str(fUpperBound / 1e9), nCumulated))
+   return listBuckets, listCounts[-1] / 1e9
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CSelfInstrumentation():
+   """Collector of the metrics about prometheus_interface itself
+   """
+
+   def __init__(self, fnGetMetrics=None):
+      if fnGetMetrics is None:
+         raise Exception("fnGetMetrics is None")
+      self.__fnGetMetrics = fnGetMetrics # returns a list of (name, type, dictionary of series: label values -> series)
+      # keyword histograms: one shard per thread (like CShardedValue), keyword -> counts per bucket + sum (ns)
+      self.__oLocal       = threading.local()
+      self.__listShards   = []
+      self.__dictBase     = self.__create_shard() # merged shards of finished threads
+      self.__oLock        = threading.Lock() # protects the list of shards, the base shard and the scrape histogram
+      self.__listScrapes  = [0] * (len(SCRAPE_BUCKETS_NS) + 1)
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __create_shard(self):
+      return {sKeyword: [0] * (len(KEYWORD_BUCKETS_NS) + 1) for sKeyword in KEYWORDS}
+
+   def __new_shard(self):
+      dictShard = self.__create_shard()
+      with self.__oLock:
+         self.__listShards.append(dictShard)
+      oOwner = CShardOwner(dictShard)
+      weakref.finalize(oOwner, CSelfInstrumentation._merge_shard, weakref.ref(self), dictShard)
+      self.__oLocal.owner = oOwner
+      return dictShard
+
+   @staticmethod
+   def _merge_shard(oInstrumentationRef, dictShard):
+      """Merges the shard of a finished thread into the base shard
+      """
+      oInstrumentation = oInstrumentationRef()
+      if oInstrumentation is not None:
+         oInstrumentation.__merge(dictShard)
+
+   def __merge(self, dictShard):
+      with self.__oLock:
+         for sKeyword, listCounts in dictShard.items():
+            listBase = self.__dictBase[sKeyword]
+            for nIndex, nCount in enumerate(listCounts):
+               listBase[nIndex] += nCount
+         self.__listShards.remove(dictShard)
+
+   def observe_keyword(self, sKeyword, nStartTime):
+      """Observes the duration of a keyword started at nStartTime (time.perf_counter_ns)
+      """
+      nDuration = time.perf_counter_ns() - nStartTime
+      try:
+         dictShard = self.__oLocal.owner.oShard
+      except AttributeError:
+         dictShard = self.__new_shard()
+      # only the owning thread writes to this shard, therefore no lock is required
+      listCounts = dictShard[sKeyword]
+      listCounts[bisect.bisect_left(KEYWORD_BUCKETS_NS, nDuration)] += 1
+      listCounts[-1] += nDuration
+
+   def observe_scrape(self, nDuration):
+      """Observes the duration of a scrape (ns)
+      """
+      with self.__oLock:
+         self.__listScrapes[bisect.bisect_left(SCRAPE_BUCKETS_NS, nDuration)] += 1
+         self.__listScrapes[-1] += nDuration
+
+   def get_keyword_counts(self, sKeyword):
+      """Returns the counts per bucket and the sum (ns, last element) of a keyword, merged over all threads
+      """
+      with self.__oLock:
+         listMerged = list(self.__dictBase[sKeyword])
+         for dictShard in self.__listShards:
+            for nIndex, nCount in enumerate(dictShard[sKeyword]):
+               listMerged[nIndex] += nCount
+      return listMerged
+
+   def get_shard_count(self):
+      return len(self.__listShards)
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def describe(self):
+      return []
+
+   def collect(self):
+      from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
+      oKeywords = HistogramMetricFamily(f"{PREFIX}_keyword_duration_seconds", "duration of the update keywords of prometheus_interface", labels=["keyword"])
+      for sKeyword in KEYWORDS:
+         listBuckets, fSum = get_buckets(KEYWORD_BUCKETS_NS, self.get_keyword_counts(sKeyword))
+         oKeywords.add_metric([sKeyword], listBuckets, fSum)
+      yield oKeywords
+      oScrapes = HistogramMetricFamily(f"{PREFIX}_scrape_duration_seconds", "duration of the collection and encoding of all metrics per scrape")
+      with self.__oLock:
+         listScrapes = list(self.__listScrapes)
+      listBuckets, fSum = get_buckets(SCRAPE_BUCKETS_NS, listScrapes)
+      oScrapes.add_metric([], listBuckets, fSum)
+      yield oScrapes
+      oSeries = GaugeMetricFamily(f"{PREFIX}_series", "number of series per metric of prometheus_interface", labels=["metric", "type"])
+      oBytes  = GaugeMetricFamily(f"{PREFIX}_series_bytes", "approximate memory held by the series of a metric of prometheus_interface", labels=["metric"])
+      for sName, sType, dictSeries in self.__fnGetMetrics():
+         listSeries = list(dictSeries.items())
+         nSize = sys.getsizeof(dictSeries)
+         if len(listSeries) > 0:
+            nSize += len(listSeries) * get_series_size(listSeries[0][1], listSeries[0][0])
+         oSeries.add_metric([sName, sType], len(listSeries))
+         oBytes.add_metric([sName], nSize)
+      yield oSeries
+      yield oBytes
+
+# eof class CSelfInstrumentation():
@@ -0,0 +1,146 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CShardedValue.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Sharded accumulation of counter, summary and histogram values in case of several threads update
+#   the same series (e.g. Robot Framework THREAD blocks).
+#
+# - Every thread increments its own shard without any lock. The shards are summed up only when the value is read
+#   (at scrape time). A lock is only taken once per thread and value, when the shard of the thread is created,
+#   and when the value is read.
+#
+# - The shard of a thread is merged into the base value as soon as the thread has finished (its thread local data
+#   is released), therefore the number of shards does not grow with the number of threads started over time.
+#
+# CShardedValue provides the same interface like the value classes of the Prometheus Python client library
+# and replaces them within the series (see 'shard_series').
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import threading, weakref
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CShardOwner():
+   """Thread local holder of a shard; released together with the thread local data of its thread
+   """
+
+   __slots__ = ('oShard', '__weakref__')
+
+   def __init__(self, oShard):
+      self.oShard = oShard
+
+# eof class CShardOwner():
+
+class CShardedValue():
+   """A float value, accumulated in one shard per thread
+   """
+
+   def __init__(self, fInitialValue=0.0):
+      self.__oLocal     = threading.local()
+      self.__listShards = []
+      self.__oLock      = threading.Lock() # protects the list of shards only
+      self.__fBase      = fInitialValue
+      self.__oExemplar  = None
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __new_shard(self):
+      listShard = [0.0]
+      with self.__oLock:
+         self.__listShards.append(listShard)
+      oOwner = CShardOwner(listShard)
+      # the value is referenced weakly, a finished thread must not keep a removed series alive
+      weakref.finalize(oOwner, CShardedValue._merge_shard, weakref.ref(self), listShard)
+      self.__oLocal.owner = oOwner
+      return listShard
+
+   @staticmethod
+   def _merge_shard(oValueRef, listShard):
+      """Merges the shard of a finished thread into the base value
+      """
+      oValue = oValueRef()
+      if oValue is not None:
+         oValue.__merge(listShard)
+
+   def __merge(self, listShard):
+      with self.__oLock:
+         self.__fBase = self.__fBase + listShard[0]
+         self.__listShards.remove(listShard)
+
+   def inc(self, amount):
+      try:
+         listShard = self.__oLocal.owner.oShard
+      except AttributeError:
+         listShard = self.__new_shard()
+      # only the owning thread writes to this shard, therefore no lock is required
+      listShard[0] += amount
+
+   def set(self, value, timestamp=None):
+      # setting a value is not part of the accumulation; all shards are merged into the base value
+      with self.__oLock:
+         for listShard in self.__listShards:
+            listShard[0] = 0.0
+         self.__fBase = value
+
+   def get(self):
+      # locked against merging a shard: otherwise the shard could be missed (or counted twice) for a moment
+      with self.__oLock:
+         fValue = self.__fBase
+         for listShard in self.__listShards:
+            fValue = fValue + listShard[0]
+      return fValue
+
+   def get_shard_count(self):
+      return len(self.__listShards)
+
+   def set_exemplar(self, exemplar):
+      self.__oExemplar = exemplar
+
+   def get_exemplar(self):
+      return self.__oExemplar
+
+# eof class CShardedValue():
+
+# --------------------------------------------------------------------------------------------------------------
+
+def shard_series(oSeries):
+   """Replaces the values of a counter, summary or histogram series by sharded values. The current values are kept.
+Gauges and infos are not changed, because their values are set (and not accumulated).
+   """
+   sType = getattr(oSeries, '_type', None)
+   if sType == 'counter':
+      oSeries._value = CShardedValue(oSeries._value.get())
+   elif sType == 'summary':
+      oSeries._count = CShardedValue(oSeries._count.get())
+      oSeries._sum   = CShardedValue(oSeries._sum.get())
+   elif sType == 'histogram':
+      oSeries._sum     = CShardedValue(oSeries._sum.get())
+      oSeries._buckets = [CShardedValue(oBucket.get()) for oBucket in oSeries._buckets]
+   return oSeries
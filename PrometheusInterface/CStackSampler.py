@@ -0,0 +1,263 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# CStackSampler.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Statistical profiling of the Python code running in this process (test libraries, Robot Framework, ...),
+#   with an overhead low enough to be always on.
+#
+# - A background thread samples the stacks of all other threads with a fixed frequency ('sys._current_frames').
+#   Per sample it counts:
+#
+#   * the function on top of the stack ('self' samples: time spent within the function itself)
+#   * every function on the stack ('total' samples: time spent within the function and its callees)
+#   * the complete stack (for flamegraphs, written as collapsed stacks: 'frame;frame;frame <count>')
+#
+# - All three tables are bounded: in case of a table exceeds 4 * top_n entries, it is reduced to the top_n entries
+#   with the most samples; the samples of the removed entries are counted as '[other]'. The counts of functions
+#   removed from the tables 'self' and 'total' are kept (the number of functions of a process is bounded) and added
+#   when the tables are read: a function sampled again continues with its count (its counter is monotonic), and its
+#   samples before the removal are subtracted from '[other]'. Therefore every sample is counted only once (the sum
+#   of the table 'self' is the number of samples); '[other]' decreases in case of a removed function is sampled again.
+#
+# - Threads waiting (e.g. the http server or the background threads of this package) are not counted.
+#
+# - The sampler is also a collector of the Prometheus Python client library, providing:
+#
+#   * <name>_self_samples_total{function, module}
+#   * <name>_total_samples_total{function, module}
+#   * <name>_samples_total, <name>_sampling_seconds_total (overhead of the sampler)
+#
+# A signal based sampler (setitimer) is not used, because signals are delivered to the main thread only and
+# would interrupt system calls of the code under test.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import sys, time, threading
+
+DEFAULT_HZ        = 100
+DEFAULT_TOP_N     = 100
+DEFAULT_MAX_DEPTH = 128
+
+OTHER = ("[other]", "[other]") # (function, module) of all removed entries
+
+# leaf frames of waiting threads: module -> function names
+IDLE_FRAMES = {'threading' : ("wait", "_wait_for_tstate_lock", "join"),
+               'selectors' : ("select",),
+               'socket'    : ("accept", "readinto"),
+               'queue'     : ("get",)}
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CStackSampler():
+   """Samples the stacks of all threads in a background thread and aggregates them into bounded top-N tables
+   """
+
+   def __init__(self, sName="prometheus_interface_profile", fHz=DEFAULT_HZ, nTopN=DEFAULT_TOP_N, nMaxDepth=DEFAULT_MAX_DEPTH):
+      if float(fHz) <= 0:
+         raise ValueError(f"Invalid sampling frequency '{fHz}'; expected a value greater than 0")
+      if int(nTopN) <= 0:
+         raise ValueError(f"Invalid number of entries '{nTopN}'; expected a value greater than 0")
+      self.__sName       = sName
+      self.__fInterval   = 1.0 / float(fHz)
+      self.__nTopN       = int(nTopN)
+      self.__nMaxDepth   = int(nMaxDepth)
+      self.__oLock       = threading.Lock()  # protects the tables
+      self.__dictFrames  = {}                # code object -> (function, module); cache of the frame names
+      self.__dictSelf    = {}                # (function, module) -> self samples
+      self.__dictTotal   = {}                # (function, module) -> total samples
+      self.__dictStacks  = {}                # tuple of (function, module), root first -> samples
+      self.__dictEvicted = {'self': {}, 'total': {}} # per table: (function, module) -> samples removed from the table
+      self.__nSamples    = 0                 # stacks sampled
+      self.__nTicks      = 0                 # sampling runs
+      self.__fSampling   = 0.0               # seconds spent for sampling
+      self.__fStartTime  = None
+      self.__fStopTime   = None
+      self.__oStop       = threading.Event()
+      self.__oThread     = None
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __get_frame_name(self, oFrame):
+      oCode = oFrame.f_code
+      tupleName = self.__dictFrames.get(oCode)
+      if tupleName is None:
+         tupleName = (getattr(oCode, 'co_qualname', oCode.co_name), str(oFrame.f_globals.get('__name__', oCode.co_filename)))
+         self.__dictFrames[oCode] = tupleName
+      return tupleName
+
+   def __sample(self):
+      """Takes one sample of every thread (except the sampler itself)
+      """
+      nOwnIdent = threading.get_ident()
+      listStacks = []
+      for nIdent, oFrame in sys._current_frames().items():
+         if nIdent == nOwnIdent:
+            continue
+         if oFrame.f_code.co_name in IDLE_FRAMES.get(oFrame.f_globals.get('__name__'), ()):
+            continue
+         listStack = []
+         nDepth = 0
+         while ( (oFrame is not None) and (nDepth < self.__nMaxDepth) ):
+            listStack.append(self.__get_frame_name(oFrame))
+            oFrame = oFrame.f_back
+            nDepth += 1
+         listStack.reverse()
+         listStacks.append(tuple(listStack))
+      with self.__oLock:
+         for tupleStack in listStacks:
+            self.__nSamples += 1
+            self.__dictSelf[tupleStack[-1]] = self.__dictSelf.get(tupleStack[-1], 0) + 1
+            for tupleFrame in set(tupleStack): # recursive functions are counted once per sample
+               self.__dictTotal[tupleFrame] = self.__dictTotal.get(tupleFrame, 0) + 1
+            self.__dictStacks[tupleStack] = self.__dictStacks.get(tupleStack, 0) + 1
+         for dictTable, dictEvicted in ((self.__dictSelf, self.__dictEvicted['self']), (self.__dictTotal, self.__dictEvicted['total']), (self.__dictStacks, None)):
+            if len(dictTable) > 4 * self.__nTopN:
+               self.__reduce(dictTable, dictEvicted)
+         if len(self.__dictFrames) > 64 * self.__nTopN:
+            self.__dictFrames.clear()
+
+   def __reduce(self, dictTable, dictEvicted=None):
+      """Keeps the top-N entries of a table; the samples of all other entries are counted as '[other]'.
+With dictEvicted the samples of the removed entries are kept, to be added to the entries when read (see 'get_top').
+      """
+      oOther = (OTHER,) if dictTable is self.__dictStacks else OTHER
+      listEntries = sorted(dictTable.items(), key=lambda tupleEntry: tupleEntry[1], reverse=True)
+      nOther = dictTable.get(oOther, 0)
+      for oKey, nCount in listEntries[self.__nTopN:]:
+         if oKey == oOther:
+            continue
+         nOther += nCount
+         if dictEvicted is not None:
+            dictEvicted[oKey] = dictEvicted.get(oKey, 0) + nCount
+      dictTable.clear()
+      dictTable.update(tupleEntry for tupleEntry in listEntries[:self.__nTopN] if tupleEntry[0] != oOther)
+      dictTable[oOther] = nOther
+
+   def __run(self):
+      fNext = time.perf_counter()
+      while True:
+         fNext += self.__fInterval
+         fWait = fNext - time.perf_counter()
+         if fWait < 0:
+            fNext = time.perf_counter() # too slow; no catching up (the overhead must stay low)
+            fWait = 0
+         if self.__oStop.wait(fWait):
+            return
+         fStart = time.perf_counter()
+         self.__sample()
+         self.__fSampling += time.perf_counter() - fStart
+         self.__nTicks += 1
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def start(self):
+      if self.__oThread is not None:
+         raise Exception("The sampler is already started")
+      self.__oStop.clear()
+      self.__fStartTime = time.perf_counter()
+      self.__fStopTime  = None
+      self.__oThread = threading.Thread(target=self.__run, name="prometheus_interface_profiler", daemon=True)
+      self.__oThread.start()
+
+   def stop(self):
+      if self.__oThread is None:
+         return
+      self.__oStop.set()
+      self.__oThread.join()
+      self.__oThread = None
+      self.__fStopTime = time.perf_counter()
+
+   def is_running(self):
+      return self.__oThread is not None
+
+   def get_top(self, sTable="self", nTopN=None):
+      """Returns the entries of the table 'self', 'total' or 'stacks' as list of (key, samples), most samples first
+      """
+      dictTable = {'self': self.__dictSelf, 'total': self.__dictTotal, 'stacks': self.__dictStacks}[sTable]
+      dictEvicted = self.__dictEvicted.get(sTable)
+      with self.__oLock:
+         if not dictEvicted:
+            listEntries = list(dictTable.items())
+         else:
+            # the samples before the removal are moved from '[other]' back to the function
+            listEntries = []
+            nReadded = 0
+            for oKey, nCount in dictTable.items():
+               if oKey == OTHER:
+                  continue
+               nEvicted = dictEvicted.get(oKey, 0)
+               nReadded += nEvicted
+               listEntries.append((oKey, nCount + nEvicted))
+            if OTHER in dictTable:
+               listEntries.append((OTHER, dictTable[OTHER] - nReadded))
+      listEntries.sort(key=lambda tupleEntry: tupleEntry[1], reverse=True)
+      return listEntries[:self.__nTopN if nTopN is None else int(nTopN)]
+
+   def get_statistics(self):
+      """Returns the number of samples, the sampling time and the overhead (sampling time / profiled time)
+      """
+      fElapsed = 0.0
+      if self.__fStartTime is not None:
+         fElapsed = (self.__fStopTime if self.__fStopTime is not None else time.perf_counter()) - self.__fStartTime
+      return {'samples'  : self.__nSamples,
+              'ticks'    : self.__nTicks,
+              'seconds'  : fElapsed,
+              'sampling' : self.__fSampling,
+              'overhead' : (self.__fSampling / fElapsed) if fElapsed > 0 else 0.0}
+
+   def write_collapsed(self, sFile):
+      """Writes all stacks in the collapsed format of flamegraph tools ('module:function;module:function <samples>');
+returns the number of stacks written
+      """
+      listStacks = self.get_top("stacks", nTopN=4 * self.__nTopN)
+      with open(sFile, "w", encoding="utf-8") as oFile:
+         for tupleStack, nCount in listStacks:
+            sStack = ";".join(f"{sModule}:{sFunction}" if sModule != sFunction else sFunction for sFunction, sModule in tupleStack)
+            oFile.write(f"{sStack} {nCount}\n")
+      return len(listStacks)
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def describe(self):
+      return []
+
+   def collect(self):
+      from prometheus_client.core import CounterMetricFamily
+      sName = self.__sName
+      for sTable, sDescription in (("self", "samples with the function on top of the stack"),
+                                   ("total", "samples with the function anywhere on the stack")):
+         oFamily = CounterMetricFamily(f"{sName}_{sTable}_samples", sDescription, labels=["function", "module"])
+         for (sFunction, sModule), nCount in self.get_top(sTable):
+            oFamily.add_metric([sFunction, sModule], nCount)
+         yield oFamily
+      dictStatistics = self.get_statistics()
+      yield CounterMetricFamily(f"{sName}_samples", "stacks sampled by the profiler", value=dictStatistics['samples'])
+      yield CounterMetricFamily(f"{sName}_sampling_seconds", "time spent by the profiler for sampling", value=dictStatistics['sampling'])
+
+# eof class CStackSampler():
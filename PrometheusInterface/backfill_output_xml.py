@@ -0,0 +1,252 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# backfill_output_xml.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Command line tool to backfill Prometheus with the results of previous Robot Framework executions.
+#
+# The tool reads Robot Framework 'output.xml' files and derives the test result counters
+# ('num_passed', 'num_failed', 'num_unknown' with labels 'testname' and 'testresult', like in the test suites
+# of this repository) and a histogram of the test durations. The result is written in OpenMetrics text format
+# with timestamps and can be imported with:
+#
+#    promtool tsdb create-blocks-from openmetrics <output file> <tsdb folder>
+#
+# The 'output.xml' files are parsed with 'iterparse'. Every test element is removed from the tree after
+# it has been evaluated, therefore the memory consumption does not depend on the size of the files.
+# Several files are parsed in parallel (one process per file).
+#
+# Usage:
+#
+#    python -m PrometheusInterface.backfill_output_xml --output backfill.om --labels "room=Room_1;testbench=Testbench 1" <output.xml files or folders>
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, argparse, glob, bisect, datetime
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+SUCCESS = 0
+ERROR   = 1
+
+# mapping between Robot Framework test status and test result counter / test result (like in the test suites of this repository)
+DICT_STATUS = {'PASS'    : ("num_passed",  "PASSED"),
+               'FAIL'    : ("num_failed",  "FAILED"),
+               'SKIP'    : ("num_unknown", "UNKNOWN"),
+               'NOT RUN' : ("num_unknown", "UNKNOWN")}
+
+DICT_COUNTER_DESCRIPTIONS = {"num_passed"  : "number of passed tests",
+                             "num_failed"  : "number of failed tests",
+                             "num_unknown" : "number of unknown tests"}
+
+DEFAULT_HISTOGRAM_NAME = "test_duration_seconds"
+DEFAULT_BUCKETS        = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 7.5, 10.0) # like prometheus_client
+
+# --------------------------------------------------------------------------------------------------------------
+
+def printerror(sMsg):
+   sys.stderr.write(f"Error: {sMsg}!\n")
+
+# --------------------------------------------------------------------------------------------------------------
+
+def parse_robot_time(sTime):
+   """Converts a Robot Framework time stamp (format of RF < 7: '20241017 16:43:46.123', format of RF >= 7: '2024-10-17T16:43:46.123456')
+to seconds since epoch
+   """
+   if "T" in sTime:
+      oDateTime = datetime.datetime.fromisoformat(sTime)
+   else:
+      oDateTime = datetime.datetime.strptime(sTime, "%Y%m%d %H:%M:%S.%f")
+   return oDateTime.timestamp()
+
+def parse_status(oStatus):
+   """Returns start time and duration (in seconds) of a status element
+   """
+   if oStatus.get('start') is not None:
+      # RF >= 7
+      fStart    = parse_robot_time(oStatus.get('start'))
+      fDuration = float(oStatus.get('elapsed', 0))
+   else:
+      fStart    = parse_robot_time(oStatus.get('starttime'))
+      fDuration = parse_robot_time(oStatus.get('endtime')) - fStart
+   return fStart, fDuration
+
+def parse_output_xml(sFile):
+   """Stream-parses a single 'output.xml' file and returns a list of (end time, test name, status, duration) of all tests
+   """
+   listTests   = []
+   listParents = []
+   for sEvent, oElement in ET.iterparse(sFile, events=('start', 'end')):
+      if sEvent == 'start':
+         listParents.append(oElement)
+         continue
+      listParents.pop()
+      if oElement.tag == 'test':
+         oStatus = oElement.find('status')
+         if oStatus is not None:
+            try:
+               fStart, fDuration = parse_status(oStatus)
+               listTests.append((round(fStart + fDuration, 3), oElement.get('name'), oStatus.get('status'), fDuration))
+            except (TypeError, ValueError):
+               pass # test without valid time stamps
+         # remove the test completely from the tree to keep the memory consumption constant
+         oElement.clear()
+         if len(listParents) > 0:
+            listParents[-1].remove(oElement)
+      elif oElement.tag in ('suite', 'kw', 'errors', 'statistics'):
+         oElement.clear()
+   return listTests
+
+# --------------------------------------------------------------------------------------------------------------
+
+def escape_label_value(sValue):
+   return str(sValue).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(listLabels):
+   return ",".join([f"{sName}=\"{escape_label_value(sValue)}\"" for sName, sValue in listLabels])
+
+def format_float(fValue):
+   if fValue == float('inf'):
+      return "+Inf"
+   return repr(float(fValue))
+
+def write_openmetrics(hOutput, listTests, listConstLabels, sHistogramName, listBuckets):
+   """Accumulates the test results (sorted by time) to counters and a histogram, and writes all values in OpenMetrics text format.
+Every metric family is written as a whole, every series within a family is written in time order.
+   """
+   listTests = sorted(listTests)
+   listUpperBounds = list(listBuckets) + [float('inf')]
+
+   # -- counters: counter name -> series labels -> list of (time stamp, value)
+   dictCounters = {sCounterName: {} for sCounterName in DICT_COUNTER_DESCRIPTIONS}
+   for fTimestamp, sTestName, sStatus, fDuration in listTests:
+      sCounterName, sTestResult = DICT_STATUS.get(sStatus, ("num_unknown", "UNKNOWN"))
+      tupleLabels = tuple(listConstLabels) + (('testname', sTestName), ('testresult', sTestResult))
+      listPoints = dictCounters[sCounterName].setdefault(tupleLabels, [])
+      fValue = listPoints[-1][1] + 1 if len(listPoints) > 0 else 1
+      if ( (len(listPoints) > 0) and (listPoints[-1][0] == fTimestamp) ):
+         listPoints[-1] = (fTimestamp, fValue) # only one value per time stamp
+      else:
+         listPoints.append((fTimestamp, fValue))
+   for sCounterName, dictSeries in dictCounters.items():
+      if len(dictSeries) == 0:
+         continue
+      hOutput.write(f"# HELP {sCounterName} {DICT_COUNTER_DESCRIPTIONS[sCounterName]}\n")
+      hOutput.write(f"# TYPE {sCounterName} counter\n")
+      for tupleLabels, listPoints in dictSeries.items():
+         sLabels = format_labels(tupleLabels)
+         for fTimestamp, fValue in listPoints:
+            hOutput.write(f"{sCounterName}_total{{{sLabels}}} {format_float(fValue)} {fTimestamp:.3f}\n")
+
+   # -- histogram of test durations (one point per test)
+   if len(listTests) > 0:
+      hOutput.write(f"# HELP {sHistogramName} duration of tests in seconds\n")
+      hOutput.write(f"# TYPE {sHistogramName} histogram\n")
+      listCounts = [0] * len(listUpperBounds)
+      fSum = 0.0
+      for nIndex, (fTimestamp, sTestName, sStatus, fDuration) in enumerate(listTests):
+         listCounts[bisect.bisect_left(listUpperBounds, fDuration)] += 1
+         fSum = fSum + fDuration
+         if ( (nIndex + 1 < len(listTests)) and (listTests[nIndex + 1][0] == fTimestamp) ):
+            continue # only one value per time stamp
+         nCumulated = 0
+         for fUpperBound, nCount in zip(listUpperBounds, listCounts):
+            nCumulated = nCumulated + nCount
+            sLabels = format_labels(tuple(listConstLabels) + (('le', format_float(fUpperBound)),))
+            hOutput.write(f"{sHistogramName}_bucket{{{sLabels}}} {nCumulated} {fTimestamp:.3f}\n")
+         sLabels = format_labels(listConstLabels)
+         sLabels = f"{{{sLabels}}}" if sLabels != "" else ""
+         hOutput.write(f"{sHistogramName}_count{sLabels} {nCumulated} {fTimestamp:.3f}\n")
+         hOutput.write(f"{sHistogramName}_sum{sLabels} {format_float(fSum)} {fTimestamp:.3f}\n")
+   hOutput.write("# EOF\n")
+
+# --------------------------------------------------------------------------------------------------------------
+
+def get_files(listPaths):
+   """Resolves folders to all 'output*.xml' files within (recursively)
+   """
+   listFiles = []
+   for sPath in listPaths:
+      if os.path.isdir(sPath):
+         listFiles.extend(sorted(glob.glob(os.path.join(sPath, "**", "output*.xml"), recursive=True)))
+      else:
+         listFiles.append(sPath)
+   return listFiles
+
+def parse_const_labels(sLabels):
+   """Converts 'name=value;name=value' to a list of (name, value)
+   """
+   listLabels = []
+   if sLabels is None:
+      return listLabels
+   for sLabel in sLabels.split(';'):
+      if sLabel.strip() == "":
+         continue
+      if "=" not in sLabel:
+         raise ValueError(f"Syntax error in label '{sLabel}': missing delimiter '='")
+      sName, sValue = sLabel.split("=", 1)
+      listLabels.append((sName.strip(), sValue.strip()))
+   return listLabels
+
+def main(listArgs=None):
+   oParser = argparse.ArgumentParser(description="Backfills Prometheus with test counters and test durations out of Robot Framework 'output.xml' files")
+   oParser.add_argument("paths", nargs="+", help="'output.xml' files or folders containing 'output*.xml' files")
+   oParser.add_argument("--output", default=None, help="OpenMetrics output file (default: stdout)")
+   oParser.add_argument("--labels", default=None, help="constant labels added to all series, format: 'name=value;name=value'")
+   oParser.add_argument("--histogram-name", default=DEFAULT_HISTOGRAM_NAME, help=f"name of the test duration histogram (default: {DEFAULT_HISTOGRAM_NAME})")
+   oParser.add_argument("--buckets", default=None, help="semicolon separated upper bounds of the histogram buckets (default: like prometheus_client)")
+   oParser.add_argument("--workers", type=int, default=None, help="number of parallel processes (default: number of CPUs)")
+   oArgs = oParser.parse_args(listArgs)
+
+   try:
+      listConstLabels = parse_const_labels(oArgs.labels)
+      listBuckets = DEFAULT_BUCKETS
+      if oArgs.buckets is not None:
+         listBuckets = sorted([float(sBucket) for sBucket in oArgs.buckets.split(';')])
+   except ValueError as ex:
+      printerror(str(ex))
+      return ERROR
+
+   listFiles = get_files(oArgs.paths)
+   if len(listFiles) == 0:
+      printerror("No 'output.xml' files found")
+      return ERROR
+
+   listTests = []
+   with ProcessPoolExecutor(max_workers=oArgs.workers) as oExecutor:
+      for sFile, listFileTests in zip(listFiles, oExecutor.map(parse_output_xml, listFiles)):
+         sys.stderr.write(f"{sFile}: {len(listFileTests)} tests\n")
+         listTests.extend(listFileTests)
+
+   if oArgs.output is None:
+      write_openmetrics(sys.stdout, listTests, listConstLabels, oArgs.histogram_name, listBuckets)
+   else:
+      with open(oArgs.output, "w", encoding="utf-8") as hOutput:
+         write_openmetrics(hOutput, listTests, listConstLabels, oArgs.histogram_name, listBuckets)
+   return SUCCESS
+
+# --------------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+   sys.exit(main())
@@ -0,0 +1,256 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# generate_recording_rules.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Generates a Prometheus recording rules file and a matching Grafana dashboard out of a set of metrics
+# (names, types and label names).
+#
+# Dashboards querying the raw series of prometheus_interface (e.g. 'sum by (testbench) (...)' or 'histogram_quantile(...)'
+# over all test names) get slow with a growing history. The recording rules pre-aggregate these series per aggregation
+# level (e.g. per room, per testbench), the generated dashboard queries the recorded series only.
+#
+# Naming of the recorded series (like recommended by Prometheus: 'level:metric:operations'):
+#
+#    counter   : <level>:<metric>_total:sum, <level>:<metric>_total:rate<interval>
+#    gauge     : <level>:<metric>:avg, <level>:<metric>:max
+#    summary   : <level>:<metric>:mean<interval>
+#    histogram : <level>:<metric>_bucket:rate<interval>, <level>:<metric>:mean<interval>, <level>:<metric>:p<quantile>
+#
+# Infos are not aggregated.
+#
+# The metrics are taken either from a running prometheus_interface instance (keyword 'generate_recording_rules')
+# or from the metrics endpoint of any exporter (this command line tool):
+#
+#    python -m PrometheusInterface.generate_recording_rules --url http://localhost:8000/metrics --rules prometheus_interface_rules.yml --dashboard prometheus_interface_dashboard.json
+#
+# The rules file has to be added to the 'rule_files' of the Prometheus configuration, the dashboard can be imported in Grafana.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import sys, json
+
+SUCCESS = 0
+ERROR   = 1
+
+DEFAULT_LEVELS        = "room;testbench"
+DEFAULT_QUANTILES     = "0.5;0.9;0.99"
+DEFAULT_RATE_INTERVAL = "5m"
+DEFAULT_GROUP_NAME    = "prometheus_interface"
+
+# labels added by the client library to single samples, not part of the label names of a metric
+SAMPLE_LABEL_NAMES = ("le", "quantile")
+
+# --------------------------------------------------------------------------------------------------------------
+
+def printerror(sMsg):
+   sys.stderr.write(f"Error: {sMsg}!\n")
+
+def parse_levels(levels=DEFAULT_LEVELS):
+   """Returns the aggregation levels as list of tuples of label names.
+Format: levels separated by ';', label names within a level separated by ',' (e.g. 'room;testbench;room,testbench').
+   """
+   listLevels = []
+   for sLevel in str(levels).split(';'):
+      tupleLabelNames = tuple(sLabelName.strip() for sLabelName in sLevel.split(',') if sLabelName.strip() != "")
+      if len(tupleLabelNames) > 0:
+         listLevels.append(tupleLabelNames)
+   return listLevels
+
+def parse_quantiles(quantiles=DEFAULT_QUANTILES):
+   """Returns the quantiles as sorted list of floats (between 0 and 1)
+   """
+   listQuantiles = sorted(float(sQuantile) for sQuantile in str(quantiles).split(';') if sQuantile.strip() != "")
+   for fQuantile in listQuantiles:
+      if not (0.0 < fQuantile < 1.0):
+         raise ValueError(f"Invalid quantile '{fQuantile}'; expected a value between 0 and 1")
+   return listQuantiles
+
+def get_metrics_from_text(sText):
+   """Returns the metrics of a text exposition (Prometheus text format) as list of dictionaries
+(keys: 'name', 'type', 'description', 'labels')
+   """
+   from prometheus_client.parser import text_string_to_metric_families
+   listFamilies = list(text_string_to_metric_families(sText))
+   setFamilyNames = set(oFamily.name for oFamily in listFamilies)
+   listMetrics = []
+   for oFamily in listFamilies:
+      if ( (oFamily.name.endswith("_created")) and (oFamily.name[:-len("_created")] in setFamilyNames) ):
+         continue # creation timestamps of counters, summaries and histograms (exported as separate gauges in text format)
+      listLabelNames = []
+      for oSample in oFamily.samples:
+         for sLabelName in oSample.labels:
+            if ( (sLabelName not in SAMPLE_LABEL_NAMES) and (sLabelName not in listLabelNames) ):
+               listLabelNames.append(sLabelName)
+      listMetrics.append({'name': oFamily.name, 'type': oFamily.type, 'description': oFamily.documentation, 'labels': listLabelNames})
+   return listMetrics
+
+def get_metrics_from_url(sUrl):
+   """Returns the metrics provided by the metrics endpoint of an exporter (see 'get_metrics_from_text')
+   """
+   from urllib.request import urlopen
+   with urlopen(sUrl, timeout=10) as oResponse:
+      sText = oResponse.read().decode("utf-8")
+   return get_metrics_from_text(sText)
+
+# --------------------------------------------------------------------------------------------------------------
+
+def create_rules(listMetrics, listLevels, listQuantiles, sRateInterval=DEFAULT_RATE_INTERVAL):
+   """Returns the recording rules as list of dictionaries (keys: 'record', 'expr', 'metric', 'type', 'level')
+   """
+   listRules = []
+
+   def add_rule(sRecord, sExpr, dictMetric, tupleLevel):
+      listRules.append({'record': sRecord, 'expr': sExpr, 'metric': dictMetric['name'], 'type': dictMetric['type'], 'level': tupleLevel})
+
+   for dictMetric in listMetrics:
+      sName = dictMetric['name']
+      for tupleLevel in listLevels:
+         if not set(tupleLevel).issubset(dictMetric['labels']):
+            continue
+         sLevel = "_".join(tupleLevel)
+         sBy    = ", ".join(tupleLevel)
+         if dictMetric['type'] == "counter":
+            add_rule(f"{sLevel}:{sName}_total:sum", f"sum by ({sBy}) ({sName}_total)", dictMetric, tupleLevel)
+            add_rule(f"{sLevel}:{sName}_total:rate{sRateInterval}", f"sum by ({sBy}) (rate({sName}_total[{sRateInterval}]))", dictMetric, tupleLevel)
+         elif dictMetric['type'] == "gauge":
+            add_rule(f"{sLevel}:{sName}:avg", f"avg by ({sBy}) ({sName})", dictMetric, tupleLevel)
+            add_rule(f"{sLevel}:{sName}:max", f"max by ({sBy}) ({sName})", dictMetric, tupleLevel)
+         elif dictMetric['type'] in ("summary", "histogram"):
+            add_rule(f"{sLevel}:{sName}:mean{sRateInterval}",
+                     f"sum by ({sBy}) (rate({sName}_sum[{sRateInterval}])) / sum by ({sBy}) (rate({sName}_count[{sRateInterval}]))",
+                     dictMetric, tupleLevel)
+            if dictMetric['type'] == "histogram":
+               sBucketRecord = f"{sLevel}:{sName}_bucket:rate{sRateInterval}"
+               add_rule(sBucketRecord, f"sum by ({sBy}, le) (rate({sName}_bucket[{sRateInterval}]))", dictMetric, tupleLevel)
+               for fQuantile in listQuantiles:
+                  # the quantiles are computed out of the recorded bucket rates (and not out of the raw series)
+                  sQuantile = f"{fQuantile * 100:g}".replace(".", "_")
+                  add_rule(f"{sLevel}:{sName}:p{sQuantile}", f"histogram_quantile({fQuantile:g}, {sBucketRecord})", dictMetric, tupleLevel)
+   return listRules
+
+def write_rules(hOutput, listRules, sGroupName=DEFAULT_GROUP_NAME, sEvaluationInterval=None):
+   """Writes the recording rules in Prometheus rules file format (YAML)
+   """
+   hOutput.write("# generated by prometheus_interface (generate_recording_rules)\n")
+   hOutput.write("groups:\n")
+   hOutput.write(f"  - name: {json.dumps(sGroupName)}\n")
+   if sEvaluationInterval is not None:
+      hOutput.write(f"    interval: {sEvaluationInterval}\n")
+   if len(listRules) == 0:
+      hOutput.write("    rules: []\n")
+      return
+   hOutput.write("    rules:\n")
+   for dictRule in listRules:
+      # JSON strings are valid double quoted YAML scalars
+      hOutput.write(f"      - record: {json.dumps(dictRule['record'])}\n")
+      hOutput.write(f"        expr: {json.dumps(dictRule['expr'])}\n")
+
+def create_dashboard(listRules, sTitle="prometheus_interface (recorded series)", sUid=None):
+   """Returns a Grafana dashboard (as dictionary) with one panel per recorded series.
+The Prometheus data source is selected by the dashboard variable 'datasource'.
+   """
+   dictDatasource = {'type': "prometheus", 'uid': "${datasource}"}
+   listPanels = []
+   nPanel = 0
+   for dictRule in listRules:
+      if "_bucket:" in dictRule['record']:
+         continue # bucket rates are an intermediate result, used by the quantiles
+      sLegend = " ".join("{{" + sLabelName + "}}" for sLabelName in dictRule['level'])
+      listPanels.append({'datasource': dictDatasource,
+                         'fieldConfig': {'defaults': {'color': {'mode': "palette-classic"}}, 'overrides': []},
+                         'gridPos': {'h': 8, 'w': 12, 'x': 12 * (nPanel % 2), 'y': 8 * (nPanel // 2)},
+                         'id': nPanel + 1,
+                         'options': {'legend': {'displayMode': "list", 'placement': "bottom", 'showLegend': True},
+                                     'tooltip': {'mode': "multi", 'sort': "none"}},
+                         'targets': [{'datasource': dictDatasource,
+                                      'editorMode': "code",
+                                      'expr': dictRule['record'],
+                                      'legendFormat': sLegend,
+                                      'range': True,
+                                      'refId': "A"}],
+                         'title': f"{dictRule['metric']} by {', '.join(dictRule['level'])} ({dictRule['record'].split(':')[-1]})",
+                         'type': "timeseries"})
+      nPanel = nPanel + 1
+   dictDashboard = {'annotations': {'list': []},
+                    'editable': True,
+                    'graphTooltip': 0,
+                    'panels': listPanels,
+                    'refresh': "5s",
+                    'schemaVersion': 39,
+                    'tags': ["prometheus_interface"],
+                    'templating': {'list': [{'name': "datasource", 'label': "Prometheus", 'type': "datasource", 'query': "prometheus", 'hide': 0}]},
+                    'time': {'from': "now-30m", 'to': "now"},
+                    'timepicker': {'refresh_intervals': ["5s", "10s", "30s", "1m", "5m", "15m", "30m", "1h", "2h", "1d"]},
+                    'title': sTitle,
+                    'version': 1}
+   if sUid is not None:
+      dictDashboard['uid'] = sUid
+   return dictDashboard
+
+def generate(listMetrics, sRulesFile, sDashboardFile=None, levels=DEFAULT_LEVELS, quantiles=DEFAULT_QUANTILES,
+             sRateInterval=DEFAULT_RATE_INTERVAL, sGroupName=DEFAULT_GROUP_NAME):
+   """Writes the rules file (and the dashboard file, if defined); returns the list of recording rules
+   """
+   listRules = create_rules(listMetrics, parse_levels(levels), parse_quantiles(quantiles), sRateInterval)
+   with open(sRulesFile, "w", encoding="utf-8") as hRules:
+      write_rules(hRules, listRules, sGroupName)
+   if sDashboardFile is not None:
+      with open(sDashboardFile, "w", encoding="utf-8") as hDashboard:
+         json.dump(create_dashboard(listRules), hDashboard, indent=2)
+   return listRules
+
+# --------------------------------------------------------------------------------------------------------------
+
+def main(listArgs=None):
+   import argparse # not required when used by prometheus_interface
+   oParser = argparse.ArgumentParser(description="Generates Prometheus recording rules and a matching Grafana dashboard out of the metrics of an exporter")
+   oParser.add_argument("--url", default="http://localhost:8000/metrics", help="metrics endpoint of the exporter (default: http://localhost:8000/metrics)")
+   oParser.add_argument("--input", default=None, help="file containing a text exposition (used instead of '--url')")
+   oParser.add_argument("--rules", required=True, help="recording rules file to be written (YAML)")
+   oParser.add_argument("--dashboard", default=None, help="Grafana dashboard file to be written (JSON)")
+   oParser.add_argument("--levels", default=DEFAULT_LEVELS, help=f"aggregation levels, separated by ';', label names within a level separated by ',' (default: '{DEFAULT_LEVELS}')")
+   oParser.add_argument("--quantiles", default=DEFAULT_QUANTILES, help=f"quantiles of histograms, separated by ';' (default: '{DEFAULT_QUANTILES}')")
+   oParser.add_argument("--rate-interval", default=DEFAULT_RATE_INTERVAL, help=f"range of rate computations (default: {DEFAULT_RATE_INTERVAL})")
+   oParser.add_argument("--group", default=DEFAULT_GROUP_NAME, help=f"name of the rule group (default: {DEFAULT_GROUP_NAME})")
+   oArgs = oParser.parse_args(listArgs)
+
+   try:
+      if oArgs.input is not None:
+         with open(oArgs.input, encoding="utf-8") as hInput:
+            listMetrics = get_metrics_from_text(hInput.read())
+      else:
+         listMetrics = get_metrics_from_url(oArgs.url)
+      listRules = generate(listMetrics, oArgs.rules, oArgs.dashboard, oArgs.levels, oArgs.quantiles, oArgs.rate_interval, oArgs.group)
+   except Exception as ex:
+      printerror(str(ex))
+      return ERROR
+
+   sys.stderr.write(f"{len(listRules)} recording rules written to '{oArgs.rules}'\n")
+   return SUCCESS
+
+# --------------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+   sys.exit(main())
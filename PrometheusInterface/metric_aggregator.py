@@ -0,0 +1,272 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# metric_aggregator.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Central aggregator of prometheus_interface instances running in agent mode (library parameter 'agent_address').
+#
+# The agents send batched deltas of their series over persistent TCP connections (see 'CMetricAgent.py').
+# The aggregator merges them (counters, summaries and histograms: sum of all increments; gauges, infos and enums:
+# last value) and provides all series in one exposition for Prometheus (text, OpenMetrics or protobuf format,
+# see 'CExposition.py'). Therefore Prometheus has to scrape the aggregator only, instead of every bench PC.
+#
+# A batch is applied completely when its end is received and acknowledged to the agent. Batches sent again by an agent
+# (acknowledgement lost with the connection) are acknowledged, but not applied again. Series removed by the agent
+# (keywords 'remove_metric', 'remove_series', 'clear_metric') are removed from the exposition, too.
+#
+# Per default the series of every agent get the additional label 'agent' (host name and process id of the agent).
+# With '--agent-label ""' the series of all agents are merged.
+#
+# Usage:
+#
+#    python -m PrometheusInterface.metric_aggregator --listen 0.0.0.0:9200 --port 8000
+#
+# and on the bench PCs:
+#
+#    Library    prometheus_interface    agent_address=<aggregator host>:9200
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import sys, json, socketserver, threading
+
+try:
+   from .CMetricAgent import DELTA_SAMPLES, parse_address
+   from .CExposition import start_exposition_server
+except ImportError:
+   from CMetricAgent import DELTA_SAMPLES, parse_address
+   from CExposition import start_exposition_server
+
+SUCCESS = 0
+ERROR   = 1
+
+DEFAULT_LISTEN_ADDRESS = "0.0.0.0:9200"
+DEFAULT_PORT           = 8000
+DEFAULT_AGENT_LABEL    = "agent"
+
+# --------------------------------------------------------------------------------------------------------------
+
+def printerror(sMsg):
+   sys.stderr.write(f"Error: {sMsg}!\n")
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CMetricStore():
+   """Merged series of all agents; usable as collector of the Prometheus Python client library
+   """
+
+   def __init__(self, sAgentLabel=DEFAULT_AGENT_LABEL):
+      self.__sAgentLabel = sAgentLabel
+      self.__oLock       = threading.Lock()
+      self.__dictFamilies = {} # name -> {'type', 'help', 'series': {labels -> {sample key -> value}}}
+      self.__dictBatches = {} # (agent id, session id) -> number of the last applied batch
+      self.__nLines      = 0
+
+   def __del__(self):
+      pass
+
+   def apply_batch(self, sAgentId, sSession, nBatch, listLines):
+      """Applies all lines of a batch sent by an agent, in case of the batch is not yet applied. Invalid lines are ignored.
+      """
+      with self.__oLock:
+         tupleSession = (sAgentId, sSession)
+         if nBatch <= self.__dictBatches.get(tupleSession, 0):
+            return False # sent again, already applied
+         self.__dictBatches[tupleSession] = nBatch
+         for dictLine in listLines:
+            try:
+               if 'r' in dictLine:
+                  self.__remove(sAgentId, dictLine)
+               else:
+                  self.__apply(sAgentId, dictLine)
+            except (ValueError, KeyError, TypeError) as ex:
+               sys.stderr.write(f"Warning: invalid line of agent '{sAgentId}' ignored ({ex})\n")
+      return True
+
+   def __get_series_key(self, sAgentId, listLabelNames, listLabelValues):
+      listLabelNames  = list(listLabelNames)
+      listLabelValues = list(listLabelValues)
+      if self.__sAgentLabel:
+         listLabelNames.append(self.__sAgentLabel)
+         listLabelValues.append(sAgentId)
+      return tuple(zip(listLabelNames, listLabelValues))
+
+   def __remove(self, sAgentId, dictRemoval):
+      """Removes a series (or all series of the agent of a metric, in case of no label values are given)
+      """
+      sName = dictRemoval['r']
+      dictFamily = self.__dictFamilies.get(sName)
+      if dictFamily is None:
+         return
+      dictSeries = dictFamily['series']
+      if 'v' in dictRemoval:
+         dictSeries.pop(self.__get_series_key(sAgentId, dictRemoval['l'], dictRemoval['v']), None)
+      elif self.__sAgentLabel:
+         tupleAgent = (self.__sAgentLabel, sAgentId)
+         for tupleSeries in [tupleSeries for tupleSeries in dictSeries if tupleAgent in tupleSeries]:
+            del dictSeries[tupleSeries]
+      else:
+         dictSeries.clear() # series of all agents are merged
+      if len(dictSeries) == 0:
+         del self.__dictFamilies[sName]
+
+   def __apply(self, sAgentId, dictUpdate):
+      """Merges the update of a single series (one line sent by an agent)
+      """
+      sName = dictUpdate['m']
+      sType = dictUpdate['t']
+      tupleSeries = self.__get_series_key(sAgentId, dictUpdate['l'], dictUpdate['v'])
+      tupleDeltaSamples = DELTA_SAMPLES.get(sType, ())
+      dictFamily = self.__dictFamilies.get(sName)
+      if dictFamily is None:
+         dictFamily = self.__dictFamilies[sName] = {'type': sType, 'help': dictUpdate.get('h', ""), 'series': {}}
+      elif dictFamily['type'] != sType:
+         raise ValueError(f"Metric '{sName}' of type '{sType}' already known with type '{dictFamily['type']}'")
+      dictSamples = dictFamily['series'].setdefault(tupleSeries, {})
+      if sType in ("info", "stateset"):
+         dictSamples.clear() # the last value replaces all samples (e.g. changed info labels)
+      for sSuffix, dictSampleLabels, fValue in dictUpdate['s']:
+         tupleKey = (sSuffix, tuple(sorted(dictSampleLabels.items())))
+         if sSuffix in tupleDeltaSamples:
+            dictSamples[tupleKey] = dictSamples.get(tupleKey, 0.0) + fValue
+         else:
+            dictSamples[tupleKey] = fValue
+      self.__nLines += 1
+
+   def get_number_of_lines(self):
+      return self.__nLines
+
+   def describe(self):
+      return []
+
+   def collect(self):
+      from prometheus_client.metrics_core import Metric
+      with self.__oLock:
+         listFamilies = [(sName, dictFamily['type'], dictFamily['help'], [(tupleSeries, dict(dictSamples)) for tupleSeries, dictSamples in dictFamily['series'].items()])
+                         for sName, dictFamily in self.__dictFamilies.items()]
+      for sName, sType, sHelp, listSeries in listFamilies:
+         oMetric = Metric(sName, sHelp, sType)
+         for tupleSeries, dictSamples in listSeries:
+            for (sSuffix, tupleSampleLabels), fValue in dictSamples.items():
+               dictLabels = dict(tupleSeries)
+               dictLabels.update(tupleSampleLabels)
+               oMetric.add_sample(sName + sSuffix, dictLabels, fValue)
+         yield oMetric
+
+# eof class CMetricStore():
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CAgentHandler(socketserver.StreamRequestHandler):
+   """Receives the lines of a single agent connection
+   """
+
+   def handle(self):
+      oStore = self.server.oStore
+      sAgentId = f"{self.client_address[0]}:{self.client_address[1]}"
+      sSession = ""
+      listBatch = []
+      for bytesLine in self.rfile:
+         if bytesLine.strip() == b"":
+            continue
+         try:
+            dictLine = json.loads(bytesLine)
+            if not isinstance(dictLine, dict):
+               raise TypeError("JSON object expected")
+         except (ValueError, TypeError) as ex:
+            sys.stderr.write(f"Warning: invalid line of agent '{sAgentId}' ignored ({ex})\n")
+            continue
+         if 'agent' in dictLine:
+            sAgentId = str(dictLine['agent'])
+            sSession = str(dictLine.get('session', ""))
+         elif 'b' in dictLine:
+            # end of the batch: applied completely (once) and acknowledged
+            if not isinstance(dictLine['b'], int):
+               sys.stderr.write(f"Warning: invalid batch number of agent '{sAgentId}': {dictLine['b']}; batch ignored\n")
+               listBatch = []
+               continue
+            oStore.apply_batch(sAgentId, sSession, dictLine['b'], listBatch)
+            listBatch = []
+            self.wfile.write((json.dumps({'a': dictLine['b']}) + "\n").encode("utf-8"))
+            self.wfile.flush()
+         else:
+            listBatch.append(dictLine)
+
+# eof class CAgentHandler():
+
+class CAggregatorServer(socketserver.ThreadingTCPServer):
+   """TCP server receiving the deltas of all agents (one thread per agent connection)
+   """
+   daemon_threads      = True
+   allow_reuse_address = True
+
+   def __init__(self, tupleAddress, oStore):
+      self.oStore = oStore
+      super().__init__(tupleAddress, CAgentHandler)
+
+# eof class CAggregatorServer():
+
+# --------------------------------------------------------------------------------------------------------------
+
+def start_aggregator(sListenAddress=DEFAULT_LISTEN_ADDRESS, nPort=DEFAULT_PORT, sAgentLabel=DEFAULT_AGENT_LABEL):
+   """Starts the aggregator (TCP server for the agents and http server for Prometheus) in background threads.
+Returns the TCP server, the store and the http server (with port 0 a free port is selected, see 'server_port' of the http server).
+   """
+   from prometheus_client import CollectorRegistry
+   oStore = CMetricStore(sAgentLabel)
+   oRegistry = CollectorRegistry()
+   oRegistry.register(oStore)
+   oHttpServer, oHttpThread = start_exposition_server(int(nPort), oRegistry)
+   oServer = CAggregatorServer(parse_address(sListenAddress), oStore)
+   threading.Thread(target=oServer.serve_forever, name="metric_aggregator", daemon=True).start()
+   return oServer, oStore, oHttpServer
+
+# --------------------------------------------------------------------------------------------------------------
+
+def main(listArgs=None):
+   import argparse
+   oParser = argparse.ArgumentParser(description="Aggregates the metrics of prometheus_interface agents into one exposition for Prometheus")
+   oParser.add_argument("--listen", default=DEFAULT_LISTEN_ADDRESS, help=f"address the agents connect to (default: {DEFAULT_LISTEN_ADDRESS})")
+   oParser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port of the http server scraped by Prometheus (default: {DEFAULT_PORT})")
+   oParser.add_argument("--agent-label", default=DEFAULT_AGENT_LABEL, help=f"label identifying the agent of a series; empty: merge all agents (default: {DEFAULT_AGENT_LABEL})")
+   oArgs = oParser.parse_args(listArgs)
+
+   try:
+      oServer, oStore, oHttpServer = start_aggregator(oArgs.listen, oArgs.port, oArgs.agent_label)
+   except (OSError, ValueError) as ex:
+      printerror(str(ex))
+      return ERROR
+
+   sys.stderr.write(f"Aggregator listening on '{oArgs.listen}', metrics provided on port {oHttpServer.server_port}\n")
+   try:
+      threading.Event().wait()
+   except KeyboardInterrupt:
+      pass
+   oServer.shutdown()
+   oHttpServer.shutdown()
+   return SUCCESS
+
+# --------------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+   sys.exit(main())
@@ -15,19 +15,54 @@
 # XC-HWP/ESW3-Queckenstedt
 
 # -- import standard Python modules
-import pickle, os, time, random
-import dotdict
-
-# -- import Prometheus interface
-from prometheus_client import start_http_server, Gauge, Counter, Info, Summary, Histogram
+import os, time, atexit, threading
 
 # -- import Robotframework API
 from robot.api.deco import keyword, library # required when using @keyword, @library decorators
-from robot.libraries.BuiltIn import BuiltIn
 
-# -- import some helpers
-from PythonExtensionsCollection.String.CString import CString
-from PythonExtensionsCollection.Utils.CUtils import *
+# The Prometheus Python client library and further helpers are imported when they are used for the first time.
+# This keeps the import of this library cheap, e.g. for libdoc and dry runs.
+
+# -- import helper modules of this package (relative in case of the package is imported, otherwise from the
+#    same folder, like Robot Framework does when importing this library by path)
+try:
+   from .CMetricFileSink import CMetricFileSink
+   from .CFileServiceDiscovery import CFileServiceDiscovery
+   from .CShardedValue import shard_series
+   from .CBulkObservation import load_values, observe_histogram_many, observe_summary_many
+   from .CMeasurementIngest import CMeasurementIngest, parse_mappings, merge_aggregate, apply_aggregate, DEFAULT_CHUNK_BYTES
+   from .generate_recording_rules import generate, DEFAULT_LEVELS, DEFAULT_QUANTILES, DEFAULT_RATE_INTERVAL
+   from .CEnumCollector import CEnumCollector
+   from .CGaugeWindowCollector import CGaugeWindowCollector
+   from .CConsistentRegistry import CSeqLock, CConsistentRegistry
+   from .CMetricAgent import CMetricAgent
+   from .COtlpExporter import COtlpExporter, DEFAULT_ENDPOINT as DEFAULT_OTLP_ENDPOINT
+   from .CStackSampler import CStackSampler, DEFAULT_HZ as DEFAULT_PROFILING_HZ, DEFAULT_TOP_N as DEFAULT_PROFILING_TOP_N
+   from .CGcInstrumentation import CGcInstrumentation, DEFAULT_TOP_N as DEFAULT_GC_TOP_N
+   from .CSelfInstrumentation import CSelfInstrumentation
+   from .CMetricRules import CMetricRule, CMetricRules
+   from .CPromQL import CLabelIndex, CQueryEngine
+   from .CExposition import start_exposition_server
+   from .CColumnarStore import CColumnarMetric, CLabelInterner
+except ImportError:
+   from CMetricFileSink import CMetricFileSink
+   from CFileServiceDiscovery import CFileServiceDiscovery
+   from CShardedValue import shard_series
+   from CBulkObservation import load_values, observe_histogram_many, observe_summary_many
+   from CMeasurementIngest import CMeasurementIngest, parse_mappings, merge_aggregate, apply_aggregate, DEFAULT_CHUNK_BYTES
+   from generate_recording_rules import generate, DEFAULT_LEVELS, DEFAULT_QUANTILES, DEFAULT_RATE_INTERVAL
+   from CEnumCollector import CEnumCollector
+   from CGaugeWindowCollector import CGaugeWindowCollector
+   from CConsistentRegistry import CSeqLock, CConsistentRegistry
+   from CMetricAgent import CMetricAgent
+   from COtlpExporter import COtlpExporter, DEFAULT_ENDPOINT as DEFAULT_OTLP_ENDPOINT
+   from CStackSampler import CStackSampler, DEFAULT_HZ as DEFAULT_PROFILING_HZ, DEFAULT_TOP_N as DEFAULT_PROFILING_TOP_N
+   from CGcInstrumentation import CGcInstrumentation, DEFAULT_TOP_N as DEFAULT_GC_TOP_N
+   from CSelfInstrumentation import CSelfInstrumentation
+   from CMetricRules import CMetricRule, CMetricRules
+   from CPromQL import CLabelIndex, CQueryEngine
+   from CExposition import start_exposition_server
+   from CColumnarStore import CColumnarMetric, CLabelInterner
 
 # --------------------------------------------------------------------------------------------------------------
 # this interface library
@@ -39,9 +74,20 @@ THISMODULENAME = "prometheus_interface.py"
 THISMODULE     = f"{THISMODULENAME} v. {LIBRARY_VERSION} / {LIBRARY_VERSION_DATE}"
 #
 DEFAULT_PORT = 8000
+AUTO_PORT    = "auto" # 'auto' (any free port) or 'auto:<first port>-<last port>' (first free port within range)
 #
 DEFAULT_MESSAGE_LEVEL = "INFO"
 #
+INFO_CACHE_SIZE = 1024 # maximum number of parsed info strings kept
+#
+ACCUMULATION_MODES = ("locked", "sharded")
+#
+BACKENDS = ("prometheus", "otlp")
+#
+GAUGE_MODES = ("last", "window")
+#
+STORAGES = ("client", "columnar")
+#
 # --------------------------------------------------------------------------------------------------------------
 # 
 @library
@@ -57,7 +103,138 @@ For this purpose the 'Prometheus Python client library' is used.
    # --------------------------------------------------------------------------------------------------------------
    #TM***
 
-   def __init__(self, port_number=DEFAULT_PORT, message_level=DEFAULT_MESSAGE_LEVEL):
+   def __init__(self, port_number=DEFAULT_PORT, message_level=DEFAULT_MESSAGE_LEVEL, file_sink_directory=None,
+                file_sd_directory=None, file_sd_labels=None, accumulation_mode="locked", agent_address=None, agent_interval=1.0,
+                backend="prometheus", otlp_endpoint=DEFAULT_OTLP_ENDPOINT, otlp_interval=10.0, otlp_temporality="cumulative",
+                self_instrumentation=True, const_labels=None, storage="client"):
+      """
+**Arguments:**
+
+* ``port_number``
+
+  The port number of the http server providing the metrics to Prometheus. The http server is started with the first metric added
+  or explicitly with the keyword ``start_exporter``.
+
+  With ``auto`` any free port is used, with ``auto:<first port>-<last port>`` the first free port within the given range is used.
+  The port really used is returned by ``get_port_number`` (after the http server has been started).
+
+  With ``None`` no http server is started (e.g. in agent mode, see ``agent_address``).
+
+  / *Condition*: optional / *Type*: int or str / *Default*: 8000 /
+
+* ``message_level``
+
+  The message level of this library
+
+  / *Condition*: optional / *Type*: str / *Default*: "INFO" /
+
+* ``file_sink_directory``
+
+  If defined, all updated series are additionally written to chunked columnar files within this folder (see ``start_file_sink``)
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+* ``file_sd_directory``
+
+  If defined, the http server is announced as scrape target by a target file within this folder, usable by the Prometheus
+  file based service discovery (``file_sd_configs``). The target file is removed at the end of the execution.
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+* ``file_sd_labels``
+
+  A semicolon separated list of additional labels (``name=value``) of the scrape target. The labels ``host``, ``pid``
+  and ``suite`` are added automatically.
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+* ``accumulation_mode``
+
+  ``locked``: every update of counters, summaries and histograms is protected by a lock of the Prometheus Python client library.
+
+  ``sharded``: every thread accumulates its updates of counters, summaries and histograms in an own shard without any lock.
+  The shards are merged when the values are read (at scrape time). Recommended in case of many threads update the same series
+  (e.g. Robot Framework THREAD blocks).
+
+  / *Condition*: optional / *Type*: str / *Default*: "locked" /
+
+* ``agent_address``
+
+  If defined (``<host>:<port>``), this library acts as agent: all updates are forwarded as batched deltas to a central aggregator
+  (``python -m PrometheusInterface.metric_aggregator``) over one persistent TCP connection. Prometheus scrapes the aggregator only.
+  In case of the aggregator is not reachable, the updates are kept and sent after reconnecting (every batch is acknowledged
+  by the aggregator, therefore no increment is lost or counted twice). Removed metrics and series are removed by the aggregator, too.
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+* ``agent_interval``
+
+  The interval (in seconds) the batches are sent to the aggregator with
+
+  / *Condition*: optional / *Type*: float / *Default*: 1.0 /
+
+* ``backend``
+
+  ``prometheus``: the metrics are provided by the http server and scraped by Prometheus.
+
+  ``otlp``: the metrics are sent periodically to an OpenTelemetry collector (OTLP/HTTP, protobuf encoding). No http server is started.
+  The keywords are the same for both backends.
+
+  / *Condition*: optional / *Type*: str / *Default*: "prometheus" /
+
+* ``otlp_endpoint``
+
+  The base URL of the OpenTelemetry collector (backend ``otlp``); the metrics are sent to ``<otlp_endpoint>/v1/metrics``
+
+  / *Condition*: optional / *Type*: str / *Default*: "http://localhost:4318" /
+
+* ``otlp_interval``
+
+  The interval (in seconds) the metrics are sent to the OpenTelemetry collector with (backend ``otlp``)
+
+  / *Condition*: optional / *Type*: float / *Default*: 10.0 /
+
+* ``otlp_temporality``
+
+  ``cumulative``: all series are sent with their total values. ``delta``: only the series updated since the last export are sent,
+  counters and histograms with their increments, summaries with their total values (OTLP summaries have no temporality; backend ``otlp``).
+
+  / *Condition*: optional / *Type*: str / *Default*: "cumulative" /
+
+* ``self_instrumentation``
+
+  If True, metrics about this library itself are provided together with the user metrics: the duration of the update keywords
+  (``prometheus_interface_keyword_duration_seconds``), the duration of the collection per scrape (``prometheus_interface_scrape_duration_seconds``),
+  the number of series per metric (``prometheus_interface_series``) and the approximate memory held by them (``prometheus_interface_series_bytes``).
+
+  / *Condition*: optional / *Type*: bool / *Default*: True /
+
+* ``const_labels``
+
+  A semicolon separated list of constant labels (``name=value``, e.g. ``room=Room_1;testbench=Testbench 1``). The values of these labels
+  are added automatically to the labels of every metric having labels with these names, therefore the keywords only need the remaining labels
+  (see also ``push_label_context``).
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+* ``storage``
+
+  ``client``: every series is a label child of the Prometheus Python client library.
+
+  ``columnar``: counters and gauges (gauge mode ``last``) with labels keep the values of all series in columns, the series are
+  thin handles and the label values are stored only once. Recommended in case of hundreds of thousands of series (less memory).
+  Not possible together with accumulation mode ``sharded``.
+
+  / *Condition*: optional / *Type*: str / *Default*: "client" /
+      """
+      if backend not in BACKENDS:
+         raise ValueError(f"Invalid backend '{backend}'; expected one of: {', '.join(BACKENDS)}")
+      if accumulation_mode not in ACCUMULATION_MODES:
+         raise ValueError(f"Invalid accumulation mode '{accumulation_mode}'; expected one of: {', '.join(ACCUMULATION_MODES)}")
+      if storage not in STORAGES:
+         raise ValueError(f"Invalid storage '{storage}'; expected one of: {', '.join(STORAGES)}")
+      if ( (storage == "columnar") and (accumulation_mode == "sharded") ):
+         raise ValueError("Storage 'columnar' is not possible together with accumulation mode 'sharded'")
       self.__sMessageLevel = message_level
       self.__port_number   = port_number
 
@@ -67,17 +244,94 @@ For this purpose the 'Prometheus Python client library' is used.
       self.__dictInfos      = {}
       self.__dictSummaries  = {}
       self.__dictHistograms = {}
+      self.__dictEnums      = {}
 
-      start_http_server(self.__port_number)
+      # state indices of enums: name -> state -> index
+      self.__dictEnumStates = {}
 
-      # default info metric about this interface library
-      oInfo = Info("Prometheus_interface", "Prometheus interface info")
-      dictInfo = {}
-      dictInfo['file name'] = THISMODULENAME
-      dictInfo['version']   = LIBRARY_VERSION
-      dictInfo['date']      = LIBRARY_VERSION_DATE
-      dictInfo['location']  = self.where_am_i()
-      oInfo.info(dictInfo)
+      # collectors registered instead of the metric itself: name -> collector
+      self.__dictCollectors = {}
+
+      # collectors of gauges in mode 'window': name -> collector
+      self.__dictGaugeWindows = {}
+
+      # index of all series (label children) of all metrics: name -> tuple of label values -> live series
+      self.__dictSeries = {}
+
+      # inverted label index of all series (see 'query_metrics'): name -> label -> label value -> series
+      self.__oLabelIndex  = CLabelIndex()
+      self.__oQueryEngine = CQueryEngine(self.__oLabelIndex)
+
+      # accumulation of counters, summaries and histograms in shards per thread
+      self.__bSharded = (accumulation_mode == "sharded")
+
+      # columnar storage of counters and gauges with labels, and the label values stored only once (storage 'columnar')
+      self.__bColumnar    = (storage == "columnar")
+      self.__oLabelValues = CLabelInterner() if self.__bColumnar is True else None
+
+      # label names of all metrics
+      self.__dictLabelNames = {}
+
+      # parsed content of infos: raw info string -> dictionary
+      self.__dictParsedInfos = {}
+
+      # context labels: constant labels of the library and labels pushed per thread (see 'push_label_context')
+      self.__dictConstLabels = {}
+      if const_labels is not None:
+         for sLabel in const_labels.split(';'):
+            if "=" not in sLabel:
+               raise ValueError(f"Syntax error in parameter 'const_labels': missing delimiter '=' in '{sLabel}'")
+            sLabelName, sLabelValue = sLabel.split('=', 1)
+            self.__dictConstLabels[sLabelName.strip()] = sLabelValue.strip()
+      self.__oLabelContext = threading.local()
+
+      # optional file sink for offline analysis
+      self.__oFileSink = None
+      if file_sink_directory is not None:
+         self.__oFileSink = CMetricFileSink(file_sink_directory)
+         atexit.register(self.__oFileSink.close)
+
+      # optional agent mode, forwarding all updates to a central aggregator
+      self.__oAgent = None
+      if agent_address is not None:
+         self.__oAgent = CMetricAgent(agent_address, float(agent_interval))
+         atexit.register(self.__oAgent.close)
+
+      # optional OTLP backend, sending all series to an OpenTelemetry collector (instead of the http server)
+      self.__oOtlpExporter = None
+      if backend == "otlp":
+         self.__oOtlpExporter = COtlpExporter(otlp_endpoint, float(otlp_interval), otlp_temporality, sScopeVersion=LIBRARY_VERSION)
+         atexit.register(self.__oOtlpExporter.close)
+
+      # optional metrics about this library itself
+      self.__oSelfInstrumentation = None
+      if str(self_instrumentation).strip().lower() not in ("false", "0", "off", "none"):
+         self.__oSelfInstrumentation = CSelfInstrumentation(self.__get_series_index)
+
+      # the http server is started with the first metric added (or explicitly with 'start_exporter')
+      self.__bExporterStarted = False
+      self.__oExporterLock    = threading.Lock()
+
+      # metric transactions: updates staged per thread and published together (sequence lock, consistent scrapes)
+      self.__oTransaction = threading.local()
+      self.__oSeqLock     = CSeqLock()
+
+      # optional sampling profiler (see 'start_profiling'), and the collapsed stacks file written when the profiler is stopped
+      self.__oProfiler      = None
+      self.__sProfileFile   = None
+      self.__bProfilerAtExit = False # exit handler stopping a running profiler registered
+
+      # optional instrumentation of the garbage collector and of the allocations (see 'start_gc_instrumentation')
+      self.__oGcInstrumentation = None
+
+      # rules evaluated with every update of a series (see 'add_metric_rule'); created with the first rule
+      self.__oRules = None
+      self.__oRuleViolations = threading.local() # violations (action 'fail') caused by the updates of the current keyword of a thread
+
+      # optional file based service discovery
+      self.__sFileSdDirectory = file_sd_directory
+      self.__sFileSdLabels    = file_sd_labels
+      self.__oFileSd          = None
 
 
    def __del__(self):
@@ -85,6 +339,14 @@ For this purpose the 'Prometheus Python client library' is used.
       del self.__dictGauges
       del self.__dictInfos
       del self.__dictSummaries
+      del self.__dictHistograms
+      del self.__dictEnums
+      del self.__dictEnumStates
+      del self.__dictCollectors
+      del self.__dictGaugeWindows
+      del self.__dictSeries
+      del self.__dictLabelNames
+      del self.__dictParsedInfos
 
    # --------------------------------------------------------------------------------------------------------------
 
@@ -103,6 +365,360 @@ For this purpose the 'Prometheus Python client library' is used.
          pass
       return None # not int and not float
 
+   def __parse_info(self, name, info):
+      """Returns the content of an info as dictionary (and an error message or None).
+The info is given either as dictionary or as string 'key:value;key:value'. Within the string the characters
+':', ';' and '\\' can be escaped by '\\'. Parsed strings are cached, therefore every string is parsed only once.
+      """
+      if isinstance(info, dict):
+         dictInfo = {}
+         for param_name, param_value in info.items():
+            param_name  = str(param_name).strip()
+            param_value = str(param_value).strip()
+            if param_name == "":
+               return None, f"Syntax error in parameter 'info' of '{name}': parameter name is empty"
+            if param_value == "":
+               return None, f"Syntax error in parameter 'info' of '{name}': parameter value is empty"
+            dictInfo[param_name] = param_value
+         return dictInfo, None
+      info = str(info)
+      dictInfo = self.__dictParsedInfos.get(info)
+      if dictInfo is not None:
+         return dictInfo, None
+      if "\\" in info:
+         # split at unescaped delimiters only; the escape character is removed
+         listSplitparts = []
+         listParts = [""]
+         bEscaped = False
+         for sChar in info:
+            if bEscaped is True:
+               listParts[-1] = listParts[-1] + sChar
+               bEscaped = False
+            elif sChar == "\\":
+               bEscaped = True
+            elif sChar == ":":
+               listParts.append("")
+            elif sChar == ";":
+               listSplitparts.append(listParts)
+               listParts = [""]
+            else:
+               listParts[-1] = listParts[-1] + sChar
+         if bEscaped is True:
+            return None, f"Syntax error in parameter 'info' of '{name}': incomplete escape sequence"
+         listSplitparts.append(listParts)
+      else:
+         listSplitparts = [splitpart.split(':') for splitpart in info.split(';')]
+      dictInfo = {}
+      for list_splitparts2 in listSplitparts:
+         if len(list_splitparts2) != 2:
+            return None, f"Syntax error in parameter 'info' of '{name}': missing delimiter"
+         param_name = list_splitparts2[0].strip()
+         if param_name == "":
+            return None, f"Syntax error in parameter 'info' of '{name}': parameter name is empty"
+         param_value = list_splitparts2[1].strip()
+         if param_value == "":
+            return None, f"Syntax error in parameter 'info' of '{name}': parameter value is empty"
+         dictInfo[param_name] = param_value
+      if len(self.__dictParsedInfos) >= INFO_CACHE_SIZE:
+         self.__dictParsedInfos.clear()
+      self.__dictParsedInfos[info] = dictInfo
+      return dictInfo, None
+
+   def __get_label_values(self, labels):
+      """Splits a semicolon separated list of labels into a tuple of label values
+      """
+      if labels is None:
+         return ()
+      return tuple(label.strip() for label in labels.split(';'))
+
+   def __get_label_context(self):
+      """Returns the label context of the current thread (stack of pushed labels, effective labels, generation and the cached prefixes)
+      """
+      oContext = self.__oLabelContext
+      if getattr(oContext, 'listStack', None) is None:
+         oContext.listStack    = []
+         oContext.dictLabels   = dict(self.__dictConstLabels) # constant labels, overwritten by the pushed labels
+         oContext.nGeneration  = 0                            # incremented with every push and pop
+         oContext.dictPrefixes = {}                           # name -> (generation, label names, prefix)
+      return oContext
+
+   def __get_prefix(self, name, oContext):
+      """Returns the prefix of a metric for the current label context: (number of labels to be given, tuple of leading context values
+or None, list of context values with None for every label to be given). Returns None, in case of no label of the metric is part of the context.
+The prefix is computed once per metric and generation of the context.
+      """
+      tupleLabelNames = self.__dictLabelNames[name]
+      tuplePrefix = oContext.dictPrefixes.get(name)
+      if ( (tuplePrefix is not None) and (tuplePrefix[0] == oContext.nGeneration) and (tuplePrefix[1] is tupleLabelNames) ):
+         return tuplePrefix[2]
+      listTemplate = [oContext.dictLabels.get(sLabelName) for sLabelName in tupleLabelNames]
+      nGiven = listTemplate.count(None)
+      oPrefix = None
+      if nGiven < len(tupleLabelNames):
+         tupleLeading = tuple(listTemplate[:len(listTemplate) - nGiven])
+         if None in tupleLeading:
+            tupleLeading = None # context labels are not the leading labels of the metric
+         oPrefix = (nGiven, tupleLeading, listTemplate)
+      oContext.dictPrefixes[name] = (oContext.nGeneration, tupleLabelNames, oPrefix)
+      return oPrefix
+
+   def __resolve_label_values(self, name, labels):
+      """Splits a semicolon separated list of labels of a metric into a tuple of label values and adds the values of the context labels
+(constant labels and labels pushed with 'push_label_context'). In case of all labels are given, the given labels are used.
+      """
+      tupleLabelValues = self.__get_label_values(labels)
+      if ( (len(self.__dictConstLabels) == 0) and not getattr(self.__oLabelContext, 'listStack', None) ):
+         return tupleLabelValues # no context labels
+      oPrefix = self.__get_prefix(name, self.__get_label_context())
+      if ( (oPrefix is None) or (len(tupleLabelValues) != oPrefix[0]) ):
+         return tupleLabelValues
+      nGiven, tupleLeading, listTemplate = oPrefix
+      if tupleLeading is not None:
+         return tupleLeading + tupleLabelValues
+      iterLabelValues = iter(tupleLabelValues)
+      return tuple(next(iterLabelValues) if sLabelValue is None else sLabelValue for sLabelValue in listTemplate)
+
+   def __get_series(self, name, oMetric, tupleLabelValues):
+      """Returns the live series of a metric for the given label values and creates it, if not yet existing.
+Every new series is added to the series index, therefore the lookup is independent of the number of existing series.
+Only a metric without labels is its own series; a wrong number of label values raises before anything is stored.
+      """
+      dictMetricSeries = self.__dictSeries[name]
+      oSeries = dictMetricSeries.get(tupleLabelValues)
+      if oSeries is None:
+         nLabels = len(self.__dictLabelNames[name])
+         if len(tupleLabelValues) != nLabels:
+            raise ValueError(f"Incorrect label count (expected {nLabels}, got {len(tupleLabelValues)})")
+         if self.__oLabelValues is not None:
+            tupleLabelValues = self.__oLabelValues.intern(tupleLabelValues)
+         if nLabels == 0:
+            oSeries = oMetric
+         elif isinstance(oMetric, CColumnarMetric):
+            oSeries = oMetric.series(tupleLabelValues) # the interned label values are shared by the series index and the columns
+         else:
+            oSeries = oMetric.labels(*tupleLabelValues)
+         if self.__bSharded is True:
+            shard_series(oSeries)
+         dictMetricSeries[tupleLabelValues] = oSeries
+         self.__oLabelIndex.add(name, tupleLabelValues)
+      return oSeries
+
+   def __start_exporter(self):
+      """Starts the http server providing the metrics to Prometheus, if not yet started
+      """
+      if self.__bExporterStarted is True:
+         return
+      with self.__oExporterLock:
+         if self.__bExporterStarted is True:
+            return
+         from prometheus_client import Info
+         self.__port_number = self.__start_http_server()
+         if ( (self.__sFileSdDirectory is not None) and (self.__port_number is not None) ):
+            self.__register_file_sd()
+         # default info metric about this interface library
+         oInfo = Info("Prometheus_interface", "Prometheus interface info")
+         dictInfo = {}
+         dictInfo['file name'] = THISMODULENAME
+         dictInfo['version']   = LIBRARY_VERSION
+         dictInfo['date']      = LIBRARY_VERSION_DATE
+         dictInfo['location']  = self.where_am_i()
+         oInfo.info(dictInfo)
+         if self.__oSelfInstrumentation is not None:
+            from prometheus_client import REGISTRY
+            REGISTRY.register(self.__oSelfInstrumentation)
+         self.__bExporterStarted = True
+
+   def __start_http_server(self):
+      """Starts the http server and returns the port number really used (or None, in case of no http server is wanted)
+      """
+      sPortNumber = str(self.__port_number).strip().lower()
+      if ( (sPortNumber == "none") or (self.__oOtlpExporter is not None) ):
+         return None
+      from prometheus_client import REGISTRY
+      fnObserve = None
+      if self.__oSelfInstrumentation is not None:
+         fnObserve = self.__oSelfInstrumentation.observe_scrape # collection and encoding, measured by the exposition app
+      oConsistentRegistry = CConsistentRegistry(REGISTRY, self.__oSeqLock)
+      if sPortNumber == AUTO_PORT:
+         listPortNumbers = [0] # the operating system selects a free port
+      elif sPortNumber.startswith(f"{AUTO_PORT}:"):
+         listRange = sPortNumber[len(AUTO_PORT) + 1:].split('-')
+         if len(listRange) != 2:
+            raise ValueError(f"Invalid port range '{self.__port_number}'; expected '{AUTO_PORT}:<first port>-<last port>'")
+         listPortNumbers = range(int(listRange[0]), int(listRange[1]) + 1)
+      else:
+         listPortNumbers = [int(self.__port_number)]
+      oLastError = None
+      for nPortNumber in listPortNumbers:
+         try:
+            oServer, oServerThread = start_exposition_server(nPortNumber, oConsistentRegistry, fnObserve=fnObserve, fnPublish=self.__publish_scrape)
+         except OSError as ex:
+            oLastError = ex # port already in use; binding is the check, therefore no race with other processes
+            continue
+         if nPortNumber == 0:
+            nPortNumber = oServer.server_port
+         return nPortNumber
+      raise OSError(f"No free port found for port number '{self.__port_number}' ({oLastError})")
+
+   def __publish_scrape(self, listMetrics):
+      """Is called with the metrics provided by every scrape of the http server (gauges in mode 'window' are reset)
+      """
+      for oCollector in list(self.__dictGaugeWindows.values()):
+         oCollector.publish(listMetrics)
+
+   def __register_file_sd(self):
+      """Writes the target file for the Prometheus file based service discovery
+      """
+      import socket
+      dictLabels = {}
+      dictLabels['host'] = socket.gethostname()
+      dictLabels['pid']  = os.getpid()
+      try:
+         from robot.libraries.BuiltIn import BuiltIn
+         dictLabels['suite'] = BuiltIn().get_variable_value("${SUITE NAME}")
+      except Exception:
+         pass # Robot Framework not running
+      if self.__sFileSdLabels is not None:
+         for sLabel in self.__sFileSdLabels.split(';'):
+            if "=" not in sLabel:
+               raise ValueError(f"Syntax error in parameter 'file_sd_labels': missing delimiter '=' in '{sLabel}'")
+            sLabelName, sLabelValue = sLabel.split('=', 1)
+            dictLabels[sLabelName.strip()] = sLabelValue.strip()
+      self.__oFileSd = CFileServiceDiscovery(self.__sFileSdDirectory)
+      self.__oFileSd.register(None, self.__port_number, dictLabels)
+      atexit.register(self.__oFileSd.unregister)
+
+   def __notify_update(self, name, tupleLabelValues, oSeries):
+      """Is called after every update of a series
+      """
+      if self.__oFileSink is not None:
+         self.__oFileSink.append(name, self.__dictLabelNames[name], tupleLabelValues, oSeries._samples())
+      if self.__oAgent is not None:
+         self.__oAgent.notify(name, tupleLabelValues, oSeries)
+      if self.__oOtlpExporter is not None:
+         self.__oOtlpExporter.notify(name, tupleLabelValues, oSeries)
+      if self.__oRules is not None:
+         listViolations = self.__oRules.evaluate(name, tupleLabelValues, oSeries)
+         if len(listViolations) > 0:
+            oContext = self.__oRuleViolations
+            oContext.listViolations = getattr(oContext, 'listViolations', []) + listViolations
+
+   def __report_rule_violations(self, success, result):
+      """Returns the result of an update keyword; in case of the updates of the keyword violate metric rules with action 'fail',
+the keyword is not successful and the violations are added to the result
+      """
+      if self.__oRules is None:
+         return success, result
+      listViolations = getattr(self.__oRuleViolations, 'listViolations', None)
+      if not listViolations:
+         return success, result
+      self.__oRuleViolations.listViolations = []
+      return False, "\n".join([result] + listViolations)
+
+   def __update(self, name, tupleLabelValues, oSeries, fnUpdate, *args, bAtomic=False):
+      """Updates a series (fnUpdate(*args)) and returns the result of fnUpdate.
+Within a metric transaction the update is only staged (and None is returned); it is applied with the commit of the transaction.
+With bAtomic an update changing several fields of the series (e.g. buckets, count and sum of a batch of observations) is applied
+as write of the sequence lock like a committed transaction, therefore a consistent scrape never provides a partially applied update.
+      """
+      listStaged = getattr(self.__oTransaction, 'listStaged', None)
+      if listStaged is not None:
+         listStaged.append((name, tupleLabelValues, oSeries, fnUpdate, args))
+         return None
+      if bAtomic is True:
+         self.__oSeqLock.begin_write()
+         try:
+            oResult = fnUpdate(*args)
+         finally:
+            self.__oSeqLock.end_write([(oSeries, tupleLabelValues, name not in self.__dictCollectors)])
+      else:
+         oResult = fnUpdate(*args)
+      self.__notify_update(name, tupleLabelValues, oSeries)
+      return oResult
+
+   def __observe_keyword(self, sKeyword, nStartTime):
+      """Observes the duration of a keyword started at nStartTime (time.perf_counter_ns), in case of the self-instrumentation is switched on
+      """
+      if self.__oSelfInstrumentation is not None:
+         self.__oSelfInstrumentation.observe_keyword(sKeyword, nStartTime)
+
+   def __get_series_index(self):
+      """Returns all metrics as list of (name, type, dictionary of series: label values -> series); used by the self-instrumentation
+      """
+      listMetrics = []
+      for sType, dictMetrics in (("counter", self.__dictCounter), ("gauge", self.__dictGauges), ("info", self.__dictInfos),
+                                 ("summary", self.__dictSummaries), ("histogram", self.__dictHistograms), ("stateset", self.__dictEnums)):
+         for sName in list(dictMetrics):
+            listMetrics.append((sName, sType, self.__dictSeries.get(sName, {})))
+      return listMetrics
+
+   def __set_state(self, oSeries, nStateIndex):
+      """Sets the state index of an enum series
+      """
+      with oSeries._lock:
+         oSeries._value = nStateIndex
+
+   def __get_metric_dict(self, name):
+      """Returns the dictionary containing the metric with the given name (or None, if the metric is not defined)
+      """
+      for dictMetrics in (self.__dictCounter, self.__dictGauges, self.__dictInfos, self.__dictSummaries, self.__dictHistograms, self.__dictEnums):
+         if name in dictMetrics:
+            return dictMetrics
+      return None
+
+   def __check_label_count(self, name, sType, tupleLabelValues):
+      """Returns an error message, in case of the number of label values does not match the labels of the metric, otherwise None
+      """
+      tupleLabelNames = self.__dictLabelNames[name]
+      if len(tupleLabelValues) == len(tupleLabelNames):
+         return None
+      return f"{sType} '{name}' expects {len(tupleLabelNames)} labels ('{';'.join(tupleLabelNames)}'), got {len(tupleLabelValues)}"
+
+   def __find_series(self, name, oMetric, tupleLabelValues):
+      """Returns the live series of a metric for the given label values (without creating it), or None if not existing.
+The number of label values has to be checked before ('__check_label_count'); without label values the metric itself is returned.
+      """
+      if len(tupleLabelValues) == 0:
+         return oMetric
+      return self.__dictSeries[name].get(tupleLabelValues)
+
+   def __get_metric_descriptions(self):
+      """Returns all metrics of this library as list of dictionaries (keys: 'name', 'type', 'description', 'labels')
+      """
+      listMetrics = []
+      for sType, dictMetrics in (("counter", self.__dictCounter), ("gauge", self.__dictGauges), ("info", self.__dictInfos),
+                                 ("summary", self.__dictSummaries), ("histogram", self.__dictHistograms), ("stateset", self.__dictEnums)):
+         for sName, oMetric in dictMetrics.items():
+            listMetrics.append({'name': oMetric._name, 'type': sType, 'description': oMetric._documentation, 'labels': list(self.__dictLabelNames[sName])})
+      return listMetrics
+
+   def __stop_profiler(self, collapsed_file=None):
+      """Stops the sampling profiler and writes the collapsed stacks file; returns the statistics of the profiler
+and the number of stacks written (or None, in case of no file is written)
+      """
+      oProfiler = self.__oProfiler
+      oProfiler.stop()
+      if collapsed_file is None:
+         collapsed_file = self.__sProfileFile
+      nStacks = None
+      if collapsed_file is not None:
+         nStacks = oProfiler.write_collapsed(collapsed_file)
+      return oProfiler.get_statistics(), nStacks
+
+   def __stop_running_profiler(self):
+      """Stops the sampling profiler at exit, in case of still running (and writes the collapsed stacks file)
+      """
+      if ( (self.__oProfiler is not None) and (self.__oProfiler.is_running() is True) ):
+         self.__stop_profiler()
+
+   def __get_samples(self, oSeries):
+      """Returns the samples of a single series as dictionary: sample name suffix -> list of (sample labels, value)
+      """
+      dictSamples = {}
+      for oSample in oSeries._samples():
+         dictSamples.setdefault(oSample.name, []).append((oSample.labels, oSample.value))
+      return dictSamples
+
    # --------------------------------------------------------------------------------------------------------------
    # -- library informations
    # --------------------------------------------------------------------------------------------------------------
@@ -124,15 +740,51 @@ For this purpose the 'Prometheus Python client library' is used.
    def where_am_i(self):
       """Returns path to this interface library
       """
+      from PythonExtensionsCollection.String.CString import CString
       location = CString.NormalizePath(os.path.dirname(os.path.abspath(__file__)))
       return location
 
    @keyword
    def get_port_number(self):
-      """Returns the port number assigned to this instance of the library
+      """Returns the port number assigned to this instance of the library. In case of the port number is selected automatically (``auto``),
+the port number really used is available after the http server has been started.
       """
       return self.__port_number
 
+   @keyword
+   def start_exporter(self):
+      """This keyword starts the http server providing the metrics to Prometheus. Usually this is not necessary, because
+the http server is started automatically with the first metric added.
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if self.__bExporterStarted is True:
+         result = f"Exporter already started (port: {self.__port_number})"
+         return success, result
+      try:
+         self.__start_exporter()
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      success = True
+      result  = f"Exporter started (port: {self.__port_number})"
+      return success, result
+
 
    # --------------------------------------------------------------------------------------------------------------
    # -- prometheus metric type 'Info'
@@ -188,6 +840,8 @@ For this purpose the 'Prometheus Python client library' is used.
       if name in self.__dictInfos:
          result = f"An info with name '{name}' is already defined"
          return success, result
+      self.__start_exporter()
+      from prometheus_client import Info
       oInfo = None
       if labels is None:
          oInfo = Info(name, description)
@@ -199,6 +853,8 @@ For this purpose the 'Prometheus Python client library' is used.
             listLabelNames.append(label)
          oInfo = Info(name, description, listLabelNames)
       self.__dictInfos[name] = oInfo
+      self.__dictLabelNames[name] = self.__get_label_values(labels)
+      self.__dictSeries[name] = {}
       success = True
       listResults = []
       listResults.append(f"Info '{name}' added")
@@ -221,9 +877,13 @@ For this purpose the 'Prometheus Python client library' is used.
 
 * ``info``
 
-  The info itself (every info is a key-value information).
+  The info itself (every info is a key-value information): either a dictionary or a string ``key:value;key:value``.
+  Within the string the characters ``:``, ``;`` and ``\\`` can be part of keys and values, when they are escaped by ``\\``
+  (e.g. ``url:http\\://localhost\\:8000``).
+
+  In case of the content of the info is unchanged, the info is not updated again.
 
-  / *Condition*: required / *Type*: dict /
+  / *Condition*: required / *Type*: dict or str /
 
 * ``labels``
 
@@ -247,6 +907,7 @@ For this purpose the 'Prometheus Python client library' is used.
       """
       success = False
       result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
@@ -256,43 +917,87 @@ For this purpose the 'Prometheus Python client library' is used.
       if name not in self.__dictInfos:
          result = f"Info '{name}' not defined"
          return success, result
-      dictInfo = {}
-      list_splitparts = info.split(';')
-      for splitpart in list_splitparts:
-         splitpart = splitpart.strip()
-         list_splitparts2 = splitpart.split(':')
-         if len(list_splitparts2) != 2:
-            success = False
-            result  = "Syntax error in parameter 'info' of '{name}': missing delimiter"
-            return success, result
-         param_name = list_splitparts2[0].strip()
-         if param_name == "":
-            success = False
-            result  = "Syntax error in parameter 'info' of '{name}': parameter name is empty"
-            return success, result
-         param_value = list_splitparts2[1].strip()
-         if param_value == "":
-            success = False
-            result  = "Syntax error in parameter 'info' of '{name}': parameter value is empty"
-            return success, result
-         dictInfo[param_name] = str(param_value)
-      oInfo = self.__dictInfos[name]
-      if labels is None:
-         oInfo.info(dictInfo)
-      else:
-         labellist = labels.split(';')
-         listLabelValues = []
-         for label in labellist:
-            label = label.strip()
-            listLabelValues.append(label)
-         oInfo.labels(*listLabelValues).info(dictInfo)
+      dictInfo, sError = self.__parse_info(name, info)
+      if dictInfo is None:
+         success = False
+         result  = sError
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Info", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictInfos[name], tupleLabelValues)
+      bChanged = (oSeries._value != dictInfo)
+      if bChanged is True:
+         self.__update(name, tupleLabelValues, oSeries, oSeries.info, dictInfo)
       success = True
       listResults = []
-      listResults.append(f"Info '{name}' set to'{info}'")
+      if bChanged is True:
+         listResults.append(f"Info '{name}' set to '{info}'")
+      else:
+         listResults.append(f"Info '{name}' unchanged '{info}'")
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
       result = " ".join(listResults)
+      self.__observe_keyword("set_info", nStartTime)
+      return self.__report_rule_violations(success, result)
+   # eof def set_info(...):
+
+   @keyword
+   def get_info(self, name=None, labels=None):
+      """This keyword returns the current content of an info. The info has to be added with '``add_info``' before.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the info
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of labels identifying the series of the info. The order of labels must fit to the order of label names like defined in ``add_info``.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: dict /
+
+  The current content of the info (in case of ``success`` is ``True``), otherwise an error message
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if name not in self.__dictInfos:
+         result = f"Info '{name}' not defined"
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Info", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__find_series(name, self.__dictInfos[name], tupleLabelValues)
+      if oSeries is None:
+         result = f"Info '{name}' has no series with labels: '{labels}'"
+         return success, result
+      dictSamples = self.__get_samples(oSeries)
+      success = True
+      result  = dict(dictSamples['_info'][0][0])
       return success, result
+   # eof def get_info(...):
 
 
    # --------------------------------------------------------------------------------------------------------------
@@ -349,6 +1054,8 @@ For this purpose the 'Prometheus Python client library' is used.
       if name in self.__dictCounter:
          result = f"A counter with name '{name}' is already defined"
          return success, result
+      self.__start_exporter()
+      from prometheus_client import Counter, REGISTRY
       oCounter = None
       if labels is None:
          oCounter = Counter(name, description)
@@ -358,8 +1065,19 @@ For this purpose the 'Prometheus Python client library' is used.
          for label in labellist:
             label = label.strip()
             listLabelNames.append(label)
-         oCounter = Counter(name, description, listLabelNames)
+         if self.__bColumnar is True:
+            try:
+               oCounter = CColumnarMetric(name, description, listLabelNames, "counter")
+               REGISTRY.register(oCounter)
+            except Exception as ex:
+               success = False
+               result  = str(ex)
+               return success, result
+         else:
+            oCounter = Counter(name, description, listLabelNames)
       self.__dictCounter[name] = oCounter
+      self.__dictLabelNames[name] = self.__get_label_values(labels)
+      self.__dictSeries[name] = {}
       success = True
       listResults = []
       listResults.append(f"Counter '{name}' added")
@@ -409,6 +1127,7 @@ For this purpose the 'Prometheus Python client library' is used.
       """
       success = False
       result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
@@ -422,22 +1141,16 @@ For this purpose the 'Prometheus Python client library' is used.
             success = False
             result  = str(ex)
             return success, result
-      oCounter = self.__dictCounter[name]
-      if labels is None:
-         if value is None:
-            oCounter.inc()
-         else:
-            oCounter.inc(value)
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Counter", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictCounter[name], tupleLabelValues)
+      if value is None:
+         self.__update(name, tupleLabelValues, oSeries, oSeries.inc)
       else:
-         labellist = labels.split(';')
-         listLabelValues = []
-         for label in labellist:
-            label = label.strip()
-            listLabelValues.append(label)
-         if value is None:
-            oCounter.labels(*listLabelValues).inc()
-         else:
-            oCounter.labels(*listLabelValues).inc(value)
+         self.__update(name, tupleLabelValues, oSeries, oSeries.inc, value)
       success = True
       listResults = []
       listResults.append(f"Counter '{name}' incremented")
@@ -446,36 +1159,25 @@ For this purpose the 'Prometheus Python client library' is used.
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
       result = " ".join(listResults)
-      return success, result
+      self.__observe_keyword("inc_counter", nStartTime)
+      return self.__report_rule_violations(success, result)
    # eof def inc_counter(...):
 
-
-   # --------------------------------------------------------------------------------------------------------------
-   # -- prometheus metric type 'Gauge'
-   # --------------------------------------------------------------------------------------------------------------
-   #TM***
-
    @keyword
-   def add_gauge(self, name=None, description=None, labels=None):
-      """This keyword adds a new gauge. The values of existing gauges can be changed with ``set_gauge``, ``inc_gauge`` and ``dec_gauge``.
+   def get_counter_value(self, name=None, labels=None):
+      """This keyword returns the current value of a counter. The counter has to be added with '``add_counter``' before.
 
 **Arguments:**
 
 * ``name``
 
-  The name of the new gauge
-
-  / *Condition*: required / *Type*: str /
-
-* ``description``
-
-  The description of the new gauge
+  The name of the counter
 
   / *Condition*: required / *Type*: str /
 
 * ``labels``
 
-  A semicolon separated list of label names assigned to the new gauge
+  A semicolon separated list of labels identifying the series of the counter. The order of labels must fit to the order of label names like defined in ``add_counter``.
 
   / *Condition*: optional / *Type*: str  / *Default*: None /
 
@@ -489,37 +1191,153 @@ For this purpose the 'Prometheus Python client library' is used.
 
 * ``result``
 
-  / *Type*: str /
+  / *Type*: float /
 
-  The result of the computation of the keyword
+  The current value of the counter (in case of ``success`` is ``True``), otherwise an error message
       """
       success = False
       result  = "UNKNOWN"
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
-      if description is None:
-         result = "Parameter 'description' not defined"
+      if name not in self.__dictCounter:
+         result = f"Counter '{name}' not defined"
          return success, result
-      if name in self.__dictGauges:
-         result = f"A gauge with name '{name}' is already defined"
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Counter", tupleLabelValues)
+      if sError is not None:
+         result = sError
          return success, result
-      oGauge = None
-      if labels is None:
-         oGauge = Gauge(name, description)
-      else:
-         labellist = labels.split(';')
-         listLabelNames = []
+      oSeries = self.__find_series(name, self.__dictCounter[name], tupleLabelValues)
+      if oSeries is None:
+         result = f"Counter '{name}' has no series with labels: '{labels}'"
+         return success, result
+      dictSamples = self.__get_samples(oSeries)
+      success = True
+      result  = dictSamples['_total'][0][1]
+      return success, result
+   # eof def get_counter_value(...):
+
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- prometheus metric type 'Gauge'
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def add_gauge(self, name=None, description=None, labels=None, gauge_mode="last", window=None):
+      """This keyword adds a new gauge. The values of existing gauges can be changed with ``set_gauge``, ``inc_gauge`` and ``dec_gauge``.
+
+In gauge mode ``window`` additionally the minimum, maximum, sum and number of all values set within a window are provided
+(``<name>_min``, ``<name>_max``, ``<name>_sum``, ``<name>_count``), therefore peaks between two scrapes are not lost.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the new gauge
+
+  / *Condition*: required / *Type*: str /
+
+* ``description``
+
+  The description of the new gauge
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of label names assigned to the new gauge
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+* ``gauge_mode``
+
+  ``last`` (only the last value is provided) or ``window`` (additionally minimum, maximum, sum and count of the values within the window)
+
+  / *Condition*: optional / *Type*: str  / *Default*: "last" /
+
+* ``window``
+
+  Gauge mode ``window`` only: the length of a fixed window in seconds (the last completed window is provided).
+  If not defined, the window is reset by every scrape of the http server (collections not provided to a scraper keep the window).
+
+  / *Condition*: optional / *Type*: float  / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if description is None:
+         result = "Parameter 'description' not defined"
+         return success, result
+      if name in self.__dictGauges:
+         result = f"A gauge with name '{name}' is already defined"
+         return success, result
+      if gauge_mode not in GAUGE_MODES:
+         result = f"Invalid gauge mode '{gauge_mode}'; expected one of: {', '.join(GAUGE_MODES)}"
+         return success, result
+      if ( (window is not None) and (gauge_mode != "window") ):
+         result = "Parameter 'window' requires gauge mode 'window'"
+         return success, result
+      self.__start_exporter()
+      from prometheus_client import Gauge, REGISTRY
+      # in gauge mode 'window' the gauge is provided by the collector, therefore the gauge itself is not registered
+      oRegistry = REGISTRY if gauge_mode == "last" else None
+      oGauge = None
+      if labels is None:
+         oGauge = Gauge(name, description, registry=oRegistry)
+      else:
+         labellist = labels.split(';')
+         listLabelNames = []
          for label in labellist:
             label = label.strip()
             listLabelNames.append(label)
-         oGauge = Gauge(name, description, listLabelNames)
+         if ( (self.__bColumnar is True) and (gauge_mode == "last") ):
+            try:
+               oGauge = CColumnarMetric(name, description, listLabelNames, "gauge")
+               REGISTRY.register(oGauge)
+            except Exception as ex:
+               success = False
+               result  = str(ex)
+               return success, result
+         else:
+            oGauge = Gauge(name, description, listLabelNames, registry=oRegistry)
+      if gauge_mode == "window":
+         try:
+            oCollector = CGaugeWindowCollector(oGauge, self.__get_label_values(labels), window)
+            REGISTRY.register(oCollector)
+         except Exception as ex:
+            success = False
+            result  = str(ex)
+            return success, result
+         self.__dictCollectors[name]   = oCollector
+         self.__dictGaugeWindows[name] = oCollector
       self.__dictGauges[name] = oGauge
+      self.__dictLabelNames[name] = self.__get_label_values(labels)
+      self.__dictSeries[name] = {}
       success = True
       listResults = []
       listResults.append(f"Gauge '{name}' added")
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
+      if gauge_mode == "window":
+         listResults.append(f"(gauge mode 'window', {'reset by every scrape' if window is None else f'window {window} s'})")
       result = " ".join(listResults)
       return success, result
    # eof def add_gauge(...):
@@ -564,6 +1382,7 @@ For this purpose the 'Prometheus Python client library' is used.
       """
       success = False
       result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
@@ -580,23 +1399,25 @@ For this purpose the 'Prometheus Python client library' is used.
             success = False
             result  = str(ex)
             return success, result
-      oGauge = self.__dictGauges[name]
-      if labels is None:
-         oGauge.set(value)
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Gauge", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictGauges[name], tupleLabelValues)
+      oWindows = self.__dictGaugeWindows.get(name)
+      if oWindows is None:
+         self.__update(name, tupleLabelValues, oSeries, oSeries.set, value)
       else:
-         labellist = labels.split(';')
-         listLabelValues = []
-         for label in labellist:
-            label = label.strip()
-            listLabelValues.append(label)
-         oGauge.labels(*listLabelValues).set(value)
+         self.__update(name, tupleLabelValues, oSeries, oWindows.set, oSeries, value)
       success = True
       listResults = []
       listResults.append(f"Gauge '{name}' set to value '{value}'")
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
       result = " ".join(listResults)
-      return success, result
+      self.__observe_keyword("set_gauge", nStartTime)
+      return self.__report_rule_violations(success, result)
    # eof def set_gauge(...):
 
    @keyword
@@ -639,6 +1460,7 @@ For this purpose the 'Prometheus Python client library' is used.
       """
       success = False
       result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
@@ -652,22 +1474,19 @@ For this purpose the 'Prometheus Python client library' is used.
             success = False
             result  = str(ex)
             return success, result
-      oGauge = self.__dictGauges[name]
-      if labels is None:
-         if value is None:
-            oGauge.inc()
-         else:
-            oGauge.inc(value)
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Gauge", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictGauges[name], tupleLabelValues)
+      oWindows = self.__dictGaugeWindows.get(name)
+      if oWindows is not None:
+         self.__update(name, tupleLabelValues, oSeries, oWindows.inc, oSeries, 1 if value is None else value)
+      elif value is None:
+         self.__update(name, tupleLabelValues, oSeries, oSeries.inc)
       else:
-         labellist = labels.split(';')
-         listLabelValues = []
-         for label in labellist:
-            label = label.strip()
-            listLabelValues.append(label)
-         if value is None:
-            oGauge.labels(*listLabelValues).inc()
-         else:
-            oGauge.labels(*listLabelValues).inc(value)
+         self.__update(name, tupleLabelValues, oSeries, oSeries.inc, value)
       success = True
       listResults = []
       listResults.append(f"Gauge '{name}' incremented")
@@ -676,7 +1495,8 @@ For this purpose the 'Prometheus Python client library' is used.
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
       result = " ".join(listResults)
-      return success, result
+      self.__observe_keyword("inc_gauge", nStartTime)
+      return self.__report_rule_violations(success, result)
    # eof def inc_gauge(...):
 
    @keyword
@@ -719,6 +1539,7 @@ For this purpose the 'Prometheus Python client library' is used.
       """
       success = False
       result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
@@ -732,22 +1553,19 @@ For this purpose the 'Prometheus Python client library' is used.
             success = False
             result  = str(ex)
             return success, result
-      oGauge = self.__dictGauges[name]
-      if labels is None:
-         if value is None:
-            oGauge.dec()
-         else:
-            oGauge.dec(value)
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Gauge", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictGauges[name], tupleLabelValues)
+      oWindows = self.__dictGaugeWindows.get(name)
+      if oWindows is not None:
+         self.__update(name, tupleLabelValues, oSeries, oWindows.dec, oSeries, 1 if value is None else value)
+      elif value is None:
+         self.__update(name, tupleLabelValues, oSeries, oSeries.dec)
       else:
-         labellist = labels.split(';')
-         listLabelValues = []
-         for label in labellist:
-            label = label.strip()
-            listLabelValues.append(label)
-         if value is None:
-            oGauge.labels(*listLabelValues).dec()
-         else:
-            oGauge.labels(*listLabelValues).dec(value)
+         self.__update(name, tupleLabelValues, oSeries, oSeries.dec, value)
       success = True
       listResults = []
       listResults.append(f"Gauge '{name}' decremented")
@@ -756,9 +1574,65 @@ For this purpose the 'Prometheus Python client library' is used.
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
       result = " ".join(listResults)
-      return success, result
+      self.__observe_keyword("dec_gauge", nStartTime)
+      return self.__report_rule_violations(success, result)
    # eof def dec_gauge(...):
 
+   @keyword
+   def get_gauge_value(self, name=None, labels=None):
+      """This keyword returns the current value of a gauge. The gauge has to be added with '``add_gauge``' before.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the gauge
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of labels identifying the series of the gauge. The order of labels must fit to the order of label names like defined in ``add_gauge``.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: float /
+
+  The current value of the gauge (in case of ``success`` is ``True``), otherwise an error message
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if name not in self.__dictGauges:
+         result = f"Gauge '{name}' not defined"
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Gauge", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__find_series(name, self.__dictGauges[name], tupleLabelValues)
+      if oSeries is None:
+         result = f"Gauge '{name}' has no series with labels: '{labels}'"
+         return success, result
+      dictSamples = self.__get_samples(oSeries)
+      success = True
+      result  = dictSamples[''][0][1]
+      return success, result
+   # eof def get_gauge_value(...):
+
 
    # --------------------------------------------------------------------------------------------------------------
    # -- prometheus metric type 'Summary'
@@ -814,6 +1688,8 @@ For this purpose the 'Prometheus Python client library' is used.
       if name in self.__dictSummaries:
          result = f"A summary with name '{name}' is already defined"
          return success, result
+      self.__start_exporter()
+      from prometheus_client import Summary
       oSummary = None
       if labels is None:
          oSummary = Summary(name, description)
@@ -825,6 +1701,8 @@ For this purpose the 'Prometheus Python client library' is used.
             listLabelNames.append(label)
          oSummary = Summary(name, description, listLabelNames)
       self.__dictSummaries[name] = oSummary
+      self.__dictLabelNames[name] = self.__get_label_values(labels)
+      self.__dictSeries[name] = {}
       success = True
       listResults = []
       listResults.append(f"Summary '{name}' added")
@@ -874,6 +1752,7 @@ For this purpose the 'Prometheus Python client library' is used.
       """
       success = False
       result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
@@ -889,25 +1768,107 @@ For this purpose the 'Prometheus Python client library' is used.
       if name not in self.__dictSummaries:
          result = f"Summary '{name}' not defined"
          return success, result
-      oSummary = self.__dictSummaries[name]
-      if labels is None:
-         oSummary.observe(value)
-      else:
-         labellist = labels.split(';')
-         listLabelValues = []
-         for label in labellist:
-            label = label.strip()
-            listLabelValues.append(label)
-         oSummary.labels(*listLabelValues).observe(value)
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Summary", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictSummaries[name], tupleLabelValues)
+      self.__update(name, tupleLabelValues, oSeries, oSeries.observe, value)
       success = True
       listResults = []
       listResults.append(f"Summary '{name}' observed value {value}")
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
       result = " ".join(listResults)
-      return success, result
+      self.__observe_keyword("observe_summary", nStartTime)
+      return self.__report_rule_violations(success, result)
    # eof def observe_summary(...):
 
+   @keyword
+   def observe_summary_many(self, name=None, values=None, labels=None, column=0):
+      """This keyword observes many values at once in a summary. The summary has to be added with '``add_summary``' before.
+The values are processed in one vectorized pass (NumPy, if available) and applied to the summary in one step.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the summary
+
+  / *Condition*: required / *Type*: str /
+
+* ``values``
+
+  The values assigned to the summary: a list of values, a NumPy array or the path to a file.
+  Supported files are NumPy files (``*.npy``), raw little endian float64 values (``*.bin``) and text files with separated values (e.g. ``*.csv``).
+
+  / *Condition*: required / *Type*: list or str /
+
+* ``labels``
+
+  A semicolon separated list of labels assigned to the summary. The order of labels must fit to the order of label names like defined in ``add_summary``.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+* ``column``
+
+  In case of a text file with separated values: the index of the column containing the values
+
+  / *Condition*: optional / *Type*: int  / *Default*: 0 /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if values is None:
+         result = "Parameter 'values' not defined"
+         return success, result
+      if name not in self.__dictSummaries:
+         result = f"Summary '{name}' not defined"
+         return success, result
+      try:
+         aValues = load_values(values, column)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Summary", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictSummaries[name], tupleLabelValues)
+      nCount = self.__update(name, tupleLabelValues, oSeries, observe_summary_many, oSeries, aValues, bAtomic=True)
+      success = True
+      listResults = []
+      if nCount is None:
+         listResults.append(f"Summary '{name}' staged {len(aValues)} values (metric transaction)")
+      else:
+         listResults.append(f"Summary '{name}' observed {nCount} values")
+      if labels is not None:
+         listResults.append(f"with labels: '{labels}'")
+      result = " ".join(listResults)
+      self.__observe_keyword("observe_summary_many", nStartTime)
+      return self.__report_rule_violations(success, result)
+   # eof def observe_summary_many(...):
+
 
    # --------------------------------------------------------------------------------------------------------------
    # -- prometheus metric type 'Histogram'
@@ -963,6 +1924,8 @@ For this purpose the 'Prometheus Python client library' is used.
       if name in self.__dictHistograms:
          result = f"A histogram with name '{name}' is already defined"
          return success, result
+      self.__start_exporter()
+      from prometheus_client import Histogram
       oHistogram = None
       if labels is None:
          oHistogram = Histogram(name, description)
@@ -974,6 +1937,8 @@ For this purpose the 'Prometheus Python client library' is used.
             listLabelNames.append(label)
          oHistogram = Histogram(name, description, listLabelNames)
       self.__dictHistograms[name] = oHistogram
+      self.__dictLabelNames[name] = self.__get_label_values(labels)
+      self.__dictSeries[name] = {}
       success = True
       listResults = []
       listResults.append(f"Summary '{name}' added")
@@ -1023,6 +1988,7 @@ For this purpose the 'Prometheus Python client library' is used.
       """
       success = False
       result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
       if name is None:
          result = "Parameter 'name' not defined"
          return success, result
@@ -1038,24 +2004,1661 @@ For this purpose the 'Prometheus Python client library' is used.
       if name not in self.__dictHistograms:
          result = f"Histogram '{name}' not defined"
          return success, result
-      oHistogram = self.__dictHistograms[name]
-      if labels is None:
-         oHistogram.observe(value)
-      else:
-         labellist = labels.split(';')
-         listLabelValues = []
-         for label in labellist:
-            label = label.strip()
-            listLabelValues.append(label)
-         oHistogram.labels(*listLabelValues).observe(value)
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Histogram", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictHistograms[name], tupleLabelValues)
+      self.__update(name, tupleLabelValues, oSeries, oSeries.observe, value)
       success = True
       listResults = []
       listResults.append(f"Histogram '{name}' observed value {value}")
       if labels is not None:
          listResults.append(f"with labels: '{labels}'")
       result = " ".join(listResults)
-      return success, result
+      self.__observe_keyword("observe_histogram", nStartTime)
+      return self.__report_rule_violations(success, result)
    # eof def observe_histogram(...):
 
-# eof class prometheus_interface():
+   @keyword
+   def observe_histogram_many(self, name=None, values=None, labels=None, column=0):
+      """This keyword observes many values at once in a histogram. The histogram has to be added with '``add_histogram``' before.
+The values are processed in one vectorized pass (NumPy, if available) and applied to the histogram in one step.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the histogram
+
+  / *Condition*: required / *Type*: str /
+
+* ``values``
+
+  The values assigned to the histogram: a list of values, a NumPy array or the path to a file.
+  Supported files are NumPy files (``*.npy``), raw little endian float64 values (``*.bin``) and text files with separated values (e.g. ``*.csv``).
+
+  / *Condition*: required / *Type*: list or str /
+
+* ``labels``
+
+  A semicolon separated list of labels assigned to the histogram. The order of labels must fit to the order of label names like defined in ``add_histogram``.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+* ``column``
+
+  In case of a text file with separated values: the index of the column containing the values
+
+  / *Condition*: optional / *Type*: int  / *Default*: 0 /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
 
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if values is None:
+         result = "Parameter 'values' not defined"
+         return success, result
+      if name not in self.__dictHistograms:
+         result = f"Histogram '{name}' not defined"
+         return success, result
+      try:
+         aValues = load_values(values, column)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Histogram", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictHistograms[name], tupleLabelValues)
+      nCount = self.__update(name, tupleLabelValues, oSeries, observe_histogram_many, oSeries, aValues, bAtomic=True)
+      success = True
+      listResults = []
+      if nCount is None:
+         listResults.append(f"Histogram '{name}' staged {len(aValues)} values (metric transaction)")
+      else:
+         listResults.append(f"Histogram '{name}' observed {nCount} values")
+      if labels is not None:
+         listResults.append(f"with labels: '{labels}'")
+      result = " ".join(listResults)
+      self.__observe_keyword("observe_histogram_many", nStartTime)
+      return self.__report_rule_violations(success, result)
+   # eof def observe_histogram_many(...):
+
+   @keyword
+   def get_histogram_snapshot(self, name=None, labels=None):
+      """This keyword returns a snapshot of the current values of a histogram. The histogram has to be added with '``add_histogram``' before.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the histogram
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of labels identifying the series of the histogram. The order of labels must fit to the order of label names like defined in ``add_histogram``.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: dict /
+
+  A snapshot of the histogram with the keys ``buckets`` (upper bound -> cumulative count), ``count`` and ``sum`` (in case of ``success`` is ``True``), otherwise an error message
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if name not in self.__dictHistograms:
+         result = f"Histogram '{name}' not defined"
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Histogram", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__find_series(name, self.__dictHistograms[name], tupleLabelValues)
+      if oSeries is None:
+         result = f"Histogram '{name}' has no series with labels: '{labels}'"
+         return success, result
+      dictSamples = self.__get_samples(oSeries)
+      dictBuckets = {}
+      for dictSampleLabels, value in dictSamples['_bucket']:
+         dictBuckets[dictSampleLabels['le']] = value
+      success = True
+      result  = {}
+      result['buckets'] = dictBuckets
+      result['count']   = dictSamples['_count'][0][1]
+      result['sum']     = dictSamples['_sum'][0][1] if '_sum' in dictSamples else None
+      return success, result
+   # eof def get_histogram_snapshot(...):
+
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- prometheus metric type 'Enum'
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def add_enum(self, name=None, description=None, states=None, labels=None, count_by=None, compact=False):
+      """This keyword adds a new enum. An enum is in exactly one of a set of states (e.g. the result of a test: ``PASSED``, ``FAILED``, ``UNKNOWN``).
+The state of existing enums can be changed with ``set_enum``. The initial state is the first state.
+
+Additionally the number of series per state is provided (``<name>_state_count``, computed at scrape time), optionally per label (``count_by``).
+Therefore one enum with label ``testname`` replaces a counter per state with labels ``testname`` and ``testresult``.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the new enum
+
+  / *Condition*: required / *Type*: str /
+
+* ``description``
+
+  The description of the new enum
+
+  / *Condition*: required / *Type*: str /
+
+* ``states``
+
+  A semicolon separated list of all states of the new enum
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of label names assigned to the new enum
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+* ``count_by``
+
+  A semicolon separated list of label names (subset of ``labels``); the number of series per state is provided per value of these labels.
+  If not defined, the number of series per state is provided over all series.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+* ``compact``
+
+  If ``True``, only the current state of every series is provided (one sample per series, instead of one sample per state and series)
+
+  / *Condition*: optional / *Type*: bool  / *Default*: False /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if description is None:
+         result = "Parameter 'description' not defined"
+         return success, result
+      if states is None:
+         result = "Parameter 'states' not defined"
+         return success, result
+      if name in self.__dictEnums:
+         result = f"An enum with name '{name}' is already defined"
+         return success, result
+      listStates = [state.strip() for state in states.split(';') if state.strip() != ""]
+      if len(listStates) != len(set(listStates)):
+         result = f"States of enum '{name}' are not unique: '{states}'"
+         return success, result
+      if isinstance(compact, str):
+         compact = (compact.strip().lower() in ("true", "yes", "1"))
+      self.__start_exporter()
+      from prometheus_client import Enum, REGISTRY
+      tupleLabelNames = self.__get_label_values(labels)
+      try:
+         # the enum is provided by the collector, therefore the enum itself is not registered
+         oEnum = Enum(name, description, list(tupleLabelNames), registry=None, states=listStates)
+         oCollector = CEnumCollector(oEnum, tupleLabelNames, self.__get_label_values(count_by), compact)
+         REGISTRY.register(oCollector)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      self.__dictEnums[name] = oEnum
+      self.__dictEnumStates[name] = {sState: nIndex for nIndex, sState in enumerate(listStates)}
+      self.__dictCollectors[name] = oCollector
+      self.__dictLabelNames[name] = tupleLabelNames
+      self.__dictSeries[name] = {}
+      success = True
+      listResults = []
+      listResults.append(f"Enum '{name}' added with states: '{';'.join(listStates)}'")
+      if labels is not None:
+         listResults.append(f"and labels: '{labels}'")
+      result = " ".join(listResults)
+      return success, result
+   # eof def add_enum(...):
+
+   @keyword
+   def set_enum(self, name=None, state=None, labels=None):
+      """This keyword sets the state of an enum. The enum has to be added with '``add_enum``' before.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the enum
+
+  / *Condition*: required / *Type*: str /
+
+* ``state``
+
+  The new state (one of the states defined in ``add_enum``)
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of labels assigned to the enum. The order of labels must fit to the order of label names like defined in ``add_enum``.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      nStartTime = time.perf_counter_ns()
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if state is None:
+         result = "Parameter 'state' not defined"
+         return success, result
+      if name not in self.__dictEnums:
+         result = f"Enum '{name}' not defined"
+         return success, result
+      nStateIndex = self.__dictEnumStates[name].get(state)
+      if nStateIndex is None:
+         result = f"Invalid state '{state}' of enum '{name}'; expected one of: '{';'.join(self.__dictEnumStates[name])}'"
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Enum", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__get_series(name, self.__dictEnums[name], tupleLabelValues)
+      if oSeries._value != nStateIndex:
+         self.__update(name, tupleLabelValues, oSeries, self.__set_state, oSeries, nStateIndex)
+      success = True
+      listResults = []
+      listResults.append(f"Enum '{name}' set to '{state}'")
+      if labels is not None:
+         listResults.append(f"with labels: '{labels}'")
+      result = " ".join(listResults)
+      self.__observe_keyword("set_enum", nStartTime)
+      return self.__report_rule_violations(success, result)
+   # eof def set_enum(...):
+
+   @keyword
+   def get_enum(self, name=None, labels=None):
+      """This keyword returns the current state of an enum. The enum has to be added with '``add_enum``' before.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the enum
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of labels identifying the series of the enum. The order of labels must fit to the order of label names like defined in ``add_enum``.
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The current state of the enum (in case of ``success`` is ``True``), otherwise an error message
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if name not in self.__dictEnums:
+         result = f"Enum '{name}' not defined"
+         return success, result
+      tupleLabelValues = self.__resolve_label_values(name, labels)
+      sError = self.__check_label_count(name, "Enum", tupleLabelValues)
+      if sError is not None:
+         result = sError
+         return success, result
+      oSeries = self.__find_series(name, self.__dictEnums[name], tupleLabelValues)
+      if oSeries is None:
+         result = f"Enum '{name}' has no series with labels: '{labels}'"
+         return success, result
+      success = True
+      result  = oSeries._states[oSeries._value]
+      return success, result
+   # eof def get_enum(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- measurement ingestion
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def ingest_measurements(self, file=None, mapping=None, delimiter=None, header=True, chunk_bytes=DEFAULT_CHUNK_BYTES):
+      """This keyword ingests a measurement file (e.g. timing captures or sensor traces) into metrics, without parsing the file row by row.
+The file is memory-mapped and processed in chunks; every chunk is parsed vectorized and aggregated per metric and label set.
+Therefore the memory consumption depends on the chunk size and the number of label sets, not on the file size. The package ``numpy`` is required.
+
+The aggregates of all chunks are applied after the whole file is processed: in case of an error (e.g. a row that cannot be parsed
+or a counter with a negative sum of values) no metric is changed.
+
+All metrics have to be added before (with ``add_gauge``, ``add_counter``, ``add_summary`` or ``add_histogram``).
+
+**Arguments:**
+
+* ``file``
+
+  The path to the measurement file: a text file with separated values (e.g. ``*.csv``) or a NumPy file (``*.npy``)
+
+  / *Condition*: required / *Type*: str /
+
+* ``mapping``
+
+  The mapping between columns and metrics: a dictionary, a list of dictionaries or a JSON string of both.
+  Every dictionary contains the keys:
+
+  ``metric``: the name of the metric
+
+  ``type``: ``gauge`` (the last value is set; gauge mode ``window``: all values are added to the window), ``counter`` (increased by the sum of values), ``summary`` or ``histogram`` (all values are observed)
+
+  ``value``: the column containing the values (column name or column index)
+
+  ``labels``: the columns containing the label values (list or semicolon separated list). The order must fit to the order of label names of the metric.
+
+  / *Condition*: required / *Type*: dict, list or str /
+
+* ``delimiter``
+
+  The delimiter of a text file. If not defined, the delimiter is detected automatically (';', ',' or tab).
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+* ``header``
+
+  Indicates if the first line of a text file contains the column names
+
+  / *Condition*: optional / *Type*: bool  / *Default*: True /
+
+* ``chunk_bytes``
+
+  The size (in bytes) of the chunks the file is processed in
+
+  / *Condition*: optional / *Type*: int  / *Default*: 4194304 /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword (including the number of rows and the number of rows per second)
+      """
+      success = False
+      result  = "UNKNOWN"
+      if file is None:
+         result = "Parameter 'file' not defined"
+         return success, result
+      if mapping is None:
+         result = "Parameter 'mapping' not defined"
+         return success, result
+      dictTypes = {'gauge': self.__dictGauges, 'counter': self.__dictCounter, 'summary': self.__dictSummaries, 'histogram': self.__dictHistograms}
+      try:
+         listMappings = parse_mappings(mapping)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      dictUpperBounds = {}
+      for dictMapping in listMappings:
+         sName = dictMapping['metric']
+         if sName not in dictTypes[dictMapping['type']]:
+            result = f"{dictMapping['type'].capitalize()} '{sName}' not defined"
+            return success, result
+         if len(dictMapping['labels']) != len(self.__dictLabelNames[sName]):
+            result = f"Mapping of metric '{sName}' has {len(dictMapping['labels'])} label column(s), but the metric has {len(self.__dictLabelNames[sName])} label name(s)"
+            return success, result
+         if dictMapping['type'] == "histogram":
+            dictUpperBounds[sName] = list(dictTypes['histogram'][sName]._upper_bounds)
+      if isinstance(header, str):
+         header = (header.strip().lower() not in ("false", "no", "0", "none"))
+
+      dictStaged = {} # (mapping, label values) -> (mapping, aggregate of all chunks)
+
+      def stage(dictMapping, tupleLabelValues, dictAggregate):
+         tupleKey = (id(dictMapping), tupleLabelValues)
+         if tupleKey in dictStaged:
+            merge_aggregate(dictStaged[tupleKey][1], dictAggregate)
+         else:
+            dictStaged[tupleKey] = (dictMapping, dictAggregate)
+
+      try:
+         oIngest = CMeasurementIngest(file, listMappings, delimiter, header, int(chunk_bytes), dictUpperBounds)
+         dictStatistics = oIngest.run(stage)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      for (nMapping, tupleLabelValues), (dictMapping, dictAggregate) in dictStaged.items():
+         if ( (dictMapping['type'] == "counter") and (dictAggregate['sum'] < 0) ):
+            result = f"Counter '{dictMapping['metric']}' cannot be decreased: sum of values {dictAggregate['sum']} with labels '{';'.join(tupleLabelValues)}'"
+            return success, result
+      for (nMapping, tupleLabelValues), (dictMapping, dictAggregate) in dictStaged.items():
+         sName = dictMapping['metric']
+         oSeries = self.__get_series(sName, dictTypes[dictMapping['type']][sName], tupleLabelValues)
+         self.__update(sName, tupleLabelValues, oSeries, apply_aggregate, oSeries, dictMapping['type'], dictAggregate, self.__dictGaugeWindows.get(sName))
+      success = True
+      listResults = []
+      listResults.append(f"{dictStatistics['rows']} rows ingested into {len(listMappings)} metric(s)")
+      listResults.append(f"in {dictStatistics['seconds']:.3f} s ({round(dictStatistics['rows_per_second'])} rows/s)")
+      result = " ".join(listResults)
+      return self.__report_rule_violations(success, result)
+   # eof def ingest_measurements(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- label context
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def push_label_context(self, **labels):
+      """This keyword pushes labels (``name=value``) to the label context of the current thread. Until the labels are popped
+with ``pop_label_context``, their values are added automatically to the labels of every metric having labels with these names;
+the keywords only need the remaining labels (in the order defined in ``add_<metric type>``). In case of all labels are given, the given labels are used.
+
+Example: with ``push_label_context    room=Room_1    testbench=Testbench 1`` the counter added with labels ``room;testbench;testname``
+is incremented with ``inc_counter    num_passed    labels=Test_1``.
+
+The label context is thread local; pushed labels overwrite constant labels (``const_labels``) and labels pushed before with the same name.
+
+**Arguments:**
+
+* ``labels``
+
+  The labels (free named arguments ``name=value``)
+
+  / *Condition*: required / *Type*: str /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if len(labels) == 0:
+         result = "Parameter 'labels' not defined"
+         return success, result
+      oContext = self.__get_label_context()
+      dictLabels = {str(sLabelName).strip(): str(sLabelValue).strip() for sLabelName, sLabelValue in labels.items()}
+      oContext.listStack.append((dictLabels, oContext.dictLabels))
+      oContext.dictLabels = {**oContext.dictLabels, **dictLabels}
+      oContext.nGeneration += 1
+      success = True
+      result  = f"Label context pushed: '{';'.join(f'{sLabelName}={sLabelValue}' for sLabelName, sLabelValue in dictLabels.items())}' (depth {len(oContext.listStack)})"
+      return success, result
+   # eof def push_label_context(...):
+
+   @keyword
+   def pop_label_context(self):
+      """This keyword removes the labels pushed last with ``push_label_context`` from the label context of the current thread.
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      oContext = self.__get_label_context()
+      if len(oContext.listStack) == 0:
+         result = "No label context pushed"
+         return success, result
+      dictLabels, oContext.dictLabels = oContext.listStack.pop()
+      oContext.nGeneration += 1
+      success = True
+      result  = f"Label context popped: '{';'.join(f'{sLabelName}={sLabelValue}' for sLabelName, sLabelValue in dictLabels.items())}' (depth {len(oContext.listStack)})"
+      return success, result
+   # eof def pop_label_context(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- metric transactions
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def begin_metric_transaction(self):
+      """This keyword begins a metric transaction. All following updates of metrics (within the same thread) are staged
+and published together with ``commit_metric_transaction``. A scrape always gets either the values before or the values
+after the commit, but never a part of the updates (e.g. an increased counter without the corresponding histogram observation).
+
+Scrapes do not block the commit; a scrape overlapping with a commit takes the values of the changed series published with the commit.
+New series (new label values) are created immediately
+with their initial values.
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if getattr(self.__oTransaction, 'listStaged', None) is not None:
+         result = "A metric transaction is already active"
+         return success, result
+      self.__oTransaction.listStaged = []
+      success = True
+      result  = "Metric transaction started"
+      return success, result
+   # eof def begin_metric_transaction(...):
+
+   @keyword
+   def commit_metric_transaction(self):
+      """This keyword publishes all updates staged since ``begin_metric_transaction`` at once and ends the metric transaction.
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      listStaged = getattr(self.__oTransaction, 'listStaged', None)
+      if listStaged is None:
+         result = "No metric transaction active"
+         return success, result
+      self.__oTransaction.listStaged = None
+      # the samples of the changed series are published with the transaction (snapshot for scrapes overlapping the commit)
+      dictChanged = {(name, tupleLabelValues): (oSeries, tupleLabelValues, name not in self.__dictCollectors)
+                     for name, tupleLabelValues, oSeries, fnUpdate, args in listStaged}
+      self.__oSeqLock.begin_write()
+      try:
+         for name, tupleLabelValues, oSeries, fnUpdate, args in listStaged:
+            fnUpdate(*args)
+      finally:
+         self.__oSeqLock.end_write(list(dictChanged.values()))
+      for name, tupleLabelValues, oSeries, fnUpdate, args in listStaged:
+         self.__notify_update(name, tupleLabelValues, oSeries)
+      success = True
+      result  = f"Metric transaction committed ({len(listStaged)} updates)"
+      return self.__report_rule_violations(success, result)
+   # eof def commit_metric_transaction(...):
+
+   @keyword
+   def rollback_metric_transaction(self):
+      """This keyword discards all updates staged since ``begin_metric_transaction`` and ends the metric transaction.
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      listStaged = getattr(self.__oTransaction, 'listStaged', None)
+      if listStaged is None:
+         result = "No metric transaction active"
+         return success, result
+      self.__oTransaction.listStaged = None
+      success = True
+      result  = f"Metric transaction rolled back ({len(listStaged)} updates discarded)"
+      return success, result
+   # eof def rollback_metric_transaction(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- removal of metrics and series
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def remove_metric(self, name=None):
+      """This keyword removes metrics (of any type) completely, including all their series. Afterwards the metrics are not provided to Prometheus any more
+and the names can be used again.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the metric. Also a glob pattern is possible (e.g. ``suite_a_*``), to remove all matching metrics at once.
+
+  / *Condition*: required / *Type*: str /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if self.__get_metric_dict(name) is not None:
+         listNames = [name]
+      else:
+         import fnmatch
+         listNames = fnmatch.filter(list(self.__dictLabelNames), name)
+      if len(listNames) == 0:
+         result = f"Metric '{name}' not defined"
+         return success, result
+      from prometheus_client import REGISTRY
+      for sName in listNames:
+         dictMetrics = self.__get_metric_dict(sName)
+         oMetric = dictMetrics.pop(sName)
+         if self.__oAgent is not None:
+            self.__oAgent.forget(sName, self.__dictLabelNames[sName])
+         if self.__oLabelValues is not None:
+            for tupleLabelValues in self.__dictSeries[sName]:
+               self.__oLabelValues.release(tupleLabelValues)
+         del self.__dictSeries[sName]
+         del self.__dictLabelNames[sName]
+         self.__dictEnumStates.pop(sName, None)
+         self.__dictGaugeWindows.pop(sName, None)
+         if self.__oOtlpExporter is not None:
+            self.__oOtlpExporter.forget(sName)
+         if self.__oRules is not None:
+            self.__oRules.forget(sName)
+         self.__oLabelIndex.clear(sName)
+         REGISTRY.unregister(self.__dictCollectors.pop(sName, oMetric))
+      success = True
+      result  = f"{len(listNames)} metric(s) removed: '{', '.join(listNames)}'"
+      return success, result
+   # eof def remove_metric(...):
+
+   @keyword
+   def remove_series(self, name=None, labels=None):
+      """This keyword removes series of a metric. Afterwards the series are not provided to Prometheus any more.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the metric
+
+  / *Condition*: required / *Type*: str /
+
+* ``labels``
+
+  A semicolon separated list of labels identifying the series. The order of labels must fit to the order of label names like defined when adding the metric.
+  Every label can also be a glob pattern (e.g. ``Room_1;*;Suite-A-*``), to remove all matching series at once.
+
+  / *Condition*: required / *Type*: str /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if labels is None:
+         result = "Parameter 'labels' not defined"
+         return success, result
+      dictMetrics = self.__get_metric_dict(name)
+      if dictMetrics is None:
+         result = f"Metric '{name}' not defined"
+         return success, result
+      tupleLabelPatterns = self.__resolve_label_values(name, labels)
+      if len(tupleLabelPatterns) != len(self.__dictLabelNames[name]):
+         result = f"Invalid number of labels '{labels}' for metric '{name}'; expected: '{';'.join(self.__dictLabelNames[name])}'"
+         return success, result
+      oMetric = dictMetrics[name]
+      dictMetricSeries = self.__dictSeries[name]
+      if not any(sChar in labels for sChar in "*?["):
+         # exact labels
+         listLabelValues = [tupleLabelPatterns] if tupleLabelPatterns in dictMetricSeries else []
+      else:
+         import fnmatch
+         listLabelValues = []
+         for tupleLabelValues in list(dictMetricSeries):
+            if all(fnmatch.fnmatchcase(sValue, sPattern) for sValue, sPattern in zip(tupleLabelValues, tupleLabelPatterns)):
+               listLabelValues.append(tupleLabelValues)
+      for tupleLabelValues in listLabelValues:
+         dictMetricSeries.pop(tupleLabelValues, None)
+         oMetric.remove(*tupleLabelValues)
+         if self.__oLabelValues is not None:
+            self.__oLabelValues.release(tupleLabelValues)
+         if self.__oAgent is not None:
+            self.__oAgent.forget(name, self.__dictLabelNames[name], tupleLabelValues)
+         if self.__oOtlpExporter is not None:
+            self.__oOtlpExporter.forget(name, tupleLabelValues)
+         if self.__oRules is not None:
+            self.__oRules.forget(name, tupleLabelValues)
+         self.__oLabelIndex.remove(name, tupleLabelValues)
+      success = True
+      result  = f"{len(listLabelValues)} series of metric '{name}' removed with labels: '{labels}'"
+      return success, result
+   # eof def remove_series(...):
+
+   @keyword
+   def clear_metric(self, name=None):
+      """This keyword removes all series of a metric with labels. The metric itself is kept and new series can be created.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the metric
+
+  / *Condition*: required / *Type*: str /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      dictMetrics = self.__get_metric_dict(name)
+      if dictMetrics is None:
+         result = f"Metric '{name}' not defined"
+         return success, result
+      if len(self.__dictLabelNames[name]) == 0:
+         result = f"Metric '{name}' has no labels"
+         return success, result
+      nSeries = len(self.__dictSeries[name])
+      if self.__oLabelValues is not None:
+         for tupleLabelValues in self.__dictSeries[name]:
+            self.__oLabelValues.release(tupleLabelValues)
+      self.__dictSeries[name] = {}
+      dictMetrics[name].clear()
+      if self.__oAgent is not None:
+         self.__oAgent.forget(name, self.__dictLabelNames[name])
+      if self.__oOtlpExporter is not None:
+         self.__oOtlpExporter.forget(name)
+      if self.__oRules is not None:
+         self.__oRules.forget(name)
+      self.__oLabelIndex.clear(name)
+      success = True
+      result  = f"Metric '{name}' cleared ({nSeries} series removed)"
+      return success, result
+   # eof def clear_metric(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- file sink
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def start_file_sink(self, directory=None, chunk_rows=65536, rotate_seconds=60):
+      """This keyword starts writing timestamped samples of every updated series to chunked columnar files (NumPy '.npy' format).
+This enables an offline analysis in case of no Prometheus server is available. The files can be read with ``CMetricFileReader``
+(module ``CMetricFileSink``). The package ``numpy`` is required.
+
+**Arguments:**
+
+* ``directory``
+
+  The folder the chunks and the label dictionary ('series.jsonl') are written to
+
+  / *Condition*: required / *Type*: str /
+
+* ``chunk_rows``
+
+  Number of buffered rows, after that a new chunk file is written
+
+  / *Condition*: optional / *Type*: int / *Default*: 65536 /
+
+* ``rotate_seconds``
+
+  Maximum age (in seconds) of buffered rows, after that a new chunk file is written
+
+  / *Condition*: optional / *Type*: float / *Default*: 60 /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if directory is None:
+         result = "Parameter 'directory' not defined"
+         return success, result
+      if self.__oFileSink is not None:
+         result = f"A file sink is already started (folder: '{self.__oFileSink.get_directory()}')"
+         return success, result
+      try:
+         oFileSink = CMetricFileSink(directory, int(chunk_rows), float(rotate_seconds))
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      atexit.register(oFileSink.close)
+      self.__oFileSink = oFileSink
+      success = True
+      result  = f"File sink started (folder: '{oFileSink.get_directory()}')"
+      return success, result
+   # eof def start_file_sink(...):
+
+   @keyword
+   def stop_file_sink(self):
+      """This keyword writes all buffered samples of the file sink and stops the file sink.
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if self.__oFileSink is None:
+         result = "No file sink started"
+         return success, result
+      oFileSink = self.__oFileSink
+      self.__oFileSink = None
+      oFileSink.close()
+      atexit.unregister(oFileSink.close)
+      success = True
+      result  = f"File sink stopped (folder: '{oFileSink.get_directory()}')"
+      return success, result
+   # eof def stop_file_sink(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- profiling
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def start_profiling(self, name="prometheus_interface_profile", hz=DEFAULT_PROFILING_HZ, top_n=DEFAULT_PROFILING_TOP_N, collapsed_file=None):
+      """This keyword starts a statistical profiler, sampling the Python stacks of all threads of this process (test libraries,
+Robot Framework, ...) with a fixed frequency. The functions with the most samples are provided as counters:
+
+* ``<name>_self_samples_total{function, module}``: samples with the function on top of the stack
+* ``<name>_total_samples_total{function, module}``: samples with the function anywhere on the stack
+* ``<name>_samples_total`` and ``<name>_sampling_seconds_total``: number of samples and time spent by the profiler
+
+Only the top-N functions and stacks are kept, all other samples are counted as ``[other]``. Waiting threads are not counted.
+With the default frequency the overhead is usually far below 2 %, therefore the profiler can stay on during the whole execution
+(e.g. started in the suite setup). The overhead is returned by ``stop_profiling``.
+
+**Arguments:**
+
+* ``name``
+
+  The name prefix of the provided counters
+
+  / *Condition*: optional / *Type*: str / *Default*: "prometheus_interface_profile" /
+
+* ``hz``
+
+  The sampling frequency (samples per second)
+
+  / *Condition*: optional / *Type*: float / *Default*: 100 /
+
+* ``top_n``
+
+  The number of functions and stacks kept
+
+  / *Condition*: optional / *Type*: int / *Default*: 100 /
+
+* ``collapsed_file``
+
+  If defined, all sampled stacks are written to this file in the collapsed format of flamegraph tools, when the profiler is stopped
+  (with ``stop_profiling`` or at the end of the execution)
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if ( (self.__oProfiler is not None) and (self.__oProfiler.is_running() is True) ):
+         result = "The profiler is already started"
+         return success, result
+      try:
+         oProfiler = CStackSampler(name, float(hz), int(top_n))
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      self.__start_exporter()
+      from prometheus_client import REGISTRY
+      if self.__oProfiler is not None:
+         REGISTRY.unregister(self.__oProfiler) # counters of the previous profiling
+         self.__oProfiler = None
+      try:
+         REGISTRY.register(oProfiler)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      self.__oProfiler    = oProfiler
+      self.__sProfileFile = collapsed_file
+      oProfiler.start()
+      if self.__bProfilerAtExit is False:
+         atexit.register(self.__stop_running_profiler) # once, for all profilings of this instance
+         self.__bProfilerAtExit = True
+      success = True
+      listResults = []
+      listResults.append(f"Profiling started ({float(hz):g} Hz, top {int(top_n)})")
+      if collapsed_file is not None:
+         listResults.append(f"(collapsed stacks: '{collapsed_file}')")
+      result = " ".join(listResults)
+      return success, result
+   # eof def start_profiling(...):
+
+   @keyword
+   def stop_profiling(self, collapsed_file=None):
+      """This keyword stops the profiler started with ``start_profiling``. The counters of the profiler are still provided
+(until the next ``start_profiling``).
+
+**Arguments:**
+
+* ``collapsed_file``
+
+  If defined, all sampled stacks are written to this file in the collapsed format of flamegraph tools
+  (instead of the file given to ``start_profiling``)
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword, including the number of samples and the overhead of the profiler
+      """
+      success = False
+      result  = "UNKNOWN"
+      if ( (self.__oProfiler is None) or (self.__oProfiler.is_running() is False) ):
+         result = "No profiler started"
+         return success, result
+      try:
+         dictStatistics, nStacks = self.__stop_profiler(collapsed_file)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      success = True
+      listResults = []
+      listResults.append(f"Profiling stopped ({dictStatistics['samples']} samples in {dictStatistics['seconds']:.1f} s, overhead {100 * dictStatistics['overhead']:.2f} %)")
+      if nStacks is not None:
+         listResults.append(f"{nStacks} stacks written to '{collapsed_file if collapsed_file is not None else self.__sProfileFile}'")
+      result = " ".join(listResults)
+      return success, result
+   # eof def stop_profiling(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- garbage collector instrumentation
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def start_gc_instrumentation(self, name="prometheus_interface_gc", tracemalloc_interval=None, top_n=DEFAULT_GC_TOP_N):
+      """This keyword starts measuring every collection of the Python garbage collector of this process, to make pauses of the
+garbage collector visible (e.g. as explanation of latency spikes of timing tests). Provided are:
+
+* ``<name>_pause_seconds{generation}``: histogram of the pause times per generation
+* ``<name>_collected_objects_total{generation}``, ``<name>_uncollectable_objects_total{generation}``: objects collected and uncollectable objects found
+
+Optionally the allocations are traced (``tracemalloc``). Snapshots are taken with the given interval and compared with the previous snapshot;
+the top-N allocation sites (largest change of the allocated size) are provided as gauges ``<name>_allocation_bytes{site}``,
+``<name>_allocation_blocks{site}`` and ``<name>_allocation_bytes_diff{site}``. Tracing of allocations slows down the process noticeably.
+
+**Arguments:**
+
+* ``name``
+
+  The name prefix of the provided metrics
+
+  / *Condition*: optional / *Type*: str / *Default*: "prometheus_interface_gc" /
+
+* ``tracemalloc_interval``
+
+  If defined, the interval (in seconds) of the tracemalloc snapshots
+
+  / *Condition*: optional / *Type*: float / *Default*: None /
+
+* ``top_n``
+
+  The number of allocation sites provided
+
+  / *Condition*: optional / *Type*: int / *Default*: 10 /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if ( (self.__oGcInstrumentation is not None) and (self.__oGcInstrumentation.is_running() is True) ):
+         result = "The garbage collector instrumentation is already started"
+         return success, result
+      try:
+         oGcInstrumentation = CGcInstrumentation(name, tracemalloc_interval, int(top_n))
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      self.__start_exporter()
+      from prometheus_client import REGISTRY
+      if self.__oGcInstrumentation is not None:
+         REGISTRY.unregister(self.__oGcInstrumentation) # metrics of the previous instrumentation
+         self.__oGcInstrumentation = None
+      try:
+         REGISTRY.register(oGcInstrumentation)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      self.__oGcInstrumentation = oGcInstrumentation
+      oGcInstrumentation.start()
+      atexit.register(oGcInstrumentation.stop)
+      success = True
+      listResults = []
+      listResults.append("Garbage collector instrumentation started")
+      if tracemalloc_interval is not None:
+         listResults.append(f"(tracemalloc snapshots every {float(tracemalloc_interval):g} s, top {int(top_n)})")
+      result = " ".join(listResults)
+      return success, result
+   # eof def start_gc_instrumentation(...):
+
+   @keyword
+   def stop_gc_instrumentation(self):
+      """This keyword stops the instrumentation started with ``start_gc_instrumentation``. The metrics are still provided
+(until the next ``start_gc_instrumentation``).
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword, including the number of collections and the pause time per generation
+      """
+      success = False
+      result  = "UNKNOWN"
+      if ( (self.__oGcInstrumentation is None) or (self.__oGcInstrumentation.is_running() is False) ):
+         result = "No garbage collector instrumentation started"
+         return success, result
+      oGcInstrumentation = self.__oGcInstrumentation
+      oGcInstrumentation.stop()
+      atexit.unregister(oGcInstrumentation.stop)
+      success = True
+      listResults = []
+      listResults.append("Garbage collector instrumentation stopped")
+      for dictStatistics in oGcInstrumentation.get_statistics():
+         listResults.append(f"(generation {dictStatistics['generation']}: {dictStatistics['collections']} collections, {1000 * dictStatistics['pause_seconds']:.1f} ms)")
+      result = " ".join(listResults)
+      return success, result
+   # eof def stop_gc_instrumentation(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- queries
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def query_metrics(self, query=None):
+      """This keyword evaluates an instant query (subset of PromQL) over the live metrics of this library, without Prometheus server.
+
+Supported are selectors with label matchers (``=``, ``!=``, ``=~``, ``!~``), the aggregations ``sum``, ``avg``, ``min``, ``max``, ``count``,
+``topk`` and ``bottomk`` (optionally ``by`` or ``without`` labels) and ``histogram_quantile``. The sample names are the names provided to Prometheus
+(e.g. ``<counter>_total``, ``<histogram>_bucket``); the name of a counter without suffix is accepted as well.
+
+Examples: ``sum by (testbench) (num_passed)``, ``topk(3, bpm{room="Room_1"})``, ``histogram_quantile(0.9, sum by (le) (latency_bucket))``
+
+**Arguments:**
+
+* ``query``
+
+  The query
+
+  / *Condition*: required / *Type*: str /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: list /
+
+  The result of the query (in case of ``success`` is ``True``): a list of dictionaries with the keys ``metric`` (dictionary of the labels,
+  including ``__name__`` in case of no aggregation) and ``value``; otherwise an error message
+      """
+      success = False
+      result  = "UNKNOWN"
+      if query is None:
+         result = "Parameter 'query' not defined"
+         return success, result
+      dictMetrics = {}
+      for sName, sType, dictSeries in self.__get_series_index():
+         listStates = list(self.__dictEnumStates[sName]) if sType == "stateset" else None
+         dictMetrics[sName] = (sType, self.__dictLabelNames[sName], dictSeries, listStates)
+      try:
+         result = self.__oQueryEngine.query(query, dictMetrics)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      success = True
+      return success, result
+   # eof def query_metrics(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- metric rules
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def add_metric_rule(self, name=None, metric=None, rule_type="threshold", condition=None, labels=None, window=None, sample=None, action="fail"):
+      """This keyword adds a rule over the series of a metric, evaluated within this library (without Prometheus server).
+A violation either fails the current test (action ``fail``: the update keyword violating the rule returns ``success`` ``False``
+and the violation as ``result``) or is only flagged (action ``flag``). The state of all rules is provided by the metrics ``prometheus_interface_rule_violation{rule, metric, series}``
+(1 while violated) and ``prometheus_interface_rule_violations_total{rule}``.
+
+Threshold and rate rules are evaluated with every update of a series; absence rules are evaluated periodically by a background thread,
+their violations (action ``fail``) are reported by the keyword ``check_metric_rules``. Every violation is reported once; a series
+is reported again after it fulfilled the rule in the meantime.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the rule
+
+  / *Condition*: required / *Type*: str /
+
+* ``metric``
+
+  The name of the metric (counter, gauge, summary or histogram)
+
+  / *Condition*: required / *Type*: str /
+
+* ``rule_type``
+
+  ``threshold``: the value of a series fulfills the condition.
+
+  ``rate``: the change of the value per second fulfills the condition (computed between updates at least ``window`` seconds apart).
+
+  ``absence``: a series is not updated for ``window`` seconds.
+
+  / *Condition*: optional / *Type*: str / *Default*: "threshold" /
+
+* ``condition``
+
+  The condition of a violation: ``<operator> <value>`` with operator ``>``, ``>=``, ``<``, ``<=``, ``==`` or ``!=`` (e.g. ``> 200``)
+
+  / *Condition*: required (threshold and rate) / *Type*: str / *Default*: None /
+
+* ``labels``
+
+  A semicolon separated list of label values of the series the rule is applied to; wildcards (``*``, ``?``, ``[...]``) are supported.
+  If not defined, the rule is applied to all series of the metric. An absence rule with labels without wildcards expects the series also
+  if it has never been updated.
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+* ``window``
+
+  ``rate``: the minimum time between two updates compared (seconds). ``absence``: the time without updates (seconds, required).
+
+  / *Condition*: optional / *Type*: float / *Default*: None /
+
+* ``sample``
+
+  The sample of a series the rule is applied to: the value of counters and gauges, ``_count`` (default) or ``_sum`` of summaries and histograms
+
+  / *Condition*: optional / *Type*: str / *Default*: None /
+
+* ``action``
+
+  ``fail`` (fail the current test) or ``flag`` (only provide the violation as metric)
+
+  / *Condition*: optional / *Type*: str / *Default*: "fail" /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if metric is None:
+         result = "Parameter 'metric' not defined"
+         return success, result
+      dictMetrics = self.__get_metric_dict(metric)
+      if dictMetrics is None:
+         result = f"Metric '{metric}' not defined"
+         return success, result
+      if dictMetrics is self.__dictCounter:
+         sDefaultSample = "_total"
+      elif dictMetrics is self.__dictGauges:
+         sDefaultSample = ""
+      elif ( (dictMetrics is self.__dictSummaries) or (dictMetrics is self.__dictHistograms) ):
+         sDefaultSample = "_count"
+      else:
+         result = f"Metric '{metric}' is neither a counter, a gauge, a summary nor a histogram"
+         return success, result
+      if sample is None:
+         sample = sDefaultSample
+      elif sDefaultSample != "_count":
+         result = "Parameter 'sample' is only supported by summaries and histograms"
+         return success, result
+      elif sample not in ("_count", "_sum"):
+         result = f"Invalid sample '{sample}'; expected one of: _count, _sum"
+         return success, result
+      tupleLabelNames = self.__dictLabelNames[metric]
+      tupleLabelPatterns = () if len(tupleLabelNames) == 0 else None
+      if labels is not None:
+         tupleLabelPatterns = self.__get_label_values(labels)
+         if len(tupleLabelPatterns) != len(tupleLabelNames):
+            result = f"Invalid number of labels '{labels}' for metric '{metric}'; expected: '{';'.join(tupleLabelNames)}'"
+            return success, result
+      try:
+         oRule = CMetricRule(name, metric, rule_type, condition, tupleLabelPatterns, window, sample, action)
+         if self.__oRules is None:
+            from prometheus_client import REGISTRY
+            oRules = CMetricRules()
+            REGISTRY.register(oRules)
+            atexit.register(oRules.close)
+            self.__oRules = oRules
+         self.__oRules.add(oRule, self.__dictSeries[metric])
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      success = True
+      listResults = []
+      listResults.append(f"Rule '{name}' ({rule_type}) added to metric '{metric}'")
+      if condition is not None:
+         listResults.append(f"with condition '{condition}'")
+      if labels is not None:
+         listResults.append(f"and labels: '{labels}'")
+      listResults.append(f"(action '{action}')")
+      result = " ".join(listResults)
+      return success, result
+   # eof def add_metric_rule(...):
+
+   @keyword
+   def remove_metric_rule(self, name=None):
+      """This keyword removes a metric rule.
+
+**Arguments:**
+
+* ``name``
+
+  The name of the rule
+
+  / *Condition*: required / *Type*: str /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if name is None:
+         result = "Parameter 'name' not defined"
+         return success, result
+      if ( (self.__oRules is None) or (self.__oRules.remove(name) is False) ):
+         result = f"Rule '{name}' not defined"
+         return success, result
+      success = True
+      result  = f"Rule '{name}' removed"
+      return success, result
+   # eof def remove_metric_rule(...):
+
+   @keyword
+   def check_metric_rules(self):
+      """This keyword checks, if any series violates a metric rule at the moment (e.g. at the end of a test, for absence rules).
+The violations of absence rules with action ``fail`` detected since the last check are reported, together with all series violating a rule at the moment.
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  ``True``, in case of no rule is violated, otherwise ``False``
+
+* ``result``
+
+  / *Type*: str /
+
+  The violations (or a message that no rule is violated)
+      """
+      success = False
+      result  = "UNKNOWN"
+      if self.__oRules is None:
+         success = True
+         result  = "No metric rules defined"
+         return success, result
+      self.__oRules.evaluate_absence()
+      listFailures = self.__oRules.take_failures()
+      listViolations = self.__oRules.get_violations()
+      if ( (len(listFailures) == 0) and (len(listViolations) == 0) ):
+         success = True
+         result  = f"No violation of {len(self.__oRules.get_rule_names())} metric rule(s)"
+         return success, result
+      listResults = list(listFailures)
+      for sRule, sSeries in listViolations:
+         listResults.append(f"Rule '{sRule}' violated by {sSeries}")
+      result = "\n".join(dict.fromkeys(listResults))
+      return success, result
+   # eof def check_metric_rules(...):
+
+   # --------------------------------------------------------------------------------------------------------------
+   # -- recording rules and dashboards
+   # --------------------------------------------------------------------------------------------------------------
+   #TM***
+
+   @keyword
+   def generate_recording_rules(self, rules_file=None, dashboard_file=None, levels=DEFAULT_LEVELS, quantiles=DEFAULT_QUANTILES,
+                                rate_interval=DEFAULT_RATE_INTERVAL):
+      """This keyword generates a Prometheus recording rules file out of all metrics added to this library (names, types and label names).
+The recording rules pre-aggregate the series per aggregation level (e.g. per room, per testbench; including quantiles of histograms).
+Additionally a Grafana dashboard can be generated, that queries the recorded series only. Therefore dashboards stay fast also with
+a long history and many test names.
+
+The same is available as command line tool for any exporter: ``python -m PrometheusInterface.generate_recording_rules``.
+
+**Arguments:**
+
+* ``rules_file``
+
+  The path of the recording rules file (YAML) to be written. The file has to be added to the ``rule_files`` of the Prometheus configuration.
+
+  / *Condition*: required / *Type*: str /
+
+* ``dashboard_file``
+
+  The path of the Grafana dashboard file (JSON) to be written
+
+  / *Condition*: optional / *Type*: str  / *Default*: None /
+
+* ``levels``
+
+  The aggregation levels, separated by ';'. A level can consist of several label names, separated by ',' (e.g. ``room;testbench;room,testbench``).
+  A metric is aggregated on a level only in case of the metric has all label names of the level.
+
+  / *Condition*: optional / *Type*: str  / *Default*: "room;testbench" /
+
+* ``quantiles``
+
+  The quantiles computed for histograms, separated by ';'
+
+  / *Condition*: optional / *Type*: str  / *Default*: "0.5;0.9;0.99" /
+
+* ``rate_interval``
+
+  The range of rate computations
+
+  / *Condition*: optional / *Type*: str  / *Default*: "5m" /
+
+**Returns:**
+
+* ``success``
+
+  / *Type*: bool /
+
+  Indicates if the computation of the keyword was successful or not
+
+* ``result``
+
+  / *Type*: str /
+
+  The result of the computation of the keyword
+      """
+      success = False
+      result  = "UNKNOWN"
+      if rules_file is None:
+         result = "Parameter 'rules_file' not defined"
+         return success, result
+      try:
+         listRules = generate(self.__get_metric_descriptions(), rules_file, dashboard_file, levels, quantiles, rate_interval)
+      except Exception as ex:
+         success = False
+         result  = str(ex)
+         return success, result
+      success = True
+      listResults = []
+      listResults.append(f"{len(listRules)} recording rules written to '{rules_file}'")
+      if dashboard_file is not None:
+         listResults.append(f"(dashboard: '{dashboard_file}')")
+      result = " ".join(listResults)
+      return success, result
+   # eof def generate_recording_rules(...):
+
+# eof class prometheus_interface():
@@ -0,0 +1,108 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# contention_benchmark.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Compares the update throughput of the accumulation modes 'locked' and 'sharded' of prometheus_interface,
+# with 1 ... <number of CPUs> threads updating the same counter and histogram series.
+#
+# The scaling factor is the throughput with n threads divided by the throughput with 1 thread.
+# Please consider: with a Python interpreter having a global interpreter lock (GIL) the threads cannot run in parallel,
+# therefore a linear scaling can only be reached with a free-threaded Python build. With GIL, the benchmark shows the
+# lock overhead saved per update.
+#
+# Usage:
+#
+#    python contention_benchmark.py [--updates <updates per thread>] [--max-threads <number of threads>]
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, time, threading, argparse, json
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface")))
+
+from prometheus_client import Counter, Histogram
+from CShardedValue import shard_series
+
+DEFAULT_UPDATES = 200000
+
+# --------------------------------------------------------------------------------------------------------------
+
+def run(sMode, nThreads, nUpdates):
+   """Returns the number of updates per second of nThreads threads, every thread updates the same counter and histogram series
+   """
+   oCounter   = Counter("contention_counter", "contention benchmark", ["room"], registry=None).labels("Room_1")
+   oHistogram = Histogram("contention_histogram", "contention benchmark", ["room"], registry=None).labels("Room_1")
+   if sMode == "sharded":
+      shard_series(oCounter)
+      shard_series(oHistogram)
+   oBarrier = threading.Barrier(nThreads + 1)
+
+   def worker():
+      oBarrier.wait()
+      for nUpdate in range(nUpdates):
+         oCounter.inc()
+         oHistogram.observe(0.3)
+
+   listThreads = [threading.Thread(target=worker) for nThread in range(nThreads)]
+   for oThread in listThreads:
+      oThread.start()
+   oBarrier.wait()
+   fStart = time.perf_counter()
+   for oThread in listThreads:
+      oThread.join()
+   fDuration = time.perf_counter() - fStart
+   if oCounter._value.get() != nThreads * nUpdates:
+      raise Exception(f"Lost updates in mode '{sMode}'")
+   if ( (sMode == "sharded") and (oCounter._value.get_shard_count() != 0) ):
+      raise Exception("Shards of finished threads not merged")
+   return (2 * nThreads * nUpdates) / fDuration
+
+# --------------------------------------------------------------------------------------------------------------
+
+oParser = argparse.ArgumentParser(description="Contention benchmark of the accumulation modes of prometheus_interface")
+oParser.add_argument("--updates", type=int, default=DEFAULT_UPDATES, help=f"updates per thread (default: {DEFAULT_UPDATES})")
+oParser.add_argument("--max-threads", type=int, default=os.cpu_count(), help="maximum number of threads (default: number of CPUs)")
+oParser.add_argument("--json", action="store_true", help="print the results in JSON format")
+oArgs = oParser.parse_args()
+
+dictResults = {}
+for sMode in ("locked", "sharded"):
+   listResults = []
+   fSingle = None
+   for nThreads in range(1, oArgs.max_threads + 1):
+      fThroughput = run(sMode, nThreads, oArgs.updates)
+      if fSingle is None:
+         fSingle = fThroughput
+      listResults.append({'threads': nThreads, 'updates_per_second': round(fThroughput), 'scaling': round(fThroughput / fSingle, 2)})
+   dictResults[sMode] = listResults
+
+if oArgs.json is True:
+   print(json.dumps(dictResults, indent=2))
+else:
+   print()
+   print(f"{'threads':>8} | {'locked [1/s]':>14} | {'scaling':>7} | {'sharded [1/s]':>14} | {'scaling':>7}")
+   for dictLocked, dictSharded in zip(dictResults['locked'], dictResults['sharded']):
+      print(f"{dictLocked['threads']:>8} | {dictLocked['updates_per_second']:>14} | {dictLocked['scaling']:>7} | {dictSharded['updates_per_second']:>14} | {dictSharded['scaling']:>7}")
+   print()
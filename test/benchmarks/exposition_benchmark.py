@@ -0,0 +1,125 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# exposition_benchmark.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Compares the exposition formats of prometheus_interface (CExposition) with the encoders of the Prometheus Python
+# client library: CPU time and bytes per scrape (uncompressed and gzip) for a registry with many series
+# (counters, gauges and histograms with several labels). The metrics are collected once; only the encoding is measured.
+# Before measuring, the text and OpenMetrics output of CExposition is parsed with the parsers of the client library
+# and compared with the output of the client library (the benchmark stops in case of any difference).
+#
+# Usage:
+#
+#    python exposition_benchmark.py [--series 2000] [--scrapes 20]
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, time, gzip, argparse
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface")))
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, Info, generate_latest
+from prometheus_client.openmetrics.exposition import generate_latest as generate_latest_openmetrics
+from prometheus_client.parser import text_string_to_metric_families
+from prometheus_client.openmetrics.parser import text_string_to_metric_families as text_string_to_metric_families_openmetrics
+
+from CExposition import CExpositionEncoder, FORMAT_TEXT, FORMAT_OPENMETRICS, FORMAT_PROTOBUF
+
+# --------------------------------------------------------------------------------------------------------------
+
+def create_registry(nSeries):
+   """Returns a registry with nSeries series per metric type
+   """
+   oRegistry  = CollectorRegistry()
+   oCounter   = Counter("bench_requests", "requests handled by the device under test", ["device", "channel", "result"], registry=oRegistry)
+   oGauge     = Gauge("bench_temperature_celsius", "temperature of the device under test", ["device", "channel", "sensor"], registry=oRegistry)
+   oHistogram = Histogram("bench_latency_seconds", "latency of the device under test", ["device", "channel", "result"], registry=oRegistry)
+   oInfo      = Info("bench_setup", "setup of the benchmark", registry=oRegistry)
+   oInfo.info({'file name': "exposition_benchmark.py", 'version': "1"}) # label name with invalid character (like the info of prometheus_interface)
+   for nSeriesIndex in range(nSeries):
+      tupleLabelValues = (f"device_{nSeriesIndex % 50}", f"channel_{nSeriesIndex // 50}", "ok" if nSeriesIndex % 3 else "error")
+      oCounter.labels(*tupleLabelValues).inc(nSeriesIndex)
+      oGauge.labels(*tupleLabelValues).set(20.0 + nSeriesIndex / 7)
+      oHistogram.labels(*tupleLabelValues).observe((nSeriesIndex % 100) / 97)
+   return oRegistry
+
+def measure(fnEncode, nScrapes):
+   """Returns the CPU time per scrape (ms, best of all scrapes) and the encoded bytes of the last scrape
+   """
+   listTimes = []
+   for nScrape in range(nScrapes):
+      fStart = time.process_time()
+      bytesOutput = fnEncode()
+      listTimes.append(time.process_time() - fStart)
+   return 1000 * min(listTimes), bytesOutput
+
+# --------------------------------------------------------------------------------------------------------------
+
+oParser = argparse.ArgumentParser(description="CPU time and bytes per scrape of the exposition formats")
+oParser.add_argument("--series", type=int, default=2000, help="number of series per metric type (default: 2000)")
+oParser.add_argument("--scrapes", type=int, default=20, help="number of scrapes per format, the best is taken (default: 20)")
+oArgs = oParser.parse_args()
+
+oRegistry   = create_registry(oArgs.series)
+listMetrics = list(oRegistry.collect())
+oEncoder    = CExpositionEncoder()
+
+class CCollected():
+   """Registry replacement returning the metrics collected before (the encoders of the client library call collect())"""
+   def collect(self):
+      return listMetrics
+
+listCandidates = [("client library, text 0.0.4",      lambda: generate_latest(CCollected())),
+                  ("CExposition, text 0.0.4",         lambda: oEncoder.encode(listMetrics, FORMAT_TEXT)),
+                  ("client library, OpenMetrics",     lambda: generate_latest_openmetrics(CCollected())),
+                  ("CExposition, OpenMetrics",        lambda: oEncoder.encode(listMetrics, FORMAT_OPENMETRICS)),
+                  ("CExposition, protobuf delimited", lambda: oEncoder.encode(listMetrics, FORMAT_PROTOBUF))]
+
+for sFormat, fnReference, fnParse in ((FORMAT_TEXT, lambda: generate_latest(CCollected()), text_string_to_metric_families),
+                                      (FORMAT_OPENMETRICS, lambda: generate_latest_openmetrics(CCollected()), text_string_to_metric_families_openmetrics)):
+   bytesOutput = oEncoder.encode(listMetrics, sFormat)
+   nFamilies = len(list(fnParse(bytesOutput.decode("utf-8"))))
+   if bytesOutput != fnReference():
+      print(f"Output of CExposition ({sFormat}) differs from the output of the client library")
+      sys.exit(1)
+   print(f"Output of CExposition ({sFormat}) parsed ({nFamilies} metric families) and identical to the client library")
+
+nSamples = sum(len(oMetric.samples) for oMetric in listMetrics)
+print()
+print(f"{len(listMetrics)} metric families, {nSamples} samples, best of {oArgs.scrapes} scrapes")
+print()
+print(f"{'format':34s} {'CPU ms':>9s} {'bytes':>10s} {'gzip bytes':>11s}")
+dictResults = {}
+for sCandidate, fnEncode in listCandidates:
+   fTime, bytesOutput = measure(fnEncode, oArgs.scrapes)
+   dictResults[sCandidate] = (fTime, len(bytesOutput))
+   print(f"{sCandidate:34s} {fTime:9.2f} {len(bytesOutput):10d} {len(gzip.compress(bytesOutput)):11d}")
+print()
+
+fReferenceTime, nReferenceBytes = dictResults["client library, text 0.0.4"]
+for sCandidate, (fTime, nBytes) in dictResults.items():
+   if sCandidate.startswith("CExposition"):
+      print(f"{sCandidate:34s} CPU saved: {100 * (fReferenceTime - fTime) / fReferenceTime:6.1f} %   bytes saved: {100 * (nReferenceBytes - nBytes) / nReferenceBytes:6.1f} %   (reference: client library, text 0.0.4)")
+print()
@@ -0,0 +1,126 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# importtime_benchmark.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Measures the cold start costs of the repository local prometheus_interface:
+# - the import time of the library (based on 'python -X importtime'), with the Robot Framework API already
+#   imported (like within a Robot Framework execution)
+# - the time to create an instance of the library
+#
+# and checks that
+# - both times are within the budget
+# - creating an instance neither imports the Prometheus Python client library nor starts the http server
+#
+# Usage:
+#
+#    python importtime_benchmark.py [--runs <number of runs>] [--budget-ms <budget in milliseconds>]
+#
+# Returns 0 if all checks are passed, otherwise 1.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, subprocess, argparse, json, statistics
+
+SUCCESS = 0
+ERROR   = 1
+
+LIBRARY_FOLDER = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface"))
+
+DEFAULT_RUNS      = 10
+DEFAULT_BUDGET_MS = 50.0
+
+# executed in a separate Python process for every run
+STARTUP_CODE = """
+import sys, time, json
+import robot.api.deco
+import prometheus_interface
+t0 = time.perf_counter()
+oLibrary = prometheus_interface.prometheus_interface()
+t1 = time.perf_counter()
+print(json.dumps({'startup_ms': (t1 - t0) * 1000, 'prometheus_client_imported': 'prometheus_client' in sys.modules}))
+"""
+
+# --------------------------------------------------------------------------------------------------------------
+
+def printerror(sMsg):
+   sys.stderr.write(f"Error: {sMsg}!\n")
+
+def run_once():
+   """Returns import time (ms), startup time (ms) and if prometheus_client has been imported during startup
+   """
+   oProcess = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_CODE], cwd=LIBRARY_FOLDER, capture_output=True, text=True)
+   if oProcess.returncode != 0:
+      raise Exception(oProcess.stderr)
+   fImportMs = None
+   for sLine in oProcess.stderr.splitlines():
+      # format: 'import time: <self us> | <cumulative us> | <module>'
+      listParts = sLine.split("|")
+      if ( (len(listParts) == 3) and (listParts[2].strip() == "prometheus_interface") ):
+         fImportMs = int(listParts[1]) / 1000
+   if fImportMs is None:
+      raise Exception("Import time of 'prometheus_interface' not found in output of '-X importtime'")
+   dictStartup = json.loads(oProcess.stdout.strip().splitlines()[-1])
+   return fImportMs, dictStartup['startup_ms'], dictStartup['prometheus_client_imported']
+
+# --------------------------------------------------------------------------------------------------------------
+
+oParser = argparse.ArgumentParser(description="Import time and startup benchmark of prometheus_interface")
+oParser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"number of runs (default: {DEFAULT_RUNS})")
+oParser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help=f"budget for import time plus startup time in milliseconds (default: {DEFAULT_BUDGET_MS})")
+oArgs = oParser.parse_args()
+
+listImportMs  = []
+listStartupMs = []
+bClientImported = False
+try:
+   for nRun in range(oArgs.runs):
+      fImportMs, fStartupMs, bImported = run_once()
+      listImportMs.append(fImportMs)
+      listStartupMs.append(fStartupMs)
+      bClientImported = bClientImported or bImported
+except Exception as ex:
+   printerror(str(ex))
+   sys.exit(ERROR)
+
+fImportMedian  = statistics.median(listImportMs)
+fStartupMedian = statistics.median(listStartupMs)
+
+print()
+print(f"runs                      : {oArgs.runs}")
+print(f"import time (median)      : {fImportMedian:.2f} ms")
+print(f"startup time (median)     : {fStartupMedian:.3f} ms")
+print(f"budget                    : {oArgs.budget_ms:.2f} ms")
+print()
+
+nReturn = SUCCESS
+if bClientImported is True:
+   printerror("The Prometheus Python client library is imported when creating an instance of the library")
+   nReturn = ERROR
+if fImportMedian + fStartupMedian > oArgs.budget_ms:
+   printerror(f"Cold start budget exceeded: {fImportMedian + fStartupMedian:.2f} ms > {oArgs.budget_ms:.2f} ms")
+   nReturn = ERROR
+if nReturn == SUCCESS:
+   print("Cold start budget kept")
+sys.exit(nReturn)
@@ -0,0 +1,102 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# profiling_overhead_benchmark.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Measures the overhead of the sampling profiler of prometheus_interface ('start_profiling'):
+# a CPU bound workload (some worker threads with deep call stacks) is executed with and without profiler,
+# the overhead is the relative increase of the duration (best of several runs).
+#
+# Usage:
+#
+#    python profiling_overhead_benchmark.py [--hz 100] [--threads 4] [--runs 5] [--budget 2.0]
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, time, threading, argparse
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface")))
+
+from CStackSampler import CStackSampler
+
+DEFAULT_BUDGET = 2.0 # percent
+
+# --------------------------------------------------------------------------------------------------------------
+
+def recurse(nDepth, nLoops):
+   if nDepth > 0:
+      return recurse(nDepth - 1, nLoops)
+   nSum = 0
+   for nLoop in range(nLoops):
+      nSum += nLoop * nLoop
+   return nSum
+
+def workload(nThreads):
+   """Returns the duration of the workload (every thread: 1000 calls with a stack depth of 30)
+   """
+   def worker():
+      for nCall in range(1000):
+         recurse(30, 5000)
+   listThreads = [threading.Thread(target=worker) for nThread in range(nThreads)]
+   fStart = time.perf_counter()
+   for oThread in listThreads:
+      oThread.start()
+   for oThread in listThreads:
+      oThread.join()
+   return time.perf_counter() - fStart
+
+# --------------------------------------------------------------------------------------------------------------
+
+oParser = argparse.ArgumentParser(description="Overhead of the sampling profiler of prometheus_interface")
+oParser.add_argument("--hz", type=float, default=100, help="sampling frequency (default: 100)")
+oParser.add_argument("--threads", type=int, default=4, help="number of worker threads (default: 4)")
+oParser.add_argument("--runs", type=int, default=5, help="number of runs, the best run is taken (default: 5)")
+oParser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help=f"maximum overhead in percent (default: {DEFAULT_BUDGET})")
+oArgs = oParser.parse_args()
+
+workload(oArgs.threads) # warm up
+listWithout = []
+listWith    = []
+for nRun in range(oArgs.runs):
+   listWithout.append(workload(oArgs.threads))
+   oSampler = CStackSampler(fHz=oArgs.hz)
+   oSampler.start()
+   listWith.append(workload(oArgs.threads))
+   oSampler.stop()
+   dictStatistics = oSampler.get_statistics()
+
+fWithout  = min(listWithout)
+fWith     = min(listWith)
+fOverhead = 100 * (fWith - fWithout) / fWithout
+
+print()
+print(f"without profiler  : {fWithout:.3f} s")
+print(f"with profiler     : {fWith:.3f} s ({oArgs.hz:g} Hz, {dictStatistics['samples']} samples in the last run)")
+print(f"overhead          : {fOverhead:.2f} % (measured by the profiler itself: {100 * dictStatistics['overhead']:.2f} %)")
+print(f"top functions     : {', '.join(f'{sModule}:{sFunction}' for (sFunction, sModule), nCount in oSampler.get_top('self', 3))}")
+print()
+if fOverhead > oArgs.budget:
+   print(f"Overhead budget of {oArgs.budget} % exceeded")
+   sys.exit(1)
+print("Overhead budget kept")
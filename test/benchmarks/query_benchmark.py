@@ -0,0 +1,83 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# query_benchmark.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Measures the keyword 'query_metrics' (PromQL subset, evaluated in process) for a counter with many series:
+# selective queries are resolved by the inverted label index and touch only the matching series, aggregations over
+# all series are bound by the number of series.
+#
+# Usage:
+#
+#    python query_benchmark.py [--series 100000] [--repetitions 20]
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, time, argparse
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface")))
+
+from prometheus_interface import prometheus_interface
+
+# --------------------------------------------------------------------------------------------------------------
+
+oParser = argparse.ArgumentParser(description="Time per query of the keyword 'query_metrics'")
+oParser.add_argument("--series", type=int, default=100000, help="number of series of the counter (default: 100000)")
+oParser.add_argument("--repetitions", type=int, default=20, help="number of repetitions per query, the best is taken (default: 20)")
+oArgs = oParser.parse_args()
+
+oInterface = prometheus_interface(port_number="none")
+oInterface.add_counter("bench_results", "results of the test cases", "testbench;component;testname")
+oInterface.add_histogram("bench_duration_seconds", "duration of the test cases", "testbench")
+
+fStart = time.perf_counter()
+for nSeriesIndex in range(oArgs.series):
+   sLabels = f"testbench_{nSeriesIndex % 20};component_{nSeriesIndex % 500};test_{nSeriesIndex}"
+   oInterface.inc_counter("bench_results", nSeriesIndex % 7, sLabels)
+for nSeriesIndex in range(1000):
+   oInterface.observe_histogram("bench_duration_seconds", str((nSeriesIndex % 100) / 37), f"testbench_{nSeriesIndex % 20}")
+print()
+print(f"{oArgs.series} series created in {time.perf_counter() - fStart:.1f} s")
+print()
+
+listQueries = ['bench_results_total{testname="test_4711"}',
+               'bench_results_total{component="component_42"}',
+               'sum by (testbench) (bench_results_total{component=~"component_4[0-9]"})',
+               'topk(5, bench_results_total{testbench="testbench_3"})',
+               'histogram_quantile(0.9, sum by (le) (bench_duration_seconds_bucket))',
+               'count(bench_results_total)',
+               'sum by (testbench) (bench_results_total)']
+
+print(f"{'query':76s} {'results':>8s} {'ms':>9s}")
+for sQuery in listQueries:
+   listTimes = []
+   for nRepetition in range(oArgs.repetitions):
+      fStart = time.perf_counter()
+      bSuccess, listResult = oInterface.query_metrics(sQuery)
+      listTimes.append(time.perf_counter() - fStart)
+   if bSuccess is not True:
+      print(f"{sQuery:76s} error: {listResult}")
+      continue
+   print(f"{sQuery:76s} {len(listResult):8d} {1000 * min(listTimes):9.3f}")
+print()
@@ -0,0 +1,225 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# scrape_load_harness.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# End-to-end throughput harness of prometheus_interface under scrape pressure (no Prometheus server required).
+#
+# The library is started in-process (http server on a free port). N update threads execute the keywords of the
+# test files generated by 'test/suite_2/gen_suite_files/gen_suite_files.py' in a loop (every thread acts as own
+# testbench), while M fake scrapers request '/metrics' concurrently with a fixed interval.
+#
+# Reported (JSON):
+#
+#    * update throughput (keyword calls per second) and keyword latencies (p50, p99, max) per keyword
+#    * scrape latencies (p50, p99, max), number of scrapes and failed scrapes
+#    * exposition size (bytes of the last scrape, average) and number of samples
+#
+# Usage:
+#
+#    python scrape_load_harness.py [--threads 4] [--scrapers 2] [--scrape-interval 0.1] [--duration 10] [--tests 10]
+#                                  [--accept <Accept header of the scrapers>] [--output <JSON file>]
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, time, json, threading, argparse
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface")))
+
+from prometheus_interface import prometheus_interface
+
+# values like in gen_suite_files.py
+LIST_RESULT_COUNTERS = ["num_passed", "num_failed", "num_unknown"]
+DICT_TEST_RESULTS    = {'num_passed': "PASSED", 'num_failed': "FAILED", 'num_unknown': "UNKNOWN"}
+LIST_BEATS_PER_MINUTE = [200, 180, 160, 140, 120, 100, 10, 20, 50]
+LIST_LIGHTINGS       = ["daylight", "twilight", "nightlight", "party", "twilight"]
+LIST_SUMMARY_VALUES  = [2, 4, 6]
+LIST_HISTOGRAM_VALUES = [4, 6, 8]
+
+# --------------------------------------------------------------------------------------------------------------
+
+def percentile(listValues, fPercentile):
+   """Returns the percentile of a sorted list (nearest rank)
+   """
+   if len(listValues) == 0:
+      return None
+   nIndex = min(len(listValues) - 1, max(0, int(round(fPercentile / 100.0 * len(listValues) + 0.5)) - 1))
+   return listValues[nIndex]
+
+def get_latencies(listDurations):
+   """Returns p50, p99 and max of a list of durations (ns) in microseconds
+   """
+   listDurations = sorted(listDurations)
+   if len(listDurations) == 0:
+      return {'count': 0}
+   return {'count'  : len(listDurations),
+           'p50_us' : round(percentile(listDurations, 50) / 1e3, 1),
+           'p99_us' : round(percentile(listDurations, 99) / 1e3, 1),
+           'max_us' : round(listDurations[-1] / 1e3, 1)}
+
+def add_metrics(oLibrary):
+   """Adds the metrics like the suite setup of 'test/suite_2'
+   """
+   for sCounter in LIST_RESULT_COUNTERS:
+      oLibrary.add_counter(name=sCounter, description=f": {sCounter}", labels="room;testbench;testname;testresult")
+   oLibrary.add_gauge(name="beats_per_minute", description=": current beats per minute", labels="room;testbench")
+   oLibrary.add_info(name="overview", description=": The overview about the test sytem", labels="room;testbench")
+   oLibrary.add_info(name="lighting", description=": The kind of lighting", labels="room;testbench")
+   oLibrary.add_summary(name="summary_delay", description=": summary test delays", labels="room;testbench")
+   oLibrary.add_histogram(name="histogram_delay", description=": histogram test delays", labels="room;testbench")
+
+def get_test_file(nThread, nFile, nTests):
+   """Returns the keyword calls of one generated test file as list of (keyword name, keyword arguments)
+   """
+   sTestbench = f"Testbench {nThread + 1}"
+   sLabels    = f"Room_1;{sTestbench}"
+   sTestName  = f"Test-{(nFile % nTests) + 1:02d}"
+   sCounter   = LIST_RESULT_COUNTERS[nFile % len(LIST_RESULT_COUNTERS)]
+   sResult    = DICT_TEST_RESULTS[sCounter]
+   sTestLabels = f"{sLabels};{sTestName};{sResult}"
+   return [("inc_counter",       {'name': sCounter, 'labels': sTestLabels}),
+           ("inc_counter",       {'name': sCounter, 'value': 2, 'labels': sTestLabels}),
+           ("set_gauge",         {'name': "beats_per_minute", 'value': LIST_BEATS_PER_MINUTE[nFile % len(LIST_BEATS_PER_MINUTE)], 'labels': sLabels}),
+           ("inc_gauge",         {'name': "beats_per_minute", 'labels': sLabels}),
+           ("inc_gauge",         {'name': "beats_per_minute", 'value': 5, 'labels': sLabels}),
+           ("dec_gauge",         {'name': "beats_per_minute", 'labels': sLabels}),
+           ("dec_gauge",         {'name': "beats_per_minute", 'value': 2, 'labels': sLabels}),
+           ("set_info",          {'name': "overview", 'info': f"test_name:{sTestName};test_result:{sResult};file_number:F-{nFile + 1}", 'labels': sLabels}),
+           ("set_info",          {'name': "lighting", 'info': f"lighting:{LIST_LIGHTINGS[(nFile // 3) % len(LIST_LIGHTINGS)]}", 'labels': sLabels}),
+           ("observe_summary",   {'name': "summary_delay", 'value': LIST_SUMMARY_VALUES[(nFile // 3) % len(LIST_SUMMARY_VALUES)], 'labels': sLabels}),
+           ("observe_histogram", {'name': "histogram_delay", 'value': LIST_HISTOGRAM_VALUES[(nFile // 3) % len(LIST_HISTOGRAM_VALUES)], 'labels': sLabels})]
+
+# --------------------------------------------------------------------------------------------------------------
+
+def run(nThreads, nScrapers, fScrapeInterval, fDuration, nTests, sAccept=None):
+   """Runs the workload and returns the report as dictionary
+   """
+   oLibrary = prometheus_interface(port_number="auto")
+   add_metrics(oLibrary)
+   sUrl = f"http://localhost:{oLibrary.get_port_number()}/metrics"
+
+   oStop    = threading.Event()
+   oBarrier = threading.Barrier(nThreads + nScrapers + 1)
+   listKeywordDurations = [{} for nThread in range(nThreads)] # per thread: keyword -> list of durations (ns)
+   listFailedKeywords   = [0] * nThreads
+   listScrapes          = [[] for nScraper in range(nScrapers)] # per scraper: list of (duration (ns), bytes)
+   listFailedScrapes    = [0] * nScrapers
+
+   def updater(nThread):
+      dictDurations = listKeywordDurations[nThread]
+      listFiles = [[(getattr(oLibrary, sKeyword), sKeyword, dictArgs) for sKeyword, dictArgs in get_test_file(nThread, nFile, nTests)]
+                   for nFile in range(nTests * len(LIST_RESULT_COUNTERS))]
+      oBarrier.wait()
+      nFile = 0
+      while not oStop.is_set():
+         for fnKeyword, sKeyword, dictArgs in listFiles[nFile % len(listFiles)]:
+            nStart = time.perf_counter_ns()
+            bSuccess, sResult = fnKeyword(**dictArgs)
+            nDuration = time.perf_counter_ns() - nStart
+            if bSuccess is not True:
+               listFailedKeywords[nThread] += 1
+            dictDurations.setdefault(sKeyword, []).append(nDuration)
+         nFile += 1
+
+   def scraper(nScraper):
+      dictHeaders = {'Accept': sAccept} if sAccept is not None else {}
+      oBarrier.wait()
+      while not oStop.is_set():
+         nStart = time.perf_counter_ns()
+         try:
+            with urlopen(Request(sUrl, headers=dictHeaders), timeout=30) as oResponse:
+               nBytes = len(oResponse.read())
+            listScrapes[nScraper].append((time.perf_counter_ns() - nStart, nBytes))
+         except OSError:
+            listFailedScrapes[nScraper] += 1
+         oStop.wait(fScrapeInterval)
+
+   listThreads  = [threading.Thread(target=updater, args=(nThread,), name=f"updater_{nThread}") for nThread in range(nThreads)]
+   listThreads += [threading.Thread(target=scraper, args=(nScraper,), name=f"scraper_{nScraper}") for nScraper in range(nScrapers)]
+   for oThread in listThreads:
+      oThread.start()
+   oBarrier.wait()
+   fStart = time.perf_counter()
+   time.sleep(fDuration)
+   oStop.set()
+   for oThread in listThreads:
+      oThread.join()
+   fElapsed = time.perf_counter() - fStart
+
+   # -- report
+   dictKeywords = {}
+   listAll = []
+   for dictDurations in listKeywordDurations:
+      for sKeyword, listDurations in dictDurations.items():
+         dictKeywords.setdefault(sKeyword, []).extend(listDurations)
+         listAll.extend(listDurations)
+   listScrapeResults = [tupleScrape for listScraperResults in listScrapes for tupleScrape in listScraperResults]
+   with urlopen(Request(sUrl, headers={'Accept': sAccept} if sAccept is not None else {}), timeout=30) as oResponse:
+      bytesExposition = oResponse.read()
+      sContentType = oResponse.headers.get('Content-Type', "")
+   nSamples = None # not counted for the protobuf format
+   if not sContentType.startswith("application/vnd.google.protobuf"):
+      nSamples = len([sLine for sLine in bytesExposition.decode("utf-8", errors="replace").splitlines() if sLine and not sLine.startswith("#")])
+
+   dictReport = {}
+   dictReport['configuration'] = {'threads': nThreads, 'scrapers': nScrapers, 'scrape_interval_s': fScrapeInterval,
+                                  'duration_s': round(fElapsed, 3), 'tests': nTests, 'accept': sAccept}
+   dictReport['updates'] = {'keyword_calls': len(listAll),
+                            'failed': sum(listFailedKeywords),
+                            'calls_per_second': round(len(listAll) / fElapsed),
+                            'latency': get_latencies(listAll),
+                            'latency_per_keyword': {sKeyword: get_latencies(listDurations) for sKeyword, listDurations in sorted(dictKeywords.items())}}
+   dictReport['scrapes'] = {'scrapes': len(listScrapeResults),
+                            'failed': sum(listFailedScrapes),
+                            'scrapes_per_second': round(len(listScrapeResults) / fElapsed, 2),
+                            'latency': get_latencies([nDuration for nDuration, nBytes in listScrapeResults])}
+   dictReport['exposition'] = {'content_type': sContentType,
+                               'bytes_last': len(bytesExposition),
+                               'bytes_average': round(sum(nBytes for nDuration, nBytes in listScrapeResults) / len(listScrapeResults)) if len(listScrapeResults) > 0 else None,
+                               'samples': nSamples}
+   return dictReport
+
+# --------------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+   oParser = argparse.ArgumentParser(description="Scrape load simulator and end-to-end throughput harness of prometheus_interface")
+   oParser.add_argument("--threads", type=int, default=4, help="number of update threads (default: 4)")
+   oParser.add_argument("--scrapers", type=int, default=2, help="number of concurrent scrapers (default: 2)")
+   oParser.add_argument("--scrape-interval", type=float, default=0.1, help="pause (seconds) of every scraper between two scrapes (default: 0.1)")
+   oParser.add_argument("--duration", type=float, default=10.0, help="duration of the workload in seconds (default: 10)")
+   oParser.add_argument("--tests", type=int, default=10, help="number of test names per testbench (default: 10)")
+   oParser.add_argument("--accept", default=None, help="Accept header of the scrapers (default: none)")
+   oParser.add_argument("--output", default=None, help="JSON file the report is written to (default: stdout)")
+   oArgs = oParser.parse_args()
+
+   dictReport = run(oArgs.threads, oArgs.scrapers, oArgs.scrape_interval, oArgs.duration, oArgs.tests, oArgs.accept)
+   sReport = json.dumps(dictReport, indent=2)
+   if oArgs.output is None:
+      print(sReport)
+   else:
+      with open(oArgs.output, "w", encoding="utf-8") as oFile:
+         oFile.write(sReport + "\n")
+      print(f"Report written to '{oArgs.output}'")
+   os._exit(0) # the http server thread of the library is not stopped
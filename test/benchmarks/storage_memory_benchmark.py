@@ -0,0 +1,98 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# storage_memory_benchmark.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Compares the memory held by the series of prometheus_interface with storage 'client' (label children of the
+# Prometheus Python client library) and storage 'columnar' (CColumnarStore). A counter with labels 'room', 'testbench'
+# and 'testname' is incremented by the keyword 'inc_counter' for the given number of series; the label values are
+# repeated across the series (like in real test suites). Every storage is measured in an own process (tracemalloc:
+# memory allocated by creating the series, including the series index and the label index of the library).
+#
+# Usage:
+#
+#    python storage_memory_benchmark.py [--series 1000000]
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, time, json, argparse, subprocess, tracemalloc
+
+LIBRARY_FOLDER = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface"))
+
+STORAGES = ("client", "columnar")
+
+# --------------------------------------------------------------------------------------------------------------
+
+def measure(sStorage, nSeries):
+   """Creates the series with the given storage (in this process) and returns the results as dictionary
+   """
+   sys.path.insert(0, LIBRARY_FOLDER)
+   from prometheus_interface import prometheus_interface
+   from prometheus_client import generate_latest, REGISTRY
+   oInterface = prometheus_interface(port_number="none", storage=sStorage, self_instrumentation=False)
+   oInterface.add_counter("bench_results", "results of the test cases", "room;testbench;testname")
+   tracemalloc.start()
+   nStartBytes = tracemalloc.get_traced_memory()[0]
+   fStart = time.perf_counter()
+   for nSeriesIndex in range(nSeries):
+      sLabels = f"Room_{nSeriesIndex % 10};Testbench {(nSeriesIndex // 10) % 100};test_{nSeriesIndex // 1000}"
+      oInterface.inc_counter("bench_results", 1, sLabels)
+   fCreate = time.perf_counter() - fStart
+   nBytes = tracemalloc.get_traced_memory()[0] - nStartBytes
+   tracemalloc.stop()
+   fStart = time.perf_counter()
+   nScrapeBytes = len(generate_latest(REGISTRY))
+   fScrape = time.perf_counter() - fStart
+   return {'storage': sStorage, 'series': nSeries, 'bytes': nBytes, 'create_s': fCreate, 'scrape_s': fScrape, 'scrape_bytes': nScrapeBytes}
+
+# --------------------------------------------------------------------------------------------------------------
+
+oParser = argparse.ArgumentParser(description="Memory held by the series of prometheus_interface per storage")
+oParser.add_argument("--series", type=int, default=1000000, help="number of series of the counter (default: 1000000)")
+oParser.add_argument("--storage", choices=STORAGES, default=None, help="measures a single storage in this process (used internally)")
+oArgs = oParser.parse_args()
+
+if oArgs.storage is not None:
+   print(json.dumps(measure(oArgs.storage, oArgs.series)))
+   sys.exit(0)
+
+dictResults = {}
+for sStorage in STORAGES:
+   oProcess = subprocess.run([sys.executable, os.path.abspath(__file__), "--series", str(oArgs.series), "--storage", sStorage],
+                             capture_output=True, text=True)
+   if oProcess.returncode != 0:
+      print(oProcess.stderr)
+      sys.exit(1)
+   dictResults[sStorage] = json.loads(oProcess.stdout.strip().splitlines()[-1])
+
+print()
+print(f"{oArgs.series} series (memory traced by tracemalloc while creating the series; scrape without tracing)")
+print()
+print(f"{'storage':10s} {'MB':>10s} {'bytes/series':>13s} {'create s':>9s} {'scrape s':>9s}")
+for sStorage, dictResult in dictResults.items():
+   print(f"{sStorage:10s} {dictResult['bytes'] / 1e6:10.1f} {dictResult['bytes'] / dictResult['series']:13.0f} {dictResult['create_s']:9.2f} {dictResult['scrape_s']:9.2f}")
+print()
+nClientBytes = dictResults['client']['bytes']
+print(f"memory saved by storage 'columnar': {100 * (nClientBytes - dictResults['columnar']['bytes']) / nClientBytes:.1f} %")
+print()
@@ -0,0 +1,170 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# otlp_stand_in.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Local stand-in for an OpenTelemetry collector, to test the OTLP backend of prometheus_interface without a collector.
+#
+# Receives OTLP/HTTP metric payloads ('POST /v1/metrics', protobuf encoding), decodes them and prints one line
+# per data point (metric name, kind, attributes and values).
+#
+# Usage:
+#
+#    python otlp_stand_in.py [--port 4318] [--fail <number of requests answered with HTTP 503 first>]
+#
+# and in the test suite:
+#
+#    Library    prometheus_interface    backend=otlp    otlp_endpoint=http://localhost:4318    otlp_interval=1
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, struct, argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../PrometheusInterface")))
+
+from CProtobufWire import decode_fields
+
+DICT_KINDS = {5: "gauge", 7: "sum", 9: "histogram", 11: "summary"}
+
+# --------------------------------------------------------------------------------------------------------------
+
+def get_fields(bytesMessage, nField):
+   return [value for nNumber, nWireType, value in decode_fields(bytesMessage) if nNumber == nField]
+
+def get_string(bytesMessage, nField, sDefault=""):
+   listValues = get_fields(bytesMessage, nField)
+   return listValues[-1].decode("utf-8") if len(listValues) > 0 else sDefault
+
+def get_double(bytesMessage, nField):
+   listValues = get_fields(bytesMessage, nField)
+   return struct.unpack('<d', listValues[-1])[0] if len(listValues) > 0 else None
+
+def get_fixed64(bytesMessage, nField):
+   listValues = get_fields(bytesMessage, nField)
+   return struct.unpack('<Q', listValues[-1])[0] if len(listValues) > 0 else None
+
+def get_attributes(bytesDataPoint, nField):
+   return {get_string(bytesKeyValue, 1): get_string(get_fields(bytesKeyValue, 2)[0], 1) for bytesKeyValue in get_fields(bytesDataPoint, nField)}
+
+def decode_request(bytesRequest):
+   """Returns one dictionary per data point of an ExportMetricsServiceRequest
+   """
+   listDataPoints = []
+   for bytesResourceMetrics in get_fields(bytesRequest, 1):
+      for bytesScopeMetrics in get_fields(bytesResourceMetrics, 2):
+         for bytesMetric in get_fields(bytesScopeMetrics, 2):
+            sName = get_string(bytesMetric, 1)
+            for nKindField, sKind in DICT_KINDS.items():
+               for bytesData in get_fields(bytesMetric, nKindField):
+                  listTemporality = get_fields(bytesData, 2) if sKind in ("sum", "histogram") else []
+                  for bytesDataPoint in get_fields(bytesData, 1):
+                     dictDataPoint = {'name': sName, 'kind': sKind}
+                     if len(listTemporality) > 0:
+                        dictDataPoint['temporality'] = {1: "delta", 2: "cumulative"}.get(listTemporality[0])
+                     if sKind != "gauge":
+                        dictDataPoint['start_time'] = get_fixed64(bytesDataPoint, 2) # time window of the data point (ns)
+                        dictDataPoint['time'] = get_fixed64(bytesDataPoint, 3)
+                     if sKind in ("gauge", "sum"):
+                        dictDataPoint['attributes'] = get_attributes(bytesDataPoint, 7)
+                        dictDataPoint['value'] = get_double(bytesDataPoint, 4)
+                     elif sKind == "summary":
+                        dictDataPoint['attributes'] = get_attributes(bytesDataPoint, 7)
+                        dictDataPoint['count'] = get_fixed64(bytesDataPoint, 4)
+                        dictDataPoint['sum'] = get_double(bytesDataPoint, 5)
+                     else:
+                        dictDataPoint['attributes'] = get_attributes(bytesDataPoint, 9)
+                        dictDataPoint['count'] = get_fixed64(bytesDataPoint, 4)
+                        dictDataPoint['sum'] = get_double(bytesDataPoint, 5)
+                        bytesBuckets = get_fields(bytesDataPoint, 6)[0]
+                        dictDataPoint['bucket_counts'] = list(struct.unpack(f'<{len(bytesBuckets) // 8}Q', bytesBuckets))
+                     listDataPoints.append(dictDataPoint)
+   return listDataPoints
+
+# --------------------------------------------------------------------------------------------------------------
+
+class COtlpHandler(BaseHTTPRequestHandler):
+
+   def do_POST(self):
+      bytesRequest = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+      if self.server.nFail > 0:
+         self.server.nFail -= 1
+         self.server.nFailed += 1
+         self.send_response(503)
+         self.end_headers()
+         if self.server.bVerbose is True:
+            print(f"request ({len(bytesRequest)} bytes) answered with 503", flush=True)
+         return
+      if self.path != "/v1/metrics":
+         self.send_response(404)
+         self.end_headers()
+         return
+      listDataPoints = decode_request(bytesRequest)
+      self.server.add_request(listDataPoints)
+      if self.server.bVerbose is True:
+         print(f"request ({len(bytesRequest)} bytes, {len(listDataPoints)} data points)", flush=True)
+         for dictDataPoint in listDataPoints:
+            print(f"   {dictDataPoint}", flush=True)
+      self.send_response(200)
+      self.send_header('Content-Type', "application/x-protobuf")
+      self.send_header('Content-Length', "0")
+      self.end_headers()
+
+   def log_message(self, format, *args):
+      pass
+
+# eof class COtlpHandler():
+
+class COtlpStandIn(ThreadingHTTPServer):
+   """The stand-in server; keeps the data points of all received requests
+   """
+
+   daemon_threads = True
+
+   def __init__(self, tupleAddress, nFail=0, bVerbose=True):
+      self.bVerbose     = bVerbose # print the received data points
+      self.nFail        = nFail    # number of requests still to be answered with 503
+      self.nFailed      = 0        # number of requests answered with 503
+      self.listRequests = []       # data points per received request (without the failed requests)
+      super().__init__(tupleAddress, COtlpHandler)
+
+   def add_request(self, listDataPoints):
+      self.listRequests.append(listDataPoints)
+
+# eof class COtlpStandIn():
+
+# --------------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+   oParser = argparse.ArgumentParser(description="Local stand-in for an OpenTelemetry collector (OTLP/HTTP metrics)")
+   oParser.add_argument("--port", type=int, default=4318, help="port of the http server (default: 4318)")
+   oParser.add_argument("--fail", type=int, default=0, help="number of requests answered with HTTP 503 first (to test the retry queue)")
+   oArgs = oParser.parse_args()
+
+   oServer = COtlpStandIn(("", oArgs.port), oArgs.fail)
+   print(f"OTLP stand-in listening on port {oArgs.port}", flush=True)
+   try:
+      oServer.serve_forever()
+   except KeyboardInterrupt:
+      pass
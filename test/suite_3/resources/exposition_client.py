@@ -0,0 +1,197 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# exposition_client.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Test library of suite_3: scrapes the http server of prometheus_interface like a Prometheus server
+#   (format selected by the 'Accept' header) and parses the exposition.
+#
+# - The text and OpenMetrics formats are parsed with the parsers of the Prometheus Python client library.
+#   The protobuf format (delimited 'MetricFamily' messages) is decoded as far as needed for the metric names
+#   and label names.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import urllib.request
+
+from robot.api.deco import keyword, library
+
+ACCEPT_HEADERS = {'text'       : "text/plain; version=0.0.4",
+                  'openmetrics': "application/openmetrics-text; version=1.0.0",
+                  'protobuf'   : "application/vnd.google.protobuf; proto=io.prometheus.client.MetricFamily; encoding=delimited"}
+
+# --------------------------------------------------------------------------------------------------------------
+
+def read_varint(bytesData, nPosition):
+   """Returns the varint at the given position and the position behind it
+   """
+   nValue = 0
+   nShift = 0
+   while True:
+      nByte = bytesData[nPosition]
+      nPosition += 1
+      nValue |= (nByte & 0x7F) << nShift
+      if nByte < 0x80:
+         return nValue, nPosition
+      nShift += 7
+
+def read_fields(bytesData):
+   """Returns the fields of a protobuf message as list of (field number, value); length delimited values are returned as bytes
+   """
+   listFields = []
+   nPosition  = 0
+   while nPosition < len(bytesData):
+      nKey, nPosition = read_varint(bytesData, nPosition)
+      nWireType = nKey & 0x07
+      if nWireType == 0:
+         value, nPosition = read_varint(bytesData, nPosition)
+      elif nWireType == 1:
+         value = bytesData[nPosition:nPosition + 8]
+         nPosition += 8
+      elif nWireType == 2:
+         nLength, nPosition = read_varint(bytesData, nPosition)
+         value = bytesData[nPosition:nPosition + nLength]
+         nPosition += nLength
+      elif nWireType == 5:
+         value = bytesData[nPosition:nPosition + 4]
+         nPosition += 4
+      else:
+         raise ValueError(f"Unsupported wire type {nWireType}")
+      listFields.append((nKey >> 3, value))
+   return listFields
+
+# --------------------------------------------------------------------------------------------------------------
+
+@library
+class exposition_client():
+   """Scrapes and parses the exposition of prometheus_interface
+   """
+
+   ROBOT_AUTO_KEYWORDS = False
+   ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+   def __init__(self):
+      pass
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   @keyword
+   def scrape_metrics(self, port_number=None, exposition_format="text", names=None):
+      """Scrapes the http server at the given port in the given format (``text``, ``openmetrics`` or ``protobuf``)
+and returns the exposition (str; protobuf: bytes). With ``names`` (semicolon separated list) the scrape is restricted by ``name[]``.
+      """
+      sUrl = f"http://127.0.0.1:{port_number}/metrics"
+      if names is not None:
+         sUrl = sUrl + "?" + "&".join(f"name[]={sName}" for sName in names.split(';'))
+      oRequest = urllib.request.Request(sUrl, headers={'Accept': ACCEPT_HEADERS[exposition_format]})
+      with urllib.request.urlopen(oRequest, timeout=10) as oResponse:
+         bytesExposition = oResponse.read()
+      if exposition_format == "protobuf":
+         return bytesExposition
+      return bytesExposition.decode("utf-8")
+
+   @keyword
+   def parse_exposition(self, exposition=None, exposition_format="text"):
+      """Parses the exposition and returns the samples as dictionary: ``name{label="value",...}`` (labels sorted by name) -> value.
+Raises an exception in case of the exposition cannot be parsed.
+      """
+      dictSamples = {}
+      for oFamily in self.__parse_families(exposition, exposition_format):
+         for oSample in oFamily.samples:
+            sLabels = ",".join(f'{sLabelName}="{sLabelValue}"' for sLabelName, sLabelValue in sorted(oSample.labels.items()))
+            dictSamples[f"{oSample.name}{{{sLabels}}}"] = oSample.value
+      return dictSamples
+
+   @keyword
+   def parse_backfill(self, exposition=None):
+      """Parses an OpenMetrics exposition with timestamped points (like written by ``backfill_output_xml``) and returns the points
+as dictionary: ``name{label="value",...}`` -> list of values (in order of the timestamps). The OpenMetrics parser of the client library
+does not accept several points of a histogram series, therefore the points of every timestamp are parsed separately (with the headers
+of their metric families). Raises an exception in case of any point cannot be parsed.
+      """
+      dictChunks   = {} # timestamp -> lines of the points with this timestamp (and the headers of their metric families)
+      dictFamilies = {} # timestamp -> metric family of the last line of the chunk
+      listHeaders  = []
+      sFamily      = None
+      for sLine in exposition.splitlines():
+         if sLine == "# EOF":
+            break
+         if sLine.startswith("#"):
+            if sLine.split()[2] != sFamily:
+               sFamily     = sLine.split()[2]
+               listHeaders = []
+            listHeaders.append(sLine)
+            continue
+         fTimestamp = float(sLine.rsplit(' ', 1)[1])
+         listLines  = dictChunks.setdefault(fTimestamp, [])
+         if dictFamilies.get(fTimestamp) != sFamily:
+            listLines.extend(listHeaders)
+            dictFamilies[fTimestamp] = sFamily
+         listLines.append(sLine)
+      dictPoints = {}
+      for fTimestamp in sorted(dictChunks):
+         for sSample, value in self.parse_exposition("\n".join(dictChunks[fTimestamp]) + "\n# EOF\n", "openmetrics").items():
+            dictPoints.setdefault(sSample, []).append(value)
+      return dictPoints
+
+   @keyword
+   def get_exposition_names(self, exposition=None, exposition_format="text"):
+      """Returns the metric names and the label names of all metric families of the exposition (sorted list)
+      """
+      setNames = set()
+      if exposition_format != "protobuf":
+         for oFamily in self.__parse_families(exposition, exposition_format):
+            setNames.add(oFamily.name)
+            for oSample in oFamily.samples:
+               setNames.update(oSample.labels.keys())
+         return sorted(setNames)
+      nPosition = 0
+      while nPosition < len(exposition):
+         nLength, nPosition = read_varint(exposition, nPosition)
+         for nFamilyField, bytesFamilyValue in read_fields(exposition[nPosition:nPosition + nLength]):
+            if nFamilyField == 1:   # MetricFamily.name
+               setNames.add(bytesFamilyValue.decode("utf-8"))
+            elif nFamilyField == 4: # MetricFamily.metric
+               for nMetricField, bytesMetricValue in read_fields(bytesFamilyValue):
+                  if nMetricField == 1: # Metric.label (LabelPair)
+                     setNames.update(bytesLabelValue.decode("utf-8") for nLabelField, bytesLabelValue in read_fields(bytesMetricValue) if nLabelField == 1)
+         nPosition += nLength
+      return sorted(setNames)
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   def __parse_families(self, sExposition, sExpositionFormat):
+      if sExpositionFormat == "openmetrics":
+         from prometheus_client.openmetrics.parser import text_string_to_metric_families
+      elif sExpositionFormat == "text":
+         from prometheus_client.parser import text_string_to_metric_families
+      else:
+         raise ValueError(f"Format '{sExpositionFormat}' cannot be parsed; expected 'text' or 'openmetrics'")
+      return list(text_string_to_metric_families(sExposition))
+
+# eof class exposition_client():
@@ -0,0 +1,158 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# aggregator_client.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Test library of suite_5: runs the metric aggregator ('metric_aggregator.py') in process and provides its series.
+#
+# - The agent connects to a TCP proxy in front of the aggregator. The proxy can drop the connection after the aggregator
+#   acknowledged a batch, before the acknowledgement reaches the agent (the agent has to send the batch again,
+#   the aggregator must not apply it twice).
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, socket, threading, socketserver
+
+from robot.api.deco import keyword, library
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../PrometheusInterface")))
+
+from metric_aggregator import start_aggregator
+from CMetricAgent import parse_address
+
+# --------------------------------------------------------------------------------------------------------------
+
+class CProxyHandler(socketserver.BaseRequestHandler):
+   """Forwards a single agent connection to the aggregator; drops the connection instead of forwarding an acknowledgement, if requested
+   """
+
+   def handle(self):
+      oProxy = self.server.oProxy
+      oUpstream = socket.create_connection(oProxy.tupleAggregatorAddress)
+      oThread = threading.Thread(target=self.__forward_acknowledgements, args=(oUpstream,), daemon=True)
+      oThread.start()
+      try:
+         while True:
+            bytesData = self.request.recv(65536)
+            if bytesData == b"":
+               break
+            oUpstream.sendall(bytesData)
+      except OSError:
+         pass # connection dropped
+      finally:
+         oUpstream.close()
+      oThread.join()
+
+   def __forward_acknowledgements(self, oUpstream):
+      oProxy = self.server.oProxy
+      try:
+         for bytesLine in oUpstream.makefile("rb"):
+            if oProxy.take_drop() is True:
+               # the batch is applied by the aggregator, but the agent does not get the acknowledgement
+               self.request.shutdown(socket.SHUT_RDWR)
+               oUpstream.shutdown(socket.SHUT_RDWR)
+               return
+            self.request.sendall(bytesLine)
+      except OSError:
+         pass
+
+# eof class CProxyHandler():
+
+class CProxyServer(socketserver.ThreadingTCPServer):
+   daemon_threads      = True
+   allow_reuse_address = True
+
+   def __init__(self, tupleAddress, oProxy):
+      self.oProxy = oProxy
+      super().__init__(tupleAddress, CProxyHandler)
+
+# eof class CProxyServer():
+
+# --------------------------------------------------------------------------------------------------------------
+
+@library
+class aggregator_client():
+   """Metric aggregator in process, behind a proxy able to drop acknowledgements
+   """
+
+   ROBOT_AUTO_KEYWORDS = False
+   ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+   def __init__(self):
+      self.__oLock  = threading.Lock()
+      self.__oStore = None
+      self.__nDrop    = 0 # number of acknowledgements still to be dropped
+      self.__nDropped = 0
+      self.tupleAggregatorAddress = None
+
+   def __del__(self):
+      pass
+
+   def take_drop(self):
+      """Returns True, in case of the next acknowledgement has to be dropped
+      """
+      with self.__oLock:
+         if self.__nDrop == 0:
+            return False
+         self.__nDrop -= 1
+         self.__nDropped += 1
+         return True
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   @keyword
+   def start_aggregator(self, proxy_address=None, agent_label=""):
+      """Starts the aggregator (free ports) and the proxy the agent connects to (``proxy_address``).
+With the default ``agent_label`` (empty) the series are provided without the label identifying the agent.
+      """
+      oServer, self.__oStore, oHttpServer = start_aggregator("127.0.0.1:0", 0, agent_label)
+      self.tupleAggregatorAddress = oServer.server_address
+      oProxyServer = CProxyServer(parse_address(proxy_address), self)
+      threading.Thread(target=oProxyServer.serve_forever, name="aggregator_proxy", daemon=True).start()
+
+   @keyword
+   def drop_next_acknowledgement(self):
+      """The connection of the agent is dropped instead of forwarding the next acknowledgement of the aggregator
+      """
+      with self.__oLock:
+         self.__nDrop += 1
+
+   @keyword
+   def get_dropped_acknowledgements(self):
+      with self.__oLock:
+         return self.__nDropped
+
+   @keyword
+   def get_aggregated_samples(self):
+      """Returns the samples of the aggregator as dictionary: ``name{label="value",...}`` (labels sorted by name) -> value
+      """
+      dictSamples = {}
+      for oMetric in self.__oStore.collect():
+         for oSample in oMetric.samples:
+            sLabels = ",".join(f'{sLabelName}="{sLabelValue}"' for sLabelName, sLabelValue in sorted(oSample.labels.items()))
+            dictSamples[f"{oSample.name}{{{sLabels}}}"] = oSample.value
+      return dictSamples
+
+# eof class aggregator_client():
@@ -0,0 +1,94 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# otlp_client.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Test library of suite_6 and suite_7: runs the OTLP stand-in ('test/otlp_stand_in/otlp_stand_in.py') in process
+#   and provides the decoded data points of the payloads posted by prometheus_interface.
+#
+# - The stand-in is started when the library is imported (the OTLP backend starts exporting with the import
+#   of prometheus_interface, therefore this library has to be imported first).
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import os, sys, threading
+
+from robot.api.deco import keyword, library
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../otlp_stand_in")))
+
+from otlp_stand_in import COtlpStandIn
+
+# --------------------------------------------------------------------------------------------------------------
+
+@library
+class otlp_client():
+   """OTLP stand-in in process
+   """
+
+   ROBOT_AUTO_KEYWORDS = False
+   ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+   def __init__(self, port_number=4318):
+      self.__oServer = COtlpStandIn(("127.0.0.1", int(port_number)), bVerbose=False)
+      threading.Thread(target=self.__oServer.serve_forever, name="otlp_stand_in", daemon=True).start()
+
+   def __del__(self):
+      pass
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   @keyword
+   def fail_next_requests(self, count=1):
+      """The next ``count`` requests are answered with HTTP 503 (and not decoded)
+      """
+      self.__oServer.nFail += int(count)
+
+   @keyword
+   def get_failed_requests(self):
+      return self.__oServer.nFailed
+
+   @keyword
+   def get_data_points(self, name=None, **attributes):
+      """Returns the data points of the metric ``name`` in order of receipt (dictionaries like printed by the stand-in),
+restricted to the data points with the given ``attributes``
+      """
+      listDataPoints = []
+      for listRequest in list(self.__oServer.listRequests):
+         for dictDataPoint in listRequest:
+            if ( (dictDataPoint['name'] == name) and (attributes.items() <= dictDataPoint['attributes'].items()) ):
+               listDataPoints.append(dictDataPoint)
+      return listDataPoints
+
+   @keyword
+   def get_last_data_point(self, name=None, **attributes):
+      """Returns the last received data point of the metric ``name`` (with the given ``attributes``); fails in case of none is received
+      """
+      listDataPoints = self.get_data_points(name, **attributes)
+      if len(listDataPoints) == 0:
+         raise AssertionError(f"No data point of '{name}' received")
+      return listDataPoints[-1]
+
+# eof class otlp_client():
@@ -0,0 +1,97 @@
+# **************************************************************************************************************
+#
+#  Copyright 2020-2024 Robert Bosch GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# **************************************************************************************************************
+#
+# thread_client.py
+#
+# XC-HWP/ESW3-Queckenstedt
+#
+# Purpose:
+# - Test library of suite_8: calls keywords of prometheus_interface within a worker thread, to test the thread local
+#   label context. All calls are executed one after the other within the same worker thread.
+#
+# - Robot Framework keywords cannot be run outside the main thread, therefore the methods of the library instance
+#   are called directly.
+#
+# --------------------------------------------------------------------------------------------------------------
+#
+# 19.10.2026
+#
+# --------------------------------------------------------------------------------------------------------------
+
+import queue, threading
+
+from robot.api.deco import keyword, library
+from robot.libraries.BuiltIn import BuiltIn
+
+# --------------------------------------------------------------------------------------------------------------
+
+@library
+class thread_client():
+   """Worker thread calling keywords of a library instance
+   """
+
+   ROBOT_AUTO_KEYWORDS = False
+   ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+   def __init__(self):
+      self.__oLibrary = None
+      self.__oCalls   = None
+      self.__oThread  = None
+
+   def __del__(self):
+      pass
+
+   def __run(self):
+      while True:
+         tupleCall = self.__oCalls.get()
+         if tupleCall is None:
+            return
+         fnMethod, listArgs, dictKwargs, oResults = tupleCall
+         try:
+            oResults.put((True, fnMethod(*listArgs, **dictKwargs)))
+         except Exception as ex:
+            oResults.put((False, ex))
+
+   # --------------------------------------------------------------------------------------------------------------
+
+   @keyword
+   def start_worker_thread(self, library=None):
+      """Starts the worker thread calling the keywords of ``library`` (name of the library instance, e.g. ``rf.prometheus_interface``)
+      """
+      self.__oLibrary = BuiltIn().get_library_instance(library)
+      self.__oCalls   = queue.Queue()
+      self.__oThread  = threading.Thread(target=self.__run, name="thread_client", daemon=True)
+      self.__oThread.start()
+
+   @keyword
+   def call_in_worker_thread(self, method=None, *args, **kwargs):
+      """Calls the keyword ``method`` of the library within the worker thread and returns its return value
+      """
+      oResults = queue.Queue()
+      self.__oCalls.put((getattr(self.__oLibrary, method), args, kwargs, oResults))
+      bReturned, value = oResults.get(timeout=10)
+      if bReturned is False:
+         raise value
+      return value
+
+   @keyword
+   def stop_worker_thread(self):
+      self.__oCalls.put(None)
+      self.__oThread.join()
+
+# eof class thread_client():